@@ -13,6 +13,7 @@ from src.db.base import Base
 from src.db.models.community import Community  # Импортируем модель Community
 from src.db.models.raffle import Raffle  # Импортируем модель Raffle
 from src.db.models.notification import Notification  # Импортируем модель Notification
+from src.db.models.blacklist import BlacklistEntry  # Импортируем модель BlacklistEntry
 
 # Загрузка переменных окружения из .env
 load_dotenv()
@@ -21,25 +22,36 @@ config = context.config
 
 # Установка DATABASE_URL из настроек приложения
 from src.core.config import settings
+from sqlalchemy.engine import make_url
 database_url = settings.DATABASE_URL
-print(f"Using DATABASE_URL: {database_url}")  # Отладочный вывод
 
 config.set_main_option('sqlalchemy.url', database_url)
 
-connectable = engine_from_config(
-    config.get_section(config.config_ini_section),
-    prefix='sqlalchemy.',
-    poolclass=pool.NullPool)
-
-try:
-    with connectable.connect() as connection:
-        context.configure(
-            connection=connection,
-            target_metadata=Base.metadata
-        )
-
-        with context.begin_transaction():
-            context.run_migrations()
-except Exception as e:
-    print(f"Database connection error: {e}")
-    raise
\ No newline at end of file
+
+def run_migrations(connection):
+    context.configure(
+        connection=connection,
+        target_metadata=Base.metadata
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+# python -m src.db.migrate передает свое соединение, на котором уже взят advisory-lock
+connection = config.attributes.get("connection")
+if connection is not None:
+    run_migrations(connection)
+else:
+    print(f"Using DATABASE_URL: {make_url(database_url).render_as_string(hide_password=True)}")  # Отладочный вывод
+    connectable = engine_from_config(
+        config.get_section(config.config_ini_section),
+        prefix='sqlalchemy.',
+        poolclass=pool.NullPool)
+
+    try:
+        with connectable.connect() as connection:
+            run_migrations(connection)
+    except Exception as e:
+        print(f"Database connection error: {e}")
+        raise
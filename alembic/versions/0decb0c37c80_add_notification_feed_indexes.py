@@ -0,0 +1,28 @@
+"""add notification feed indexes
+
+Revision ID: 0decb0c37c80
+Revises: c91ee673f012
+Create Date: 2026-10-19 11:02:47.631954
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0decb0c37c80'
+down_revision = 'c91ee673f012'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Составные индексы покрывают поиск по одному user_id
+    op.drop_index(op.f('ix_notifications_user_id'), table_name='notifications')
+    op.create_index('ix_notifications_user_created', 'notifications', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_notifications_user_unread', 'notifications', ['user_id', 'created_at', 'id'], unique=False,
+                    postgresql_where=sa.text('"new"'))
+
+def downgrade():
+    op.drop_index('ix_notifications_user_unread', table_name='notifications')
+    op.drop_index('ix_notifications_user_created', table_name='notifications')
+    op.create_index(op.f('ix_notifications_user_id'), 'notifications', ['user_id'], unique=False)
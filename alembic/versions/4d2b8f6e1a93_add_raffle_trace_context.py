@@ -0,0 +1,23 @@
+"""add raffle trace context
+
+Revision ID: 4d2b8f6e1a93
+Revises: 7b3e90d2a6c4
+Create Date: 2026-10-19 22:31:40.518207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4d2b8f6e1a93'
+down_revision = '7b3e90d2a6c4'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # На секционированной raffles столбец добавляется во все секции
+    op.add_column('raffles', sa.Column('trace_context', sa.String(length=55), nullable=True))
+
+def downgrade():
+    op.drop_column('raffles', 'trace_context')
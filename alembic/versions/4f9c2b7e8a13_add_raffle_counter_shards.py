@@ -0,0 +1,29 @@
+"""add raffle counter shards
+
+Revision ID: 4f9c2b7e8a13
+Revises: d3a8f61c0b52
+Create Date: 2026-10-19 17:20:31.118472
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f9c2b7e8a13'
+down_revision = 'd3a8f61c0b52'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Части счетчика создаются при активации розыгрыша или при первой заявке
+    op.create_table('raffle_counter_shards',
+    sa.Column('raffle_id', sa.String(), nullable=False),
+    sa.Column('shard', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('capacity', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('raffle_id', 'shard')
+    )
+
+def downgrade():
+    op.drop_table('raffle_counter_shards')
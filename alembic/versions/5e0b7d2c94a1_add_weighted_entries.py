@@ -0,0 +1,24 @@
+"""add weighted entries
+
+Revision ID: 5e0b7d2c94a1
+Revises: 81c734d597f2
+Create Date: 2026-10-19 13:41:27.530966
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e0b7d2c94a1'
+down_revision = '81c734d597f2'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('raffles', sa.Column('bonus_entries', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('raffle_participants', sa.Column('weight', sa.Integer(), server_default='1', nullable=False))
+
+def downgrade():
+    op.drop_column('raffle_participants', 'weight')
+    op.drop_column('raffles', 'bonus_entries')
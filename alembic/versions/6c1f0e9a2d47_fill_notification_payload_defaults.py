@@ -0,0 +1,38 @@
+"""fill notification payload defaults
+
+Revision ID: 6c1f0e9a2d47
+Revises: b8e4f1a7c602
+Create Date: 2026-10-20 10:14:37.602518
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '6c1f0e9a2d47'
+down_revision = 'b8e4f1a7c602'
+branch_labels = None
+depends_on = None
+
+# Значения, которые прежний _to_card подставлял вместо NULL (CARD_DEFAULTS в schemas/notification_card.py).
+# af00bbafa46a переносила колонки через jsonb_strip_nulls, и у старых строк части полей нет
+DEFAULTS = {
+    'COMPLETED': {'raffleId': "''", 'participantsCount': '0', 'winners': "'[]'::jsonb", 'reasonEnd': "''"},
+    'WARNING': {'warningTitle': "''", 'warningDescription': "'[]'::jsonb"},
+    'ERROR': {'errorTitle': "''", 'errorDescription': "''"},
+}
+
+
+def upgrade():
+    # Ключи payload перекрывают значения по умолчанию; строки со всеми ключами не меняются
+    for type_, fields in DEFAULTS.items():
+        defaults = ", ".join(f"'{key}', {value}" for key, value in fields.items())
+        keys = ", ".join(f"'{key}'" for key in fields)
+        op.execute(f"""
+            UPDATE notifications SET payload = jsonb_build_object({defaults}) || payload
+            WHERE type = '{type_}' AND NOT payload ?& ARRAY[{keys}]
+        """)
+
+def downgrade():
+    # Подставленные значения неотличимы от исходных - откатывать нечего
+    pass
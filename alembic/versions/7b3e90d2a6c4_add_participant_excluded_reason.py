@@ -0,0 +1,25 @@
+"""add participant excluded reason
+
+Revision ID: 7b3e90d2a6c4
+Revises: c2f7a9e4d15b
+Create Date: 2026-10-19 21:48:16.092774
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b3e90d2a6c4'
+down_revision = 'c2f7a9e4d15b'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('raffle_participants', sa.Column('excluded_reason', sa.String(), nullable=True))
+    # Раньше исключение обнуляло weight; исходный вес не восстановить, условие неизвестно
+    op.execute("UPDATE raffle_participants SET excluded_reason = 'ineligible' WHERE weight = 0")
+
+def downgrade():
+    op.execute("UPDATE raffle_participants SET weight = 0 WHERE excluded_reason IS NOT NULL")
+    op.drop_column('raffle_participants', 'excluded_reason')
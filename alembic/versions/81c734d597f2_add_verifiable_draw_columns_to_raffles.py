@@ -0,0 +1,27 @@
+"""add verifiable draw columns to raffles
+
+Revision ID: 81c734d597f2
+Revises: af00bbafa46a
+Create Date: 2026-10-19 13:05:42.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '81c734d597f2'
+down_revision = 'af00bbafa46a'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Розыгрыши, активированные раньше, остаются без seed и разыгрываются по-старому
+    op.add_column('raffles', sa.Column('draw_seed', sa.String(length=64), nullable=True))
+    op.add_column('raffles', sa.Column('draw_seed_hash', sa.String(length=64), nullable=True))
+    op.add_column('raffles', sa.Column('winners', sa.JSON(), nullable=True))
+
+def downgrade():
+    op.drop_column('raffles', 'winners')
+    op.drop_column('raffles', 'draw_seed_hash')
+    op.drop_column('raffles', 'draw_seed')
@@ -0,0 +1,38 @@
+"""add raffle archive table
+
+Revision ID: 9a6e3c1d7f20
+Revises: 4f9c2b7e8a13
+Create Date: 2026-10-19 18:42:07.503916
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a6e3c1d7f20'
+down_revision = '4f9c2b7e8a13'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Розыгрыши переносит в архив задача планировщика archive_old_raffles
+    op.create_table('raffle_archive',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('vk_user_id', sa.String(), nullable=False),
+    sa.Column('community_id', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('end_date', sa.DateTime(), nullable=False),
+    sa.Column('participants_count', sa.Integer(), nullable=False),
+    sa.Column('winners', sa.JSON(), nullable=True),
+    sa.Column('format', sa.Integer(), nullable=False),
+    sa.Column('raffle_data', sa.LargeBinary(), nullable=False),
+    sa.Column('participants_data', sa.LargeBinary(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_raffle_archive_vk_user_id'), 'raffle_archive', ['vk_user_id'], unique=False)
+
+def downgrade():
+    op.drop_index(op.f('ix_raffle_archive_vk_user_id'), table_name='raffle_archive')
+    op.drop_table('raffle_archive')
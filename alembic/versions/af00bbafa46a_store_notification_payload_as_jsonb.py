@@ -0,0 +1,74 @@
+"""store notification payload as jsonb
+
+Revision ID: af00bbafa46a
+Revises: 0decb0c37c80
+Create Date: 2026-10-19 12:41:09.228391
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'af00bbafa46a'
+down_revision = '0decb0c37c80'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('notifications', sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    # Переносим разреженные колонки в payload; ключи совпадают с полями карточек
+    op.execute("""
+        UPDATE notifications SET payload = jsonb_strip_nulls(jsonb_build_object(
+            'raffleId', CASE WHEN "raffleId" ~ '^[0-9]+$' THEN to_jsonb("raffleId"::bigint)
+                             ELSE to_jsonb("raffleId") END,
+            'participantsCount', "participantsCount",
+            'winners', winners::jsonb,
+            'reasonEnd', "reasonEnd"
+        )) WHERE type = 'COMPLETED'
+    """)
+    op.execute("""
+        UPDATE notifications SET payload = jsonb_strip_nulls(jsonb_build_object(
+            'warningTitle', "warningTitle",
+            'warningDescription', "warningDescription"::jsonb
+        )) WHERE type = 'WARNING'
+    """)
+    op.execute("""
+        UPDATE notifications SET payload = jsonb_strip_nulls(jsonb_build_object(
+            'errorTitle', "errorTitle",
+            'errorDescription', "errorDescription"
+        )) WHERE type = 'ERROR'
+    """)
+    op.alter_column('notifications', 'payload', existing_type=postgresql.JSONB(astext_type=sa.Text()), nullable=False)
+
+    op.drop_column('notifications', 'errorDescription')
+    op.drop_column('notifications', 'errorTitle')
+    op.drop_column('notifications', 'warningDescription')
+    op.drop_column('notifications', 'warningTitle')
+    op.drop_column('notifications', 'reasonEnd')
+    op.drop_column('notifications', 'winners')
+    op.drop_column('notifications', 'participantsCount')
+    op.drop_column('notifications', 'raffleId')
+
+def downgrade():
+    op.add_column('notifications', sa.Column('raffleId', sa.String(), nullable=True))
+    op.add_column('notifications', sa.Column('participantsCount', sa.Integer(), nullable=True))
+    op.add_column('notifications', sa.Column('winners', sa.JSON(), nullable=True))
+    op.add_column('notifications', sa.Column('reasonEnd', sa.String(), nullable=True))
+    op.add_column('notifications', sa.Column('warningTitle', sa.String(), nullable=True))
+    op.add_column('notifications', sa.Column('warningDescription', sa.JSON(), nullable=True))
+    op.add_column('notifications', sa.Column('errorTitle', sa.String(), nullable=True))
+    op.add_column('notifications', sa.Column('errorDescription', sa.String(), nullable=True))
+    op.execute("""
+        UPDATE notifications SET
+            "raffleId" = payload->>'raffleId',
+            "participantsCount" = (payload->>'participantsCount')::integer,
+            winners = (payload->'winners')::json,
+            "reasonEnd" = payload->>'reasonEnd',
+            "warningTitle" = payload->>'warningTitle',
+            "warningDescription" = (payload->'warningDescription')::json,
+            "errorTitle" = payload->>'errorTitle',
+            "errorDescription" = payload->>'errorDescription'
+    """)
+    op.drop_column('notifications', 'payload')
@@ -0,0 +1,65 @@
+"""add blacklist entries table
+
+Revision ID: b7d41e9c3f08
+Revises: 5e0b7d2c94a1
+Create Date: 2026-10-19 15:12:08.214630
+
+"""
+import json
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d41e9c3f08'
+down_revision = '5e0b7d2c94a1'
+branch_labels = None
+depends_on = None
+
+# Копия нормализации из src.services.blacklist: миграция не должна зависеть от кода приложения
+_PROFILE_URL = re.compile(r"^(?:https?://)?(?:www\.|m\.)?vk\.(?:com|ru)/")
+_VK_ID_TAG = re.compile(r"^id(\d+)$")
+_USER_REF = re.compile(r"^[a-z0-9_.\-]+$")
+
+
+def _normalize(entry):
+    ref = _PROFILE_URL.sub("", str(entry).strip().lower()).lstrip("@").rstrip("/")
+    match = _VK_ID_TAG.match(ref)
+    if match:
+        ref = match.group(1)
+    return ref if ref and _USER_REF.match(ref) else None
+
+
+def upgrade():
+    blacklist_entries = op.create_table('blacklist_entries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('owner_vk_user_id', sa.String(), nullable=False),
+    sa.Column('raffle_id', sa.String(), nullable=True),
+    sa.Column('user_ref', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('uq_blacklist_entries_owner_user', 'blacklist_entries', ['owner_vk_user_id', 'user_ref'], unique=True,
+                    postgresql_where=sa.text('raffle_id IS NULL'))
+    op.create_index('uq_blacklist_entries_raffle_user', 'blacklist_entries', ['raffle_id', 'user_ref'], unique=True,
+                    postgresql_where=sa.text('raffle_id IS NOT NULL'))
+
+    # Переносим blacklist_participants существующих розыгрышей в таблицу
+    connection = op.get_bind()
+    rows = []
+    for raffle_id, owner, entries in connection.execute(sa.text(
+        "SELECT id, vk_user_id, blacklist_participants FROM raffles"
+    )):
+        if isinstance(entries, str):
+            entries = json.loads(entries)
+        refs = {_normalize(entry) for entry in entries or ()} - {None}
+        rows.extend({"owner_vk_user_id": owner, "raffle_id": raffle_id, "user_ref": ref} for ref in sorted(refs))
+    if rows:
+        op.bulk_insert(blacklist_entries, rows)
+
+def downgrade():
+    op.drop_index('uq_blacklist_entries_raffle_user', table_name='blacklist_entries')
+    op.drop_index('uq_blacklist_entries_owner_user', table_name='blacklist_entries')
+    op.drop_table('blacklist_entries')
@@ -0,0 +1,50 @@
+"""add raffle_ids uniqueness
+
+Revision ID: b8e4f1a7c602
+Revises: 4d2b8f6e1a93
+Create Date: 2026-10-19 23:12:05.334618
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8e4f1a7c602'
+down_revision = '4d2b8f6e1a93'
+branch_labels = None
+depends_on = None
+
+TRACK_ID_FUNCTION = """
+CREATE FUNCTION raffles_track_id() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        DELETE FROM raffle_ids WHERE id = OLD.id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO raffle_ids (id) VALUES (NEW.id);
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+def upgrade():
+    # После секционирования первичный ключ (id, created_at) пропускал повторные id:
+    # сиды с created_at по умолчанию вставлялись заново. Из повторов остается самая ранняя строка
+    op.execute(
+        "DELETE FROM raffles AS later USING raffles AS earlier "
+        "WHERE later.id = earlier.id AND later.created_at > earlier.created_at"
+    )
+    op.execute("CREATE TABLE raffle_ids (id VARCHAR PRIMARY KEY)")
+    op.execute("INSERT INTO raffle_ids (id) SELECT id FROM raffles")
+    op.execute(TRACK_ID_FUNCTION)
+    # Триггер секционированной таблицы копируется во все ее секции, в том числе будущие
+    op.execute(
+        "CREATE TRIGGER raffles_track_id AFTER INSERT OR DELETE OR UPDATE OF id ON raffles "
+        "FOR EACH ROW EXECUTE FUNCTION raffles_track_id()"
+    )
+
+def downgrade():
+    op.execute("DROP TRIGGER raffles_track_id ON raffles")
+    op.execute("DROP FUNCTION raffles_track_id()")
+    op.execute("DROP TABLE raffle_ids")
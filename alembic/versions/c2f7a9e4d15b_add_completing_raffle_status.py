@@ -0,0 +1,26 @@
+"""add completing raffle status
+
+Revision ID: c2f7a9e4d15b
+Revises: e5c8a2f47b19
+Create Date: 2026-10-19 21:05:43.318027
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2f7a9e4d15b'
+down_revision = 'e5c8a2f47b19'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # ADD VALUE нельзя использовать в той же транзакции, где значение добавлено
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE rafflestatus ADD VALUE IF NOT EXISTS 'COMPLETING' BEFORE 'COMPLETED'")
+
+def downgrade():
+    # Значение из enum Postgres не удаляется; незавершенные розыгрыши возвращаются в ACTIVE,
+    # и планировщик завершит их заново
+    op.execute("UPDATE raffles SET status = 'ACTIVE' WHERE status = 'COMPLETING'")
@@ -0,0 +1,47 @@
+"""add notification recipients and raffle participants
+
+Revision ID: c91ee673f012
+Revises: 29c0bab0a0d1
+Create Date: 2026-10-19 10:12:31.418207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c91ee673f012'
+down_revision = '29c0bab0a0d1'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('notifications', sa.Column('user_id', sa.String(), nullable=True))
+    op.add_column('notifications', sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False))
+    op.alter_column('notifications', 'raffleId',
+                    existing_type=sa.Integer(),
+                    type_=sa.String(),
+                    existing_nullable=True,
+                    postgresql_using='"raffleId"::varchar')
+    op.create_index(op.f('ix_notifications_user_id'), 'notifications', ['user_id'], unique=False)
+
+    op.create_table('raffle_participants',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('raffle_id', sa.String(), nullable=False),
+    sa.Column('user_id', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('raffle_id', 'user_id', name='uq_raffle_participants_raffle_user')
+    )
+
+def downgrade():
+    op.drop_table('raffle_participants')
+
+    op.drop_index(op.f('ix_notifications_user_id'), table_name='notifications')
+    op.alter_column('notifications', 'raffleId',
+                    existing_type=sa.String(),
+                    type_=sa.Integer(),
+                    existing_nullable=True,
+                    postgresql_using='"raffleId"::integer')
+    op.drop_column('notifications', 'created_at')
+    op.drop_column('notifications', 'user_id')
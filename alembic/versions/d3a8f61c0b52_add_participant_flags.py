@@ -0,0 +1,22 @@
+"""add participant flags
+
+Revision ID: d3a8f61c0b52
+Revises: b7d41e9c3f08
+Create Date: 2026-10-19 16:05:44.902318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3a8f61c0b52'
+down_revision = 'b7d41e9c3f08'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('raffle_participants', sa.Column('flags', sa.String(), nullable=True))
+
+def downgrade():
+    op.drop_column('raffle_participants', 'flags')
@@ -0,0 +1,82 @@
+"""partition raffles by created_at
+
+Revision ID: e5c8a2f47b19
+Revises: 9a6e3c1d7f20
+Create Date: 2026-10-19 19:34:52.871203
+
+"""
+from datetime import date, datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5c8a2f47b19'
+down_revision = '9a6e3c1d7f20'
+branch_labels = None
+depends_on = None
+
+# Индексы raffles; ix_raffles_id не переносится - поиск по id обслуживает первичный ключ (id, created_at)
+INDEXES = [
+    ('ix_raffles_community_id', ['community_id']),
+    ('ix_raffles_end_date', ['end_date']),
+    ('ix_raffles_name', ['name']),
+    ('ix_raffles_start_date', ['start_date']),
+    ('ix_raffles_status', ['status']),
+    ('ix_raffles_vk_user_id', ['vk_user_id']),
+]
+
+# Секции заранее создаются на столько месяцев вперед (RAFFLE_PARTITIONS_AHEAD на момент миграции)
+PARTITIONS_AHEAD = 2
+
+
+def _add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _replace_table(old_name):
+    # Старая таблица переименовывается и освобождает имена ограничения и индексов
+    op.execute(f"ALTER TABLE raffles RENAME TO {old_name}")
+    op.execute(f"ALTER TABLE {old_name} DROP CONSTRAINT raffles_pkey")
+    for name, _ in INDEXES:
+        op.drop_index(name, table_name=old_name)
+
+
+def upgrade():
+    _replace_table('raffles_unpartitioned')
+    op.drop_index('ix_raffles_id', table_name='raffles_unpartitioned')
+    op.execute("CREATE TABLE raffles (LIKE raffles_unpartitioned INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)")
+    op.create_primary_key('raffles_pkey', 'raffles', ['id', 'created_at'])
+    for name, columns in INDEXES:
+        op.create_index(name, 'raffles', columns, unique=False)
+    op.execute("CREATE TABLE raffles_default PARTITION OF raffles DEFAULT")
+
+    # Секции по месяцам: от самого старого розыгрыша до PARTITIONS_AHEAD месяцев вперед;
+    # пустые прошлые секции потом удалит планировщик
+    first = op.get_bind().execute(sa.text("SELECT min(created_at) FROM raffles_unpartitioned")).scalar()
+    now = datetime.now()
+    month = date((first or now).year, (first or now).month, 1)
+    last = _add_months(date(now.year, now.month, 1), PARTITIONS_AHEAD)
+    while month <= last:
+        upper = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE raffles_p{month:%Y%m} PARTITION OF raffles "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+        month = upper
+
+    op.execute("INSERT INTO raffles SELECT * FROM raffles_unpartitioned")
+    op.drop_table('raffles_unpartitioned')
+
+
+def downgrade():
+    _replace_table('raffles_partitioned')
+    op.execute("CREATE TABLE raffles (LIKE raffles_partitioned INCLUDING DEFAULTS)")
+    op.create_primary_key('raffles_pkey', 'raffles', ['id'])
+    for name, columns in INDEXES + [('ix_raffles_id', ['id'])]:
+        op.create_index(name, 'raffles', columns, unique=False)
+    op.execute("INSERT INTO raffles SELECT * FROM raffles_partitioned")
+    # Вместе с секционированной таблицей удаляются все ее секции
+    op.drop_table('raffles_partitioned')
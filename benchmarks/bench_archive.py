@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк архива розыгрышей.
+
+Создает завершенные розыгрыши с участниками, переносит их в raffle_archive
+через archive_old_raffles и сравнивает: объем данных до и после сжатия, время
+переноса, чтение розыгрыша и полный проход по участникам из горячих таблиц
+и из архива. Запуск:
+
+    python -m benchmarks.bench_archive --raffles 20 --participants 50000
+"""
+
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from benchmarks.common import fresh_session, make_parser, timed
+from src.core.config import settings
+from src.db.bulk import insert_ignore
+from src.db.models.raffle import Raffle, RaffleArchive, RaffleParticipant, RaffleStatus
+from src.services.archive import archive_old_raffles, find_raffle, participant_entries
+
+
+def seed(db, raffles: int, participants: int) -> list:
+    old = datetime.now() - timedelta(days=settings.ARCHIVE_AFTER_DAYS + 1)
+    ids = []
+    for index in range(raffles):
+        raffle = Raffle(
+            id=f"bench-archive-{index}", vk_user_id="user-0", name="Бенчмарк архива", community_id="bench",
+            contest_text="Бенчмарк", photos=[], required_communities=[], winners_count=3,
+            blacklist_participants=[], start_date=old, end_date=old, status=RaffleStatus.COMPLETED,
+            participants_count=participants, winners=["1", "2", "3"], created_at=old, updated_at=old,
+        )
+        db.add(raffle)
+        db.flush()
+        for start in range(0, participants, 5000):
+            insert_ignore(db, RaffleParticipant, [
+                {"raffle_id": raffle.id, "user_id": str(100_000_000 + user), "weight": 1 + user % 3,
+                 "flags": "burst_user" if user % 500 == 0 else None}
+                for user in range(start, min(start + 5000, participants))
+            ])
+        ids.append(raffle.id)
+    db.commit()
+    return ids
+
+
+def read_all(db, raffle_ids) -> float:
+    started = time.perf_counter()
+    for raffle_id in raffle_ids:
+        raffle = find_raffle(db, raffle_id)
+        total = sum(weight for _, weight in participant_entries(db, raffle))
+        assert total > 0
+    db.rollback()
+    return (time.perf_counter() - started) / len(raffle_ids)
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument("--raffles", type=int, default=20)
+    parser.add_argument("--participants", type=int, default=50_000, help="Участников в розыгрыше")
+    args = parser.parse_args()
+
+    db = fresh_session(args.database_url)
+    with timed(f"создание {args.raffles} x {args.participants}"):
+        raffle_ids = seed(db, args.raffles, args.participants)
+    hot = read_all(db, raffle_ids)
+
+    settings.ARCHIVE_BATCH_SIZE = args.raffles
+    started = time.perf_counter()
+    archived = archive_old_raffles(db)
+    elapsed = time.perf_counter() - started
+    assert archived == args.raffles, "Перенесены не все розыгрыши"
+    stored = db.execute(
+        select(func.sum(func.length(RaffleArchive.raffle_data) + func.length(RaffleArchive.participants_data)))
+    ).scalar()
+    cold = read_all(db, raffle_ids)
+
+    print(f"перенос: {elapsed / archived * 1000:8.1f} мс на розыгрыш, в архиве {stored / 2**20:.2f} МБ "
+          f"({stored / (args.raffles * args.participants):.1f} байт на участника)")
+    print(f"чтение розыгрыша с участниками: горячие таблицы {hot * 1000:8.1f} мс, архив {cold * 1000:8.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк черных списков.
+
+Массовый импорт (в том числе повторный - все строки отсекает уникальный индекс),
+выгрузка, загрузка списка один раз перед розыгрышем и проверка участников по
+множеству против отдельного запроса на каждого участника. Запуск:
+
+    python -m benchmarks.bench_blacklist --entries 100000 --participants 200000
+"""
+
+from datetime import datetime
+
+from benchmarks.common import fresh_session, make_parser, timed
+from src.db.models.raffle import Raffle, RaffleStatus
+from src.services.blacklist import export_blacklist, import_blacklist, is_blacklisted, load_blacklist
+
+OWNER = "user-0"
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument("--entries", type=int, default=100_000, help="Записей в черном списке владельца")
+    parser.add_argument("--participants", type=int, default=200_000, help="Участников для проверки по множеству")
+    parser.add_argument("--query-participants", type=int, default=5_000, help="Участников для проверки запросом на каждого")
+    args = parser.parse_args()
+
+    db = fresh_session(args.database_url)
+    now = datetime.now()
+    raffle = Raffle(
+        id="bench-blacklist", vk_user_id=OWNER, name="Бенчмарк черного списка", community_id="bench",
+        contest_text="Бенчмарк", photos=[], required_communities=[], winners_count=10,
+        blacklist_participants=["@spam_user"], start_date=now, end_date=now, status=RaffleStatus.ACTIVE,
+    )
+    db.add(raffle)
+    db.commit()
+
+    # Каждый десятый VK ID в черном списке, записи в разных формах
+    forms = ("{}", "id{}", "@id{}", "https://vk.com/id{}")
+    entries = [forms[n % len(forms)].format(n * 10) for n in range(args.entries)]
+    with timed(f"Импорт {args.entries} записей"):
+        imported, invalid = import_blacklist(db, OWNER, entries)
+    with timed("Повторный импорт тех же записей"):
+        reimported, _ = import_blacklist(db, OWNER, entries)
+    print(f"Добавлено: {imported}, повторно: {reimported}, некорректных: {invalid}")
+
+    with timed("Выгрузка"):
+        exported = sum(1 for _ in export_blacklist(db, OWNER))
+    with timed("Загрузка перед розыгрышем"):
+        blacklist = load_blacklist(db, raffle)
+    assert exported == imported and len(blacklist) == imported + 1
+
+    user_ids = [str(n) for n in range(args.participants)]
+    with timed(f"Проверка {args.participants} участников по множеству"):
+        rejected = sum(1 for user_id in user_ids if user_id in blacklist)
+    print(f"В черном списке: {rejected}")
+
+    subset = user_ids[:args.query_participants]
+    with timed(f"Проверка {len(subset)} участников запросом на каждого"):
+        queried = sum(1 for user_id in subset if is_blacklisted(db, raffle, user_id))
+    assert queried == sum(1 for user_id in subset if user_id in blacklist)
+
+
+if __name__ == "__main__":
+    main()
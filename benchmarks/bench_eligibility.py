@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк проверки условий участия.
+
+Скомпилированный RuleSet проверяет участников пачками (операции над множествами)
+против проверки каждого участника по очереди. Затем apply_eligibility прогоняется
+на розыгрыше в БД: поток участников, пачки и запись причин исключения. Запуск:
+
+    python -m benchmarks.bench_eligibility --entrants 1000000 --db-entrants 200000
+"""
+
+import random
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from benchmarks.common import fresh_session, make_parser, timed
+from src.db.models.raffle import Raffle, RaffleParticipant, RaffleStatus
+from src.services.eligibility import InMemoryMembershipSource, apply_eligibility, compile_rules
+
+COMMUNITY = "bench-community"
+REQUIRED = ["@partner1", "@partner2"]
+CHANNEL = "@bench_channel"
+
+
+def make_raffle(raffle_id: str) -> Raffle:
+    now = datetime.now()
+    return Raffle(
+        id=raffle_id, vk_user_id="user-0", name="Бенчмарк условий", community_id=COMMUNITY,
+        contest_text="Бенчмарк", photos=[], require_community_subscription=True,
+        require_telegram_subscription=True, telegram_channel=CHANNEL, required_communities=REQUIRED,
+        winners_count=10, blacklist_participants=[f"@id{n}" for n in range(0, 100_000, 100)],
+        start_date=now, end_date=now, exclude_me=True, exclude_admins=True, status=RaffleStatus.ACTIVE,
+    )
+
+
+def make_source(entrants: int, rng: random.Random) -> InMemoryMembershipSource:
+    def share(fraction: float) -> frozenset:
+        return frozenset(str(n) for n in range(entrants) if rng.random() < fraction)
+
+    return InMemoryMembershipSource(
+        members={COMMUNITY: share(0.9), REQUIRED[0]: share(0.7), REQUIRED[1]: share(0.6)},
+        admins={COMMUNITY: frozenset(str(n) for n in range(50))},
+        telegram={CHANNEL: share(0.5)},
+    )
+
+
+def one_by_one(raffle: Raffle, source: InMemoryMembershipSource, user_ids):
+    # Проверка каждого участника отдельно, условие за условием
+    blacklist = {entry.lstrip("@").removeprefix("id") for entry in raffle.blacklist_participants}
+    eligible = []
+    for user_id in user_ids:
+        if user_id in blacklist:
+            continue
+        if raffle.exclude_me and user_id == raffle.vk_user_id:
+            continue
+        if raffle.exclude_admins and user_id in source.community_admins(raffle.community_id):
+            continue
+        if not all(user_id in source.community_members(tag) for tag in [raffle.community_id, *raffle.required_communities]):
+            continue
+        if user_id not in source.telegram_subscribers(raffle.telegram_channel):
+            continue
+        eligible.append(user_id)
+    return eligible
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument("--entrants", type=int, default=1_000_000)
+    parser.add_argument("--db-entrants", type=int, default=200_000, help="Участников в БД для apply_eligibility")
+    parser.add_argument("--naive-entrants", type=int, default=1_000_000, help="Участников для проверки по одному")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    with timed(f"Подготовка подписок на {args.entrants}"):
+        source = make_source(args.entrants, rng)
+    user_ids = [str(n) for n in range(args.entrants)]
+    raffle = make_raffle("bench-eligibility")
+
+    with timed("Компиляция условий"):
+        rules = compile_rules(raffle, source)
+    with timed(f"RuleSet пачками, {args.entrants} участников"):
+        rejected = sum(1 for _ in rules.ineligible(iter(user_ids)))
+    print(f"Подходят: {args.entrants - rejected}, исключены: {rejected}")
+
+    subset = user_ids[:args.naive_entrants]
+    with timed(f"По одному, {len(subset)} участников"):
+        naive = one_by_one(raffle, source, subset)
+    assert naive == rules.filter(subset), "Результаты проверки по одному и пачками расходятся"
+
+    if args.db_entrants:
+        db = fresh_session(args.database_url)
+        db.add(raffle)
+        db.execute(insert(RaffleParticipant), [
+            {"raffle_id": raffle.id, "user_id": user_id} for user_id in user_ids[:args.db_entrants]
+        ])
+        db.commit()
+        with timed(f"apply_eligibility в БД, {args.db_entrants} участников"):
+            excluded = apply_eligibility(db, raffle, rules)
+            db.commit()
+        print(f"Исключено в БД: {excluded}")
+
+
+if __name__ == "__main__":
+    main()
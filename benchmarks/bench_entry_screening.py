@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк проверки заявок при приеме.
+
+Поток заявок в один розыгрыш: обычные участники со случайными VK ID и IP плюс
+волна ботов - аккаунты с соседними ID, заявки с нескольких IP. Замеряется время
+проверки одной заявки, объем памяти счетчиков и сколько заявок каждой группы
+помечено или отклонено. Запуск:
+
+    python -m benchmarks.bench_entry_screening --entries 500000 --bots 20000
+"""
+
+import argparse
+import random
+import time
+from collections import Counter
+
+from benchmarks.common import timed
+from src.services.entry_screening import ACCEPT, ID_BLOCK_BITS, EntryScreener
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=500_000, help="Заявок обычных участников")
+    parser.add_argument("--bots", type=int, default=20_000, help="Заявок ботов")
+    parser.add_argument("--rate", type=float, default=5000.0, help="Заявок в секунду (модельное время)")
+    parser.add_argument("--bot-sources", type=int, default=20, help="Сколько IP у ботов")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    stream = [("user", str(rng.randrange(1, 900_000_000)), f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)}")
+              for _ in range(args.entries)]
+    first_bot = rng.randrange(1, 900_000_000)
+    stream += [("bot", str(first_bot + n), f"192.0.2.{n % args.bot_sources}") for n in range(args.bots)]
+    rng.shuffle(stream)
+    # Обычные участники, чьи ID попали в блоки ботов, неотличимы от них по account_cluster
+    bot_blocks = {(first_bot + n) >> ID_BLOCK_BITS for n in range(args.bots)}
+    stream = [
+        ("user-in-bot-blocks" if group == "user" and int(user_id) >> ID_BLOCK_BITS in bot_blocks else group, user_id, source)
+        for group, user_id, source in stream
+    ]
+
+    screener = EntryScreener()
+    verdicts = {"user": Counter(), "user-in-bot-blocks": Counter(), "bot": Counter()}
+    started = time.perf_counter()
+    with timed(f"Проверка {len(stream)} заявок"):
+        for n, (group, user_id, source) in enumerate(stream):
+            verdicts[group][screener.screen("bench-raffle", user_id, source, now=n / args.rate).verdict] += 1
+    elapsed = time.perf_counter() - started
+    print(f"На заявку: {elapsed / len(stream) * 1e6:.1f} мкс, память счетчиков: {screener.nbytes() / 2**20:.1f} МБ")
+    for group, counts in verdicts.items():
+        total = sum(counts.values()) or 1
+        print(f"{group}: принято {counts[ACCEPT] / total:.2%}, "
+              + ", ".join(f"{verdict} {count}" for verdict, count in sorted(counts.items())))
+
+
+if __name__ == "__main__":
+    main()
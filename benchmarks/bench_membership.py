@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк снимков подписок: память на миллион ID и время проверки
+"подписан ли пользователь на сообщества A, B, C".
+
+Сравниваются CompactIdSet (блоки с массивами и битовыми картами), frozenset строк
+и отсортированный array('q') с bisect. Снимки загружаются через FileMembershipLoader
+из временного каталога, как при обновлении из выгрузки. Запуск:
+
+    python -m benchmarks.bench_membership --members 1000000
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+
+from benchmarks.common import timed
+from src.services.membership import CompactIdSet, FileMembershipLoader, MembershipSnapshotStore
+
+COMMUNITIES = ["@community_a", "@community_b", "@community_c"]
+
+
+def frozenset_bytes(members: frozenset) -> int:
+    return sys.getsizeof(members) + sum(sys.getsizeof(user_id) for user_id in members)
+
+
+def per_million(size: int, count: int) -> str:
+    return f"{size / count:6.2f} байт/ID, {size / count:8.1f} МБ на 1М ID"
+
+
+def lookup_us(check, user_ids) -> float:
+    started = time.perf_counter()
+    for user_id in user_ids:
+        check(user_id)
+    return (time.perf_counter() - started) / len(user_ids) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--members", type=int, default=1_000_000, help="Подписчиков в каждом сообществе")
+    parser.add_argument("--lookups", type=int, default=100_000)
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    layouts = {
+        # Разреженные ID по всему диапазону VK и плотный диапазон недавних регистраций
+        "разреженные": lambda: rng.sample(range(1, 900_000_000), args.members),
+        "плотные": lambda: rng.sample(range(1, int(args.members * 1.2)), args.members),
+    }
+    for layout, generate in layouts.items():
+        numbers = generate()
+        user_ids = [str(number) for number in numbers]
+        print(f"--- {layout} ID, {args.members} членов")
+        with timed("CompactIdSet: построение"):
+            compact = CompactIdSet(user_ids)
+        plain = frozenset(user_ids)
+        packed = array("q", sorted(numbers))
+        print(f"CompactIdSet      {per_million(compact.nbytes(), len(compact))}")
+        print(f"frozenset[str]    {per_million(frozenset_bytes(plain), len(plain))}")
+        print(f"array('q')        {per_million(packed.itemsize * len(packed), len(packed))}")
+
+        probes = [str(rng.choice(numbers) if rng.random() < 0.5 else rng.randrange(1, 900_000_000))
+                  for _ in range(args.lookups)]
+
+        def in_packed(user_id):
+            number = int(user_id)
+            index = bisect_left(packed, number)
+            return index < len(packed) and packed[index] == number
+
+        print(f"Проверка: CompactIdSet {lookup_us(compact.__contains__, probes):.2f} мкс, "
+              f"frozenset {lookup_us(plain.__contains__, probes):.2f} мкс, "
+              f"array('q') {lookup_us(in_packed, probes):.2f} мкс")
+
+    with tempfile.TemporaryDirectory() as directory:
+        members_dir = Path(directory) / "members"
+        members_dir.mkdir()
+        for community in COMMUNITIES:
+            ids = rng.sample(range(1, 900_000_000), args.members)
+            (members_dir / f"{community}.txt").write_text("\n".join(map(str, ids)))
+        store = MembershipSnapshotStore(FileMembershipLoader(directory))
+        with timed(f"Обновление снимков из файлов, {len(COMMUNITIES)} x {args.members}"):
+            store.refresh()
+        probes = [str(rng.randrange(1, 900_000_000)) for _ in range(args.lookups)]
+        print(f"is_member(A, B, C): {lookup_us(lambda u: store.is_member(u, COMMUNITIES), probes):.2f} мкс")
+        for entry in store.footprint():
+            print(f"{entry['kind']}/{entry['key']}: {entry['members']} ID, "
+                  f"{entry['bytes_per_million'] / 2**20:.2f} МБ на миллион")
+
+
+if __name__ == "__main__":
+    main()
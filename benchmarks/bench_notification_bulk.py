@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк массовых операций над уведомлениями.
+
+Сравнивает mark_read/delete_notifications (один UPDATE/DELETE) с обработкой
+уведомлений по одному, как при вызове /{id}/mark-read для каждого ID. Запуск:
+
+    python -m benchmarks.bench_notification_bulk --notifications 10000
+"""
+
+from sqlalchemy import insert
+
+from benchmarks.common import fresh_session, make_parser, timed
+from src.db.models.notification import Notification, NotificationType
+from src.services.notifications import count_unread, delete_notifications, mark_read
+
+USER_ID = "bench-user"
+
+
+def seed(db, count: int):
+    db.execute(insert(Notification), [
+        {
+            "type": NotificationType.ERROR,
+            "user_id": USER_ID,
+            "payload": {"errorTitle": f"Ошибка {i}", "errorDescription": "Бенчмарк"},
+            "new": True,
+        }
+        for i in range(count)
+    ])
+    db.commit()
+    return [row.id for row in db.query(Notification.id).filter(Notification.user_id == USER_ID)]
+
+
+def mark_read_one_by_one(db, ids):
+    for notification_id in ids:
+        notification = db.query(Notification).filter(Notification.id == notification_id).first()
+        notification.new = False
+        db.commit()
+
+
+def delete_one_by_one(db, ids):
+    for notification_id in ids:
+        db.query(Notification).filter(Notification.id == notification_id).delete()
+        db.commit()
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument("--notifications", type=int, default=10_000)
+    parser.add_argument("--skip-baseline", action="store_true", help="Не запускать обработку по одному")
+    args = parser.parse_args()
+
+    print(f"Уведомлений у пользователя: {args.notifications}")
+
+    db = fresh_session(args.database_url)
+    ids = seed(db, args.notifications)
+    with timed("mark_read (все)"):
+        affected = mark_read(db, USER_ID)
+    print(f"Отмечено: {affected}, непрочитанных: {count_unread(db, USER_ID)}")
+    with timed("delete_notifications (все)"):
+        affected = delete_notifications(db, USER_ID)
+    print(f"Удалено: {affected}")
+
+    ids = seed(db, args.notifications)
+    with timed("mark_read (по списку ID, пачки по 1000)"):
+        for start in range(0, len(ids), 1000):
+            mark_read(db, USER_ID, ids=ids[start:start + 1000])
+    db.close()
+
+    if not args.skip_baseline:
+        db = fresh_session(args.database_url)
+        ids = seed(db, args.notifications)
+        with timed("mark-read по одному"):
+            mark_read_one_by_one(db, ids)
+        with timed("удаление по одному"):
+            delete_one_by_one(db, ids)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк рассылки уведомлений о завершении розыгрыша.
+
+Сравнивает пакетную рассылку (fan_out_raffle_completion) с созданием
+уведомлений по одному. Запуск:
+
+    python -m benchmarks.bench_notification_fanout --winners 100 --followers 10000
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert
+
+from benchmarks.common import fresh_session, make_parser, timed
+from src.db.models.notification import Notification, NotificationType, UserNotificationSettings
+from src.db.models.raffle import Raffle, RaffleParticipant, RaffleStatus
+from src.services.notification_fanout import DEFAULT_REASON_END, fan_out_raffle_completion
+
+RAFFLE_ID = "bench-raffle"
+OWNER_ID = "owner"
+
+
+def seed(db, winners_count: int, followers_count: int):
+    """Розыгрыш с участниками; каждый десятый участник отключил finish_notify."""
+    now = datetime.now()
+    raffle = Raffle(
+        id=RAFFLE_ID,
+        vk_user_id=OWNER_ID,
+        name="Бенчмарк",
+        community_id="1",
+        contest_text="Бенчмарк рассылки",
+        photos=[],
+        required_communities=[],
+        partner_tags=[],
+        winners_count=winners_count,
+        blacklist_participants=[],
+        start_date=now - timedelta(days=1),
+        end_date=now,
+        status=RaffleStatus.COMPLETED,
+        participants_count=followers_count,
+    )
+    db.add(raffle)
+    user_ids = [f"user{i}" for i in range(followers_count)]
+    db.execute(insert(RaffleParticipant), [{"raffle_id": RAFFLE_ID, "user_id": u} for u in user_ids])
+    db.execute(insert(UserNotificationSettings), [
+        {"user_id": u, "finish_notify": False} for u in user_ids[::10]
+    ])
+    db.commit()
+    return raffle, user_ids[:winners_count]
+
+
+def fan_out_one_by_one(db, raffle, winners):
+    """Прежний подход: запрос настроек и INSERT на каждого получателя."""
+    recipients = {raffle.vk_user_id: False}
+    for participant in db.query(RaffleParticipant).filter(RaffleParticipant.raffle_id == raffle.id):
+        recipients.setdefault(participant.user_id, False)
+    for user_id in winners:
+        recipients[user_id] = True
+
+    for user_id, is_winner in recipients.items():
+        settings = db.query(UserNotificationSettings).filter_by(user_id=user_id).first()
+        if settings and not (settings.win_notify if is_winner else settings.finish_notify):
+            continue
+        db.add(Notification(
+            type=NotificationType.COMPLETED,
+            user_id=user_id,
+            payload={
+                "raffleId": raffle.id,
+                "participantsCount": raffle.participants_count,
+                "winners": winners,
+                "reasonEnd": DEFAULT_REASON_END,
+            },
+            new=True,
+        ))
+        db.flush()
+    db.commit()
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument("--winners", type=int, default=100)
+    parser.add_argument("--followers", type=int, default=10_000)
+    parser.add_argument("--skip-baseline", action="store_true", help="Не запускать рассылку по одному")
+    args = parser.parse_args()
+
+    print(f"Победителей: {args.winners}, участников: {args.followers}")
+
+    db = fresh_session(args.database_url)
+    raffle, winners = seed(db, args.winners, args.followers)
+    with timed("fan_out_raffle_completion"):
+        fan_out_raffle_completion(db, raffle, winners)
+        db.commit()
+    print(f"Создано уведомлений: {db.query(func.count(Notification.id)).scalar()}")
+    db.close()
+
+    if not args.skip_baseline:
+        db = fresh_session(args.database_url)
+        raffle, winners = seed(db, args.winners, args.followers)
+        with timed("по одному уведомлению"):
+            fan_out_one_by_one(db, raffle, winners)
+        print(f"Создано уведомлений: {db.query(func.count(Notification.id)).scalar()}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
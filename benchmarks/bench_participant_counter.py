@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк счетчика участников одного розыгрыша под параллельными заявками.
+
+Каждая заявка - транзакция: запись участника и увеличение счетчика с проверкой
+max_participants. Сравниваются одна строка raffles.participants_count (все
+писатели ждут блокировку одной строки) и разделенный счетчик participant_counter.
+После прогона проверяется, что участников ровно min(заявок, max_participants).
+
+Разница в блокировках видна на Postgres; SQLite сериализует любые записи,
+там прогон проверяет только корректность. Запуск:
+
+    python -m benchmarks.bench_participant_counter --database-url postgresql://... --entries 20000 --workers 32
+"""
+
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.common import fresh_session, make_parser, percentile
+from src.db.bulk import insert_ignore
+from src.db.models.raffle import Raffle, RaffleParticipant, RaffleStatus
+from src.services.participant_counter import configure_counter, participant_total, try_increment
+
+
+def single_row(db, raffle) -> bool:
+    return db.execute(
+        update(Raffle)
+        .where(Raffle.id == raffle.id, Raffle.participants_count < Raffle.max_participants)
+        .values(participants_count=Raffle.participants_count + 1)
+        .execution_options(synchronize_session=False)
+    ).rowcount == 1
+
+
+def sharded(db, raffle) -> bool:
+    return try_increment(db, raffle) is not None
+
+
+MODES = {"single-row": single_row, "sharded": sharded}
+
+
+def run(mode: str, args) -> None:
+    db = fresh_session(args.database_url)
+    now = datetime.now()
+    raffle = Raffle(
+        id=f"bench-counter-{mode}", vk_user_id="user-0", name="Бенчмарк счетчика", community_id="bench",
+        contest_text="Бенчмарк", photos=[], required_communities=[], winners_count=10,
+        blacklist_participants=[], start_date=now, end_date=now, max_participants=args.max_participants,
+        status=RaffleStatus.ACTIVE,
+    )
+    db.add(raffle)
+    db.commit()
+    if mode == "sharded":
+        configure_counter(db, raffle)
+    Session = sessionmaker(bind=db.get_bind(), autoflush=False, expire_on_commit=False)
+    increment = MODES[mode]
+
+    latencies = []
+    admitted = [0]
+    lock = threading.Lock()
+    next_user = iter(range(args.entries))
+
+    def worker():
+        session = Session()
+        local = []
+        local_admitted = 0
+        worker_raffle = session.get(Raffle, raffle.id)
+        while True:
+            with lock:
+                user = next(next_user, None)
+            if user is None:
+                break
+            started = time.perf_counter()
+            insert_ignore(session, RaffleParticipant, [{"raffle_id": raffle.id, "user_id": str(user), "weight": 1}])
+            if increment(session, worker_raffle):
+                session.commit()
+                local_admitted += 1
+            else:
+                session.rollback()
+            local.append(time.perf_counter() - started)
+        session.close()
+        with lock:
+            latencies.extend(local)
+            admitted[0] += local_admitted
+
+    threads = [threading.Thread(target=worker) for _ in range(args.workers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    participants = db.execute(
+        select(func.count()).select_from(RaffleParticipant).where(RaffleParticipant.raffle_id == raffle.id)
+    ).scalar()
+    db.expire_all()
+    counted = participant_total(db, raffle) if mode == "sharded" else db.get(Raffle, raffle.id).participants_count
+    expected = min(args.entries, args.max_participants)
+    print(f"{mode:<12} {args.entries / elapsed:8.0f} заявок/с  p50 {percentile(latencies, 50) * 1000:6.2f} мс  "
+          f"p99 {percentile(latencies, 99) * 1000:6.2f} мс  принято {admitted[0]}, участников {participants}, счетчик {counted}")
+    assert admitted[0] == participants == counted == expected, "Счетчик разошелся с числом участников или превысил лимит"
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument("--entries", type=int, default=20_000, help="Заявок в один розыгрыш")
+    parser.add_argument("--max-participants", type=int, default=15_000)
+    parser.add_argument("--workers", type=int, default=16, help="Параллельных писателей")
+    parser.add_argument("--mode", choices=[*MODES, "all"], default="all")
+    args = parser.parse_args()
+
+    for mode in MODES if args.mode == "all" else [args.mode]:
+        run(mode, args)
+
+
+if __name__ == "__main__":
+    main()
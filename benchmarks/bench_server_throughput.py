@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк пропускной способности: текущий dev-запуск (uvicorn --reload, один процесс)
+против продакшен-запуска (python -m src.server, несколько воркеров).
+
+Каждый вариант поднимается отдельным процессом на свободном порту, после чего
+эндпоинты без БД нагружаются заданное время с заданной конкурентностью. Запуск:
+
+    python -m benchmarks.bench_server_throughput --duration 10 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import httpx
+
+PATHS = ["/health/live", "/api/v1/communities/cards?vk_user_id=123456"]
+BENCH_ENV = {"SCHEDULER_ENABLED": "false", "LOG_LEVEL": "WARNING", "SERVER_ACCESS_LOG": "false"}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def launch(mode: str, port: int, workers: int) -> subprocess.Popen:
+    env = {**os.environ, **BENCH_ENV, "APP_PORT": str(port), "SERVER_HOST": "127.0.0.1"}
+    if mode == "dev":
+        cmd = [sys.executable, "-m", "uvicorn", "src.main:app", "--host", "127.0.0.1", "--port", str(port),
+               "--reload", "--no-access-log", "--log-level", "warning"]
+    else:
+        env["SERVER_WORKERS"] = str(workers)
+        cmd = [sys.executable, "-m", "src.server"]
+    return subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                            start_new_session=True)
+
+
+def wait_ready(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health/live", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Сервер на порту {port} не поднялся за {timeout} с")
+
+
+def stop(process: subprocess.Popen) -> None:
+    # SIGTERM всей группе: при --reload сервер работает в дочернем процессе наблюдателя
+    os.killpg(process.pid, signal.SIGTERM)
+    try:
+        process.wait(timeout=40)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+
+
+async def load(port: int, duration: float, concurrency: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=10) as client:
+        async def worker(index: int):
+            nonlocal errors
+            path = PATHS[index % len(PATHS)]
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+
+    latencies.sort()
+    return {
+        "rps": len(latencies) / duration,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=0, help="Воркеров в продакшен-режиме (0 - по числу CPU)")
+    args = parser.parse_args()
+
+    from src.server import worker_count
+    workers = args.workers or worker_count()
+
+    for mode, label in (("dev", "uvicorn --reload"), ("prod", f"src.server, воркеров: {workers}")):
+        port = free_port()
+        process = launch(mode, port, workers)
+        try:
+            wait_ready(port)
+            result = asyncio.run(load(port, args.duration, args.concurrency))
+        finally:
+            stop(process)
+        print(f"{label:<32} {result['rps']:8.0f} req/s  p50 {result['p50_ms']:6.1f} ms  "
+              f"p99 {result['p99_ms']:6.1f} ms  ошибок {result['errors']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк холодного старта: время импорта src.main в чистом интерпретаторе,
+самые долгие импорты (python -X importtime) и первая сборка OpenAPI-схемы
+в сравнении с загрузкой заранее собранного файла. Запуск:
+
+    python -m benchmarks.bench_startup --runs 5 --max-import-seconds 3
+
+С --max-import-seconds скрипт завершается с кодом 1, если медиана времени
+импорта превышает порог, — так регрессию видно в CI.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Tuple
+
+IMPORT_SNIPPET = (
+    "import time; started = time.perf_counter(); import src.main; "
+    "print(time.perf_counter() - started)"
+)
+OPENAPI_SNIPPET = (
+    "import time; import src.main; started = time.perf_counter(); src.main.app.openapi(); "
+    "print(time.perf_counter() - started)"
+)
+
+# Планировщик и логи не нужны для замеров
+BENCH_ENV = {"SCHEDULER_ENABLED": "false", "LOG_LEVEL": "WARNING"}
+
+
+def run_python(args: List[str], env: Dict[str, str]) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args],
+        env={**os.environ, **BENCH_ENV, **env},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def measure(snippet: str, runs: int, env: Dict[str, str] = None) -> List[float]:
+    return [float(run_python(["-c", snippet], env or {}).stdout.strip().splitlines()[-1]) for _ in range(runs)]
+
+
+def slowest_imports(limit: int) -> List[Tuple[int, str]]:
+    # Строки вида "import time: self [us] | cumulative | module"
+    stderr = run_python(["-X", "importtime", "-c", "import src.main"], {}).stderr
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        entries.append((int(cumulative), module.rstrip()))
+    return sorted(entries, reverse=True)[:limit]
+
+
+def report(label: str, samples: List[float]):
+    print(f"{label:<40} медиана {statistics.median(samples):7.3f} s, мин {min(samples):7.3f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Сколько самых долгих импортов показать")
+    parser.add_argument("--max-import-seconds", type=float, help="Порог медианы времени импорта")
+    args = parser.parse_args()
+
+    imports = measure(IMPORT_SNIPPET, args.runs)
+    report("import src.main", imports)
+    report("import src.main без демо-данных", measure(IMPORT_SNIPPET, args.runs, {"DEMO_DATA_ENABLED": "false"}))
+    report("первая сборка OpenAPI", measure(OPENAPI_SNIPPET, args.runs))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        schema_path = os.path.join(tmp, "openapi.json")
+        run_python(["-m", "src.core.openapi", schema_path], {})
+        with open(schema_path, encoding="utf-8") as f:
+            print(f"Размер схемы: {len(json.dumps(json.load(f))) / 1024:.0f} КБ")
+        report("OpenAPI из файла", measure(OPENAPI_SNIPPET, args.runs, {"OPENAPI_SCHEMA_PATH": schema_path}))
+
+    print(f"\nСамые долгие импорты (накопительно), топ {args.top}:")
+    for cumulative, module in slowest_imports(args.top):
+        print(f"{cumulative / 1000:9.1f} ms  {module}")
+
+    if args.max_import_seconds is not None and statistics.median(imports) > args.max_import_seconds:
+        print(f"\nРегрессия: медиана импорта {statistics.median(imports):.3f} s > {args.max_import_seconds} s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
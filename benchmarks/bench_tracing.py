@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк накладных расходов трассировки.
+
+Сравнивает пустой блок, блок со спаном при выключенной и включенной трассировке
+(экспорт в память) и SQL-запрос с обработчиками трассировки и без них. Запуск:
+
+    python -m benchmarks.bench_tracing --iterations 100000
+"""
+
+import time
+
+from sqlalchemy import create_engine, text
+
+from benchmarks.common import make_parser
+from src.core.tracing import (
+    InMemorySpanExporter,
+    SimpleSpanProcessor,
+    configure_tracing,
+    instrument_engine_tracing,
+    traced,
+    tracer,
+)
+
+
+def per_call_us(func, iterations: int) -> float:
+    func(min(iterations, 1000))  # прогрев: кеш компиляции SQL, аллокатор
+    started = time.perf_counter()
+    func(iterations)
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def bare_block(iterations: int):
+    for _ in range(iterations):
+        pass
+
+
+def span_block(iterations: int):
+    for _ in range(iterations):
+        with tracer.start_as_current_span("bench"):
+            pass
+
+
+@traced("bench.traced")
+def traced_function():
+    return None
+
+
+def traced_calls(iterations: int):
+    for _ in range(iterations):
+        traced_function()
+
+
+def sql_queries(engine, with_parent_span: bool):
+    def run(iterations: int):
+        with engine.connect() as connection:
+            statement = text("SELECT 1")
+            if with_parent_span:
+                with tracer.start_as_current_span("bench.sql"):
+                    for _ in range(iterations):
+                        connection.execute(statement)
+            else:
+                for _ in range(iterations):
+                    connection.execute(statement)
+    return run
+
+
+def report(label: str, value: float):
+    print(f"{label:<55} {value:8.2f} мкс")
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument("--iterations", type=int, default=100_000)
+    parser.add_argument("--sql-iterations", type=int, default=20_000)
+    args = parser.parse_args()
+
+    plain_engine = create_engine(args.database_url)
+    traced_engine = create_engine(args.database_url)
+    instrument_engine_tracing(traced_engine)
+    exporter = InMemorySpanExporter()
+
+    configure_tracing(None)
+    report("пустой блок", per_call_us(bare_block, args.iterations))
+    report("спан, трассировка выключена", per_call_us(span_block, args.iterations))
+    report("@traced, трассировка выключена", per_call_us(traced_calls, args.iterations))
+    report("SQL без обработчиков", per_call_us(sql_queries(plain_engine, False), args.sql_iterations))
+    report("SQL с обработчиками, трассировка выключена",
+           per_call_us(sql_queries(traced_engine, False), args.sql_iterations))
+
+    configure_tracing(SimpleSpanProcessor(exporter))
+    report("спан, трассировка включена (экспорт в память)", per_call_us(span_block, args.iterations))
+    report("@traced, трассировка включена", per_call_us(traced_calls, args.iterations))
+    report("SQL с обработчиками, вне трейса", per_call_us(sql_queries(traced_engine, False), args.sql_iterations))
+    report("SQL с обработчиками, внутри трейса", per_call_us(sql_queries(traced_engine, True), args.sql_iterations))
+    configure_tracing(None)
+    print(f"Записано спанов: {len(exporter.get_finished_spans())}")
+
+
+if __name__ == "__main__":
+    main()
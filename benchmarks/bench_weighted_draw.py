@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк взвешенного выбора победителей без повторов на миллионах записей.
+
+Сравнивает дерево Фенвика (построение O(n), выбор O(k log n)), проверяемый
+потоковый выбор по seed (O(n log k)) и наивный вариант, который перед каждым
+победителем заново считает накопленные веса (O(n k)).
+
+Все розыгрыши, активированные с появлением проверяемого режима, завершаются
+проверяемым выбором, поэтому он же замеряется целиком через draw_winners:
+поток участников из БД и выбор по seed, рядом - путь розыгрышей без seed (Фенвик). Запуск:
+
+    python -m benchmarks.bench_weighted_draw --entries 2000000 --winners 100 --db-entries 200000
+"""
+
+import argparse
+import random
+from bisect import bisect_right
+from itertools import accumulate
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import insert
+
+from benchmarks.common import DEFAULT_DATABASE_URL, fresh_session, timed
+from src.db.models.raffle import Raffle, RaffleParticipant, RaffleStatus
+from src.services.draw import commit_seed, draw_winners, new_seed, select_winners
+from src.utils.weighted_sampler import FenwickSampler
+
+
+def naive_weighted_sample(weights: List[int], k: int, rng: random.Random) -> List[int]:
+    weights = list(weights)
+    chosen = []
+    for _ in range(min(k, sum(1 for weight in weights if weight))):
+        prefix = list(accumulate(weights))
+        index = bisect_right(prefix, rng.randrange(prefix[-1]))
+        chosen.append(index)
+        weights[index] = 0
+    return chosen
+
+
+def bench_draw_in_db(database_url: str, weights: List[int], winners: int) -> None:
+    # Путь завершения розыгрыша: draw_winners читает участников из БД потоком
+    db = fresh_session(database_url)
+    now = datetime.now()
+    for raffle_id, seeded in (("bench-seeded", True), ("bench-unseeded", False)):
+        raffle = Raffle(
+            id=raffle_id, vk_user_id="owner", name="Бенчмарк выбора", community_id="bench",
+            contest_text="Бенчмарк", photos=[], required_communities=[], winners_count=winners,
+            blacklist_participants=[], start_date=now, end_date=now, status=RaffleStatus.ACTIVE,
+        )
+        if seeded:
+            commit_seed(raffle)
+        db.add(raffle)
+        db.flush()
+        db.execute(insert(RaffleParticipant), [
+            {"raffle_id": raffle_id, "user_id": f"user-{n}", "weight": weight} for n, weight in enumerate(weights)
+        ])
+    db.commit()
+
+    seeded_raffle = db.get(Raffle, "bench-seeded")
+    with timed(f"draw_winners по seed, {len(weights)} в БД"):
+        first = draw_winners(db, seeded_raffle)
+    assert draw_winners(db, seeded_raffle) == first
+    with timed(f"draw_winners без seed, {len(weights)} в БД"):
+        draw_winners(db, db.get(Raffle, "bench-unseeded"), random.Random(1))
+    db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=2_000_000, help="Число участников")
+    parser.add_argument("--winners", type=int, default=100)
+    parser.add_argument("--max-bonus", type=int, default=5, help="Максимум бонусных записей у участника")
+    parser.add_argument("--naive-entries", type=int, default=200_000,
+                        help="Участников для наивного O(n k) варианта (0 - пропустить)")
+    parser.add_argument("--skip-fair", action="store_true", help="Не замерять потоковый выбор по seed")
+    parser.add_argument("--db-entries", type=int, default=200_000,
+                        help="Участников для замера draw_winners через БД (0 - пропустить)")
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL,
+                        help="База для замера draw_winners (по умолчанию SQLite в памяти). Таблицы пересоздаются!")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    weights = [1 + rng.randrange(args.max_bonus + 1) for _ in range(args.entries)]
+    print(f"Участников: {args.entries}, записей: {sum(weights)}, победителей: {args.winners}")
+
+    with timed("Фенвик: построение"):
+        sampler = FenwickSampler(weights)
+    with timed(f"Фенвик: выбор {args.winners}"):
+        winners = sampler.sample(args.winners, rng)
+    with timed("Фенвик: 100 повторных выборов"):
+        for _ in range(100):
+            sampler.sample(args.winners, rng)
+    assert len(set(winners)) == min(args.winners, args.entries)
+
+    if not args.skip_fair:
+        entries = [(f"user-{n}", weight) for n, weight in enumerate(weights)]
+        seed = new_seed()
+        # O(n log k): от числа победителей время зависит слабо, основное - HMAC на каждого участника
+        for winners_count in (1, args.winners, args.winners * 100):
+            with timed(f"По seed (потоково, HMAC), k={winners_count}"):
+                select_winners(seed, entries, winners_count)
+
+    if args.db_entries:
+        bench_draw_in_db(args.database_url, weights[:args.db_entries], args.winners)
+
+    if args.naive_entries:
+        subset = weights[:args.naive_entries]
+        with timed(f"Наивный O(n k), {len(subset)} участников"):
+            naive_weighted_sample(subset, args.winners, rng)
+        with timed(f"Фенвик, {len(subset)} участников"):
+            FenwickSampler(subset).sample(args.winners, rng)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# Общие помощники для бенчмарков
+
+import argparse
+import math
+import subprocess
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Sequence
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from src.db.base import Base
+import src.db.models.blacklist  # noqa: F401 - регистрация моделей в Base.metadata
+import src.db.models.community  # noqa: F401
+import src.db.models.notification  # noqa: F401
+import src.db.models.raffle  # noqa: F401
+
+DEFAULT_DATABASE_URL = "sqlite://"
+
+# Результаты нагрузочных тестов и микробенчмарков для сравнения между прогонами
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def make_parser(description: str) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        "--database-url",
+        default=DEFAULT_DATABASE_URL,
+        help="База для прогона (по умолчанию SQLite в памяти). Таблицы пересоздаются!",
+    )
+    return parser
+
+
+def fresh_session(database_url: str) -> Session:
+    """Создает сессию на пустой схеме: все таблицы удаляются и создаются заново."""
+    engine = create_engine(database_url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+
+@contextmanager
+def timed(label: str) -> Iterator[None]:
+    started = time.perf_counter()
+    yield
+    print(f"{label:<40} {time.perf_counter() - started:8.3f} s")
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Перцентиль по ближайшему рангу; values должны быть отсортированы"""
+    if not values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(values)))
+    return values[rank - 1]
+
+
+def git_commit() -> Optional[str]:
+    """Короткий хеш текущего коммита для метаданных результата"""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Нагрузочный тест всех роутеров: смесь CRUD розыгрышей, листингов, чтения карточек
+и опроса уведомлений против запущенного приложения и локального Postgres.
+
+Идентификаторы берутся из синтетических данных (src.utils.synthetic_data), поэтому
+перед прогоном база заполняется тем же генератором (--prepare). Виртуальные пользователи
+работают по замкнутому циклу: каждый выбирает сценарий по весам смеси из своего
+генератора случайных чисел с фиксированным seed, так что прогоны воспроизводимы.
+
+Для каждого эндпоинта считаются запросы в секунду, p50/p95/p99 и доля ошибок;
+результат сохраняется в JSON (benchmarks/results) и может сравниваться с прошлым прогоном:
+
+    python -m benchmarks.loadtest --prepare --duration 60 --users 32
+    python -m benchmarks.loadtest --base-url http://127.0.0.1:8000 --compare benchmarks/results/loadtest-....json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.common import RESULTS_DIR, git_commit, percentile
+from src.utils.synthetic_data import COMMUNITY_PREFIX, RAFFLE_PREFIX, USER_PREFIX, SyntheticSpec
+
+API = "/api/v1"
+
+# Веса сценариев по умолчанию: в основном чтение, как у мини-приложения VK
+DEFAULT_MIX = {
+    "raffle_crud": 5,
+    "raffle_listing": 25,
+    "card_reads": 35,
+    "notification_polling": 30,
+    "notification_actions": 5,
+}
+
+# Демо-данные in-memory роутеров (seed_demo_data)
+MODAL_IDS = ["selectMock", "permissionMock", "successMock"]
+NESTED_NICKNAMES = ["@mosnews24", "@spbonline", "@kazan24"]
+DEMO_VK_USER_IDS = ["123456", "654321"]
+
+
+@dataclass
+class EndpointStats:
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    statuses: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+
+    def summary(self, duration: float) -> Dict[str, float]:
+        latencies = sorted(self.latencies)
+        count = len(latencies)
+        return {
+            "requests": count,
+            "rps": round(count / duration, 2),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "error_rate": round(self.errors / count, 4) if count else 0.0,
+            "statuses": dict(self.statuses),
+        }
+
+
+class VirtualUser:
+    """Один виртуальный пользователь: свой генератор случайных чисел и общая статистика"""
+
+    def __init__(self, client: httpx.AsyncClient, rng: random.Random, spec: SyntheticSpec,
+                 stats: Dict[str, EndpointStats], recording: Callable[[], bool]):
+        self.client = client
+        self.rng = rng
+        self.spec = spec
+        self.stats = stats
+        self.recording = recording
+
+    def user_id(self) -> str:
+        return f"{USER_PREFIX}{self.rng.randrange(self.spec.users)}"
+
+    def raffle_id(self) -> str:
+        return f"{RAFFLE_PREFIX}{self.rng.randrange(self.spec.raffles)}"
+
+    async def request(self, endpoint: str, method: str, url: str, expected=(200,), **kwargs) -> Optional[httpx.Response]:
+        """
+        Выполняет запрос и записывает его в статистику эндпоинта.
+
+        endpoint - шаблон маршрута ("GET /raffles/{raffle_id}"), по нему группируются результаты.
+        Ответ со статусом вне expected и сетевые ошибки считаются ошибками.
+        """
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            status = str(response.status_code)
+        except httpx.HTTPError as e:
+            response, status = None, type(e).__name__
+        elapsed = time.perf_counter() - started
+        if self.recording():
+            stats = self.stats[endpoint]
+            stats.latencies.append(elapsed)
+            stats.statuses[status] += 1
+            if response is None or response.status_code not in expected:
+                stats.errors += 1
+        return response
+
+    # Сценарии
+
+    async def raffle_crud(self) -> None:
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        owner = self.user_id()
+        payload = {
+            "vk_user_id": owner,
+            "name": f"Нагрузочный розыгрыш {self.rng.randrange(10**9)}",
+            "community_id": f"{COMMUNITY_PREFIX}{self.rng.randrange(1000)}",
+            "contest_text": "Розыгрыш, созданный нагрузочным тестом",
+            "photos": [],
+            "required_communities": ["@loadtest"],
+            "winners_count": self.rng.randint(1, 5),
+            "start_date": now.isoformat(),
+            "end_date": (now + timedelta(days=7)).isoformat(),
+            "max_participants": 1000,
+        }
+        response = await self.request("POST /raffles/", "POST", f"{API}/raffles/", expected=(201,), json=payload)
+        if response is None or response.status_code != 201:
+            return
+        raffle_id = response.json()["id"]
+        url = f"{API}/raffles/{raffle_id}"
+        await self.request("GET /raffles/{raffle_id}", "GET", url)
+        await self.request("PUT /raffles/{raffle_id}", "PUT", url, json={"name": payload["name"] + " (изменен)"})
+        await self.request("PATCH /raffles/{raffle_id}/status", "PATCH", f"{url}/status", params={"status": "paused"})
+        await self.request("DELETE /raffles/{raffle_id}", "DELETE", url, expected=(204,))
+
+    async def raffle_listing(self) -> None:
+        params = {"page": self.rng.randint(1, 20), "per_page": self.rng.choice([10, 20, 50])}
+        roll = self.rng.random()
+        if roll < 0.4:
+            params["vk_user_id"] = self.user_id()
+        elif roll < 0.7:
+            params["status"] = self.rng.choice(["active", "completed", "draft"])
+        elif roll < 0.85:
+            params["community_id"] = f"{COMMUNITY_PREFIX}{self.rng.randrange(1000)}"
+        await self.request("GET /raffles/", "GET", f"{API}/raffles/", params=params)
+        if self.rng.random() < 0.3:
+            await self.request("GET /raffle-cards/", "GET", f"{API}/raffle-cards/",
+                               params={"vk_user_id": self.user_id(), "per_page": 20})
+
+    async def card_reads(self) -> None:
+        roll = self.rng.random()
+        if roll < 0.4:
+            await self.request("GET /raffle-cards/{raffle_id}", "GET", f"{API}/raffle-cards/{self.raffle_id()}")
+        elif roll < 0.65:
+            await self.request("GET /communities/cards", "GET", f"{API}/communities/cards",
+                               params={"vk_user_id": self.rng.choice(DEMO_VK_USER_IDS)})
+            await self.request("GET /communities/cards/{card_id}", "GET",
+                               f"{API}/communities/cards/{self.rng.randint(1, 4)}")
+        elif roll < 0.85:
+            await self.request("GET /community-modals/", "GET", f"{API}/community-modals/")
+            await self.request("GET /community-modals/{modal_id}", "GET",
+                               f"{API}/community-modals/{self.rng.choice(MODAL_IDS)}")
+        else:
+            await self.request("GET /nested-community-cards/", "GET", f"{API}/nested-community-cards/")
+            await self.request("GET /nested-community-cards/{nickname}", "GET",
+                               f"{API}/nested-community-cards/{self.rng.choice(NESTED_NICKNAMES)}")
+
+    async def notification_polling(self) -> None:
+        user_id = self.user_id()
+        await self.request("GET /notification-cards/unread/count", "GET", f"{API}/notification-cards/unread/count",
+                           params={"user_id": user_id})
+        response = await self.request("GET /notification-cards/", "GET", f"{API}/notification-cards/",
+                                      params={"user_id": user_id, "limit": 20})
+        # Иногда пользователь листает ленту дальше
+        if response is not None and response.status_code == 200 and self.rng.random() < 0.3:
+            cursor = response.json().get("next_cursor")
+            if cursor:
+                await self.request("GET /notification-cards/", "GET", f"{API}/notification-cards/",
+                                   params={"user_id": user_id, "limit": 20, "cursor": cursor})
+        if self.rng.random() < 0.2:
+            await self.request("GET /notifications/", "GET", f"{API}/notifications/", params={"limit": 20})
+            await self.request("GET /notifications/unread/count", "GET", f"{API}/notifications/unread/count")
+        if self.rng.random() < 0.1:
+            await self.request("GET /notification-settings/{user_id}", "GET",
+                               f"{API}/notification-settings/{self.rng.choice(DEMO_VK_USER_IDS)}")
+
+    async def notification_actions(self) -> None:
+        user_id = self.user_id()
+        response = await self.request("GET /notification-cards/", "GET", f"{API}/notification-cards/",
+                                      params={"user_id": user_id, "new": "true", "limit": 10})
+        if response is None or response.status_code != 200:
+            return
+        ids = [item["id"] for item in response.json()["notifications"]]
+        if ids:
+            await self.request("POST /notification-cards/mark-read", "POST", f"{API}/notification-cards/mark-read",
+                               json={"user_id": user_id, "ids": ids})
+
+
+async def run_load(base_url: str, spec: SyntheticSpec, mix: Dict[str, int], users: int,
+                   duration: float, warmup: float, seed: int, think_time: float) -> Dict[str, EndpointStats]:
+    stats: Dict[str, EndpointStats] = defaultdict(EndpointStats)
+    started = time.monotonic()
+    measure_from = started + warmup
+    deadline = measure_from + duration
+    scenarios = list(mix)
+    weights = [mix[name] for name in scenarios]
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        async def worker(index: int):
+            user = VirtualUser(client, random.Random(seed + index), spec, stats,
+                               lambda: time.monotonic() >= measure_from)
+            while time.monotonic() < deadline:
+                scenario: Callable[[], Awaitable[None]] = getattr(user, user.rng.choices(scenarios, weights)[0])
+                await scenario()
+                if think_time:
+                    await asyncio.sleep(user.rng.expovariate(1 / think_time))
+
+        await asyncio.gather(*(worker(i) for i in range(users)))
+    return stats
+
+
+def prepare_data(spec: SyntheticSpec) -> None:
+    """Заполняет базу приложения (DATABASE_URL) синтетическими данными"""
+    from src.db.session import SessionLocal
+    from src.utils.synthetic_data import generate
+
+    db = SessionLocal()
+    try:
+        counts = generate(db, spec)
+    finally:
+        db.close()
+    print("Синтетические данные: " + ", ".join(f"{name} {count}" for name, count in counts.items()))
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    mix = dict(DEFAULT_MIX)
+    for part in filter(None, value.split(",")):
+        name, _, weight = part.partition("=")
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Неизвестный сценарий {name!r}; доступны: {', '.join(DEFAULT_MIX)}")
+        mix[name] = int(weight)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("Все веса смеси нулевые")
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+def print_report(endpoints: Dict[str, Dict[str, float]], baseline: Optional[Dict[str, Dict[str, float]]] = None) -> None:
+    header = f"{'эндпоинт':<44} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'ошибки':>7}"
+    if baseline is not None:
+        header += f" {'Δreq/s':>8} {'Δp95':>8}"
+    print(header)
+    for endpoint, result in sorted(endpoints.items()):
+        line = (f"{endpoint:<44} {result['rps']:8.1f} {result['p50_ms']:8.1f} {result['p95_ms']:8.1f} "
+                f"{result['p99_ms']:8.1f} {result['error_rate']:7.1%}")
+        previous = (baseline or {}).get(endpoint)
+        if previous:
+            line += f" {_delta(result['rps'], previous['rps']):>8} {_delta(result['p95_ms'], previous['p95_ms']):>8}"
+        print(line)
+
+
+def _delta(current: float, previous: float) -> str:
+    if not previous:
+        return "-"
+    return f"{(current - previous) / previous:+.0%}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="Адрес запущенного приложения; без него приложение поднимается "
+                                           "отдельным процессом (python -m src.server)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Длительность замера, с")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Прогрев перед замером, с")
+    parser.add_argument("--users", type=int, default=32, help="Число виртуальных пользователей")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Средняя пауза между сценариями, с")
+    parser.add_argument("--mix", type=parse_mix, default=dict(DEFAULT_MIX),
+                        help="Веса сценариев, например card_reads=50,raffle_crud=0")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-raffles", type=int, default=SyntheticSpec.raffles)
+    parser.add_argument("--data-users", type=int, default=SyntheticSpec.users)
+    parser.add_argument("--prepare", action="store_true", help="Сгенерировать синтетические данные перед прогоном")
+    parser.add_argument("--workers", type=int, default=0, help="Воркеров поднимаемого приложения (0 - по числу CPU)")
+    parser.add_argument("--output", type=Path, help="Файл результата (по умолчанию benchmarks/results/loadtest-<время>.json)")
+    parser.add_argument("--compare", type=Path, help="Прошлый результат для сравнения")
+    args = parser.parse_args()
+
+    spec = SyntheticSpec(raffles=args.data_raffles, users=args.data_users)
+    if args.prepare:
+        prepare_data(spec)
+
+    process = None
+    base_url = args.base_url
+    if base_url is None:
+        from benchmarks.bench_server_throughput import free_port, launch, wait_ready
+        from src.server import worker_count
+        port = free_port()
+        process = launch("prod", port, args.workers or worker_count())
+        base_url = f"http://127.0.0.1:{port}"
+    try:
+        if process is not None:
+            wait_ready(port)
+        stats = asyncio.run(run_load(base_url, spec, args.mix, args.users, args.duration, args.warmup,
+                                     args.seed, args.think_time))
+    finally:
+        if process is not None:
+            from benchmarks.bench_server_throughput import stop
+            stop(process)
+
+    endpoints = {endpoint: endpoint_stats.summary(args.duration) for endpoint, endpoint_stats in stats.items()}
+    total = EndpointStats()
+    for endpoint_stats in stats.values():
+        total.latencies.extend(endpoint_stats.latencies)
+        total.errors += endpoint_stats.errors
+    result = {
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "base_url": base_url,
+        "parameters": {
+            "duration": args.duration, "warmup": args.warmup, "users": args.users, "think_time": args.think_time,
+            "mix": args.mix, "seed": args.seed, "data_raffles": spec.raffles, "data_users": spec.users,
+        },
+        "total": total.summary(args.duration),
+        "endpoints": endpoints,
+    }
+
+    baseline = None
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())["endpoints"]
+    print_report(endpoints, baseline)
+    print(f"Итого: {result['total']['rps']:.1f} req/s, p95 {result['total']['p95_ms']:.1f} ms, "
+          f"ошибок {result['total']['error_rate']:.1%}")
+
+    output = args.output or RESULTS_DIR / f"loadtest-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, ensure_ascii=False, indent=2))
+    print(f"Результат сохранен: {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Микробенчмарки горячих функций: валидация схем, преобразование ORM-объектов,
+фильтрация карточек сообществ, сериализация уведомлений и определение победителей.
+
+Каждый бенчмарк измеряется как в pytest-benchmark: число повторов в раунде подбирается
+так, чтобы раунд длился не меньше --min-time, затем выполняется --rounds раундов и
+считаются min/median/mean/stddev времени одного вызова. Результат пишется в JSON;
+с --baseline медианы сравниваются с прошлым результатом, и при замедлении любого
+отслеживаемого бенчмарка больше чем на --threshold команда завершается с кодом 1:
+
+    python -m benchmarks.micro --json benchmarks/results/micro-baseline.json
+    python -m benchmarks.micro --baseline benchmarks/results/micro-baseline.json --threshold 0.2
+"""
+
+import argparse
+import gc
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import insert
+
+from benchmarks.common import RESULTS_DIR, fresh_session, git_commit
+
+# Бенчмарк - функция подготовки, возвращающая измеряемый вызов без аргументов;
+# подготовка в замер не входит
+Setup = Callable[[], Callable[[], object]]
+BENCHMARKS: Dict[str, Setup] = {}
+
+
+def benchmark(name: str) -> Callable[[Setup], Setup]:
+    def register(setup: Setup) -> Setup:
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def _run_coroutine(coro):
+    # Обработчики без await выполняются за один шаг, без цикла событий
+    try:
+        coro.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("Корутина ожидает ввода-вывода")
+
+
+def _raffle_payload(n: int) -> dict:
+    start = datetime(2025, 7, 9, 14, 33)
+    return {
+        "vk_user_id": "123456",
+        "name": f"Розыгрыш {n}",
+        "community_id": "12345",
+        "contest_text": "Участвуйте в нашем конкурсе!",
+        "photos": [f"https://example.com/photo{i}.jpg" for i in range(3)],
+        "required_communities": ["@community1", "@community2"],
+        "partner_tags": ["@partner1"],
+        "winners_count": 5,
+        "blacklist_participants": ["@user1", "@user2"],
+        "start_date": start.isoformat(),
+        "end_date": (start + timedelta(days=31)).isoformat(),
+        "max_participants": 1000,
+    }
+
+
+def _raffle_columns(n: int) -> dict:
+    from src.schemas.raffle import RaffleCreate
+    return RaffleCreate(**_raffle_payload(n)).dict()
+
+
+@benchmark("raffle_create_validation")
+def bench_raffle_create_validation():
+    from src.schemas.raffle import RaffleCreate
+
+    payload = _raffle_payload(1)
+    return lambda: RaffleCreate(**payload)
+
+
+@benchmark("raffle_response_from_orm_page")
+def bench_raffle_response_from_orm():
+    # Страница листинга /raffles: 20 розыгрышей
+    from src.db.models.raffle import Raffle, RaffleStatus
+    from src.schemas.raffle import RaffleResponse
+
+    now = datetime(2025, 7, 1)
+    raffles = [
+        Raffle(id=f"raffle-{n}", **_raffle_columns(n), status=RaffleStatus.ACTIVE,
+               participants_count=n, created_at=now, updated_at=now)
+        for n in range(20)
+    ]
+    return lambda: [RaffleResponse.from_orm(raffle) for raffle in raffles]
+
+
+@benchmark("community_cards_filter")
+def bench_community_cards_filter():
+    # 1000 карточек у 100 владельцев, запрашиваются карточки одного владельца
+    from src.api.v1 import community
+
+    community.seed_demo_data()
+    template = community.communities_db["1"]
+    cards = {
+        str(n): template.copy(update={"id": str(n), "vk_user_id": f"user-{n % 100}"})
+        for n in range(1000)
+    }
+    community.communities_db.clear()
+    community.communities_db.update(cards)
+    return lambda: _run_coroutine(community.get_community_cards(vk_user_id="user-7"))
+
+
+@benchmark("notification_cards_serialization")
+def bench_notification_cards_serialization():
+    # Страница /notification-cards: сборка 20 карточек из строк и сериализация ответа
+    from src.api.v1.notification_card import _to_card
+    from src.db.models.notification import NotificationType
+    from src.schemas.notification_card import NotificationCardListResponse
+
+    class Row:
+        def __init__(self, id, type, payload, new):
+            self.id, self.type, self.payload, self.new = id, type, payload, new
+
+    payloads = {
+        NotificationType.COMPLETED: {"raffleId": "raffle-1", "participantsCount": 5920,
+                                     "winners": ["593IF", "REOOJ", "DOXO"], "reasonEnd": "Достигнут лимит."},
+        NotificationType.WARNING: {"warningTitle": "Не удалось подключить виджет",
+                                   "warningDescription": ["Сообщество", "Недостаточно прав."]},
+        NotificationType.ERROR: {"errorTitle": "Ошибка подключения", "errorDescription": "Технические работы"},
+    }
+    types = list(payloads)
+    rows = [Row(n, types[n % 3], payloads[types[n % 3]], n % 2 == 0) for n in range(20)]
+
+    def serialize():
+        response = NotificationCardListResponse(notifications=[_to_card(row) for row in rows], next_cursor=None)
+        return jsonable_encoder(response)
+    return serialize
+
+
+@benchmark("draw_winners_10k")
+def bench_draw_winners():
+    from src.db.models.raffle import Raffle, RaffleParticipant, RaffleStatus
+    from src.services.draw import draw_winners
+
+    db = fresh_session("sqlite://")
+    now = datetime(2025, 7, 1)
+    raffle = Raffle(id="bench-raffle", **_raffle_columns(0), status=RaffleStatus.ACTIVE,
+                    created_at=now, updated_at=now)
+    db.add(raffle)
+    db.execute(insert(RaffleParticipant), [
+        {"raffle_id": raffle.id, "user_id": f"user-{n}"} for n in range(10_000)
+    ])
+    db.commit()
+    rng = random.Random(42)
+    return lambda: draw_winners(db, raffle, rng)
+
+
+@benchmark("fair_draw_select_10k")
+def bench_fair_draw_select():
+    # Проверяемый выбор без БД: 10 000 участников, 5 победителей
+    from src.services.draw import new_seed, select_winners
+
+    seed = new_seed()
+    entries = [(f"user-{n}", 1 + n % 3) for n in range(10_000)]
+    return lambda: select_winners(seed, entries, 5)
+
+
+def measure(call: Callable[[], object], rounds: int, min_time: float) -> Dict[str, float]:
+    """Время одного вызова по раундам, в секундах"""
+    call()  # прогрев
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            call()
+        if time.perf_counter() - started >= min_time:
+            break
+        loops *= 2
+
+    timings: List[float] = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            started = time.perf_counter()
+            for _ in range(loops):
+                call()
+            timings.append((time.perf_counter() - started) / loops)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.mean(timings),
+        "stddev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "rounds": rounds,
+        "loops": loops,
+    }
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            threshold: float) -> List[str]:
+    """Отслеживаемые бенчмарки (есть в baseline), медиана которых выросла больше чем на threshold"""
+    regressions = []
+    for name, previous in baseline.items():
+        current = results.get(name)
+        if current is None:
+            continue
+        change = current["median"] / previous["median"] - 1
+        if change > threshold:
+            regressions.append(f"{name}: медиана {previous['median'] * 1e6:.1f} -> {current['median'] * 1e6:.1f} мкс "
+                               f"({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", dest="select", help="Запустить только бенчмарки, в имени которых есть подстрока")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--min-time", type=float, default=0.02, help="Минимальная длительность раунда, с")
+    parser.add_argument("--json", type=Path, help="Файл результата (по умолчанию benchmarks/results/micro-<время>.json)")
+    parser.add_argument("--baseline", type=Path, help="Прошлый результат, с которым сравниваются медианы")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Допустимое замедление, доля (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    results: Dict[str, Dict[str, float]] = {}
+    print(f"{'бенчмарк':<36} {'min мкс':>10} {'median мкс':>11} {'stddev мкс':>11} {'оп/с':>10}")
+    for name, setup in BENCHMARKS.items():
+        if args.select and args.select not in name:
+            continue
+        result = measure(setup(), args.rounds, args.min_time)
+        results[name] = result
+        print(f"{name:<36} {result['min'] * 1e6:10.1f} {result['median'] * 1e6:11.1f} "
+              f"{result['stddev'] * 1e6:11.1f} {1 / result['median']:10.0f}")
+
+    output = args.json or RESULTS_DIR / f"micro-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "machine": {"python": platform.python_version(), "platform": platform.platform()},
+        "benchmarks": results,
+    }, ensure_ascii=False, indent=2))
+    print(f"Результат сохранен: {output}")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())["benchmarks"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"Замедление больше {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"Регрессий больше {args.threshold:.0%} нет")
+
+
+if __name__ == "__main__":
+    main()
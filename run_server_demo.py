@@ -7,7 +7,7 @@ import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from src.api.v1.raffle_demo import router as raffle_router
+from src.api.v1.raffle_demo import router as raffle_router, seed_demo_data
 
 # Создаем приложение
 app = FastAPI(
@@ -29,6 +29,7 @@ app.add_middleware(
 
 # Подключаем роутеры
 app.include_router(raffle_router)
+seed_demo_data()
 
 @app.get("/", summary="Главная страница")
 async def root():
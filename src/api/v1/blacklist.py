@@ -0,0 +1,94 @@
+# Эндпоинты для черных списков участников
+
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from src.db.session import SessionLocal, get_db
+from src.db.models.raffle import Raffle
+from src.schemas.blacklist import BlacklistImport, BlacklistImportResult, BlacklistRemoveResult
+from src.services.blacklist import export_blacklist, import_blacklist, remove_from_blacklist
+
+router = APIRouter(prefix="/blacklists", tags=["Blacklists"])
+
+def _check_raffle(db: Session, owner_vk_user_id: str, raffle_id: Optional[str]) -> None:
+    # Список розыгрыша меняет и читает только его владелец
+    if raffle_id is None:
+        return
+    raffle = db.query(Raffle).filter(Raffle.id == raffle_id).first()
+    if not raffle:
+        raise HTTPException(status_code=404, detail="Розыгрыш не найден")
+    if raffle.vk_user_id != owner_vk_user_id:
+        raise HTTPException(status_code=403, detail="Розыгрыш принадлежит другому пользователю")
+
+@router.post("/{owner_vk_user_id}/import", response_model=BlacklistImportResult,
+             summary="Импортировать черный список",
+             description="Массово добавляет записи в черный список владельца или розыгрыша")
+def import_owner_blacklist(
+    owner_vk_user_id: str,
+    payload: BlacklistImport,
+    db: Session = Depends(get_db)
+):
+    """
+    Добавляет записи в черный список.
+
+    Записи нормализуются: `@Name`, `name` и `https://vk.com/name` - одна запись `name`,
+    `@id123` и `vk.com/id123` - запись `123`. Повторы и уже имеющиеся записи пропускаются.
+
+    Без `raffle_id` список действует на все розыгрыши владельца.
+
+    **Ошибки:**
+    - `404` - Розыгрыш не найден
+    - `403` - Розыгрыш принадлежит другому пользователю
+    """
+    _check_raffle(db, owner_vk_user_id, payload.raffle_id)
+    imported, invalid = import_blacklist(db, owner_vk_user_id, payload.entries, payload.raffle_id)
+    return BlacklistImportResult(received=len(payload.entries), imported=imported, invalid=invalid)
+
+@router.post("/{owner_vk_user_id}/remove", response_model=BlacklistRemoveResult,
+             summary="Удалить записи из черного списка",
+             description="Удаляет записи из черного списка владельца или розыгрыша")
+def remove_owner_blacklist(
+    owner_vk_user_id: str,
+    payload: BlacklistImport,
+    db: Session = Depends(get_db)
+):
+    """
+    Удаляет записи из черного списка; записи нормализуются так же, как при импорте.
+
+    **Ошибки:**
+    - `404` - Розыгрыш не найден
+    - `403` - Розыгрыш принадлежит другому пользователю
+    """
+    _check_raffle(db, owner_vk_user_id, payload.raffle_id)
+    return BlacklistRemoveResult(removed=remove_from_blacklist(db, owner_vk_user_id, payload.entries, payload.raffle_id))
+
+@router.get("/{owner_vk_user_id}",
+            summary="Выгрузить черный список",
+            description="Потоковая выгрузка черного списка владельца или розыгрыша, по одной записи в строке")
+def export_owner_blacklist(
+    owner_vk_user_id: str,
+    raffle_id: Optional[str] = Query(None, description="ID розыгрыша; без него - список на все розыгрыши владельца"),
+    db: Session = Depends(get_db)
+):
+    """
+    Нормализованные записи черного списка в алфавитном порядке, по одной в строке.
+    Выгрузку можно без изменений передать в импорт.
+
+    **Ошибки:**
+    - `404` - Розыгрыш не найден
+    - `403` - Розыгрыш принадлежит другому пользователю
+    """
+    _check_raffle(db, owner_vk_user_id, raffle_id)
+
+    # Сессия зависимости закрывается до отправки тела ответа, поэтому у потока своя
+    def lines():
+        stream_db = SessionLocal()
+        try:
+            for ref in export_blacklist(stream_db, owner_vk_user_id, raffle_id):
+                yield f"{ref}\n"
+        finally:
+            stream_db.close()
+
+    return StreamingResponse(lines(), media_type="text/plain; charset=utf-8")
@@ -9,58 +9,59 @@ router = APIRouter(prefix="/communities", tags=["Communities"])
 communities_db: Dict[str, CommunityCard] = {}
 
 # Демо-данные
-communities_db["1"] = CommunityCard(
-    id="1",
-    vk_user_id="123456",
-    name="Техно-сообщество",
-    nickname="@techclub",
-    membersCount="12 500",
-    raffleCount="8",
-    adminType="owner",
-    avatarUrl="https://example.com/avatar.jpg",
-    status="green",
-    buttonDesc="Последнее изменение: 14.10 21:31 – Администратор",
-    stateText="Активен"
-)
-communities_db["2"] = CommunityCard(
-    id="2",
-    vk_user_id="123456",
-    name="Москва 24 – Новости",
-    nickname="@mosnews24",
-    membersCount="522K",
-    raffleCount="15",
-    adminType="admin",
-    avatarUrl="https://example.com/mosnews.jpg",
-    status="yellow",
-    buttonDesc="Последнее изменение: 15.10 14:20 – Модератор",
-    stateText="Неактивен"
-)
-communities_db["3"] = CommunityCard(
-    id="3",
-    vk_user_id="654321",
-    name="Казань 24 – Новости",
-    nickname="@kazan24",
-    membersCount="804K",
-    raffleCount="12",
-    adminType="owner",
-    avatarUrl="https://example.com/kazan.jpg",
-    status="red",
-    buttonDesc="Последнее изменение: 16.10 09:15 – Администратор",
-    stateText="Неактивен"
-)
-communities_db["4"] = CommunityCard(
-    id="4",
-    vk_user_id="654321",
-    name="Санкт-Петербург Онлайн",
-    nickname="@spbonline",
-    membersCount="878K",
-    raffleCount="20",
-    adminType="admin",
-    avatarUrl="https://example.com/spb.jpg",
-    status="green",
-    buttonDesc="Последнее изменение: 17.10 16:45 – Админ",
-    stateText="Активен"
-)
+def seed_demo_data() -> None:
+    communities_db["1"] = CommunityCard(
+        id="1",
+        vk_user_id="123456",
+        name="Техно-сообщество",
+        nickname="@techclub",
+        membersCount="12 500",
+        raffleCount="8",
+        adminType="owner",
+        avatarUrl="https://example.com/avatar.jpg",
+        status="green",
+        buttonDesc="Последнее изменение: 14.10 21:31 – Администратор",
+        stateText="Активен"
+    )
+    communities_db["2"] = CommunityCard(
+        id="2",
+        vk_user_id="123456",
+        name="Москва 24 – Новости",
+        nickname="@mosnews24",
+        membersCount="522K",
+        raffleCount="15",
+        adminType="admin",
+        avatarUrl="https://example.com/mosnews.jpg",
+        status="yellow",
+        buttonDesc="Последнее изменение: 15.10 14:20 – Модератор",
+        stateText="Неактивен"
+    )
+    communities_db["3"] = CommunityCard(
+        id="3",
+        vk_user_id="654321",
+        name="Казань 24 – Новости",
+        nickname="@kazan24",
+        membersCount="804K",
+        raffleCount="12",
+        adminType="owner",
+        avatarUrl="https://example.com/kazan.jpg",
+        status="red",
+        buttonDesc="Последнее изменение: 16.10 09:15 – Администратор",
+        stateText="Неактивен"
+    )
+    communities_db["4"] = CommunityCard(
+        id="4",
+        vk_user_id="654321",
+        name="Санкт-Петербург Онлайн",
+        nickname="@spbonline",
+        membersCount="878K",
+        raffleCount="20",
+        adminType="admin",
+        avatarUrl="https://example.com/spb.jpg",
+        status="green",
+        buttonDesc="Последнее изменение: 17.10 16:45 – Админ",
+        stateText="Активен"
+    )
 
 @router.get("/cards", response_model=List[CommunityCard], summary="Получить список карточек сообществ")
 async def get_community_cards(vk_user_id: str = Query(..., description="VK user ID владельца")):
@@ -11,30 +11,31 @@ router = APIRouter(prefix="/community-modals", tags=["CommunityModals"])
 modals_db: Dict[str, CommunityModal] = {}
 
 # Примеры для демо
-modals_db["selectMock"] = SelectModal(
-    id="selectMock",
-    type="select",
-    placeholder="Выберите сообщество",
-    options=["Казань 24 – Новости", "Москва Life", "Краснодар Online"]
-)
-modals_db["permissionMock"] = PermissionModal(
-    id="permissionMock",
-    type="permission",
-    communityName="Казань 24 – Новости",
-    communityAvatar="https://example.com/avatar.jpg",
-    subscribers=[
-        {"name": "Андрей", "avatar": "https://example.com/avatar.jpg"},
-        {"name": "София", "avatar": "https://example.com/avatar.jpg"},
-        {"name": "Мария", "avatar": ""},
-        {"name": "Николай", "avatar": "https://example.com/avatar.jpg"}
-    ]
-)
-modals_db["successMock"] = SuccessModal(
-    id="successMock",
-    type="success",
-    communityName="Казань 24 – Новости",
-    communityAvatar="https://example.com/avatar.jpg"
-)
+def seed_demo_data() -> None:
+    modals_db["selectMock"] = SelectModal(
+        id="selectMock",
+        type="select",
+        placeholder="Выберите сообщество",
+        options=["Казань 24 – Новости", "Москва Life", "Краснодар Online"]
+    )
+    modals_db["permissionMock"] = PermissionModal(
+        id="permissionMock",
+        type="permission",
+        communityName="Казань 24 – Новости",
+        communityAvatar="https://example.com/avatar.jpg",
+        subscribers=[
+            {"name": "Андрей", "avatar": "https://example.com/avatar.jpg"},
+            {"name": "София", "avatar": "https://example.com/avatar.jpg"},
+            {"name": "Мария", "avatar": ""},
+            {"name": "Николай", "avatar": "https://example.com/avatar.jpg"}
+        ]
+    )
+    modals_db["successMock"] = SuccessModal(
+        id="successMock",
+        type="success",
+        communityName="Казань 24 – Новости",
+        communityAvatar="https://example.com/avatar.jpg"
+    )
 
 @router.get("/", response_model=CommunityModalListResponse, summary="Получить все модалки")
 async def get_all_modals():
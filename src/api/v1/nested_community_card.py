@@ -11,38 +11,39 @@ def _make_id(card: NestedCommunityCard) -> str:
     return f"{card.nickname}"  # Можно заменить на uuid или другое поле
 
 # Демо-данные
-cards_db["@mosnews24"] = NestedCommunityCard(
-    status=None,
-    statusText="Статус неизвестен",
-    name="Москва 24 – Новости",
-    nickname="@mosnews24",
-    adminType="admin",
-    membersCount="592K"
-)
-cards_db["@spbonline"] = NestedCommunityCard(
-    status="green",
-    statusText="Виджет настроен",
-    name="Питер Онлайн",
-    nickname="@spbonline",
-    adminType="owner",
-    membersCount="1.2M"
-)
-cards_db["@kazan24"] = NestedCommunityCard(
-    status="red",
-    statusText="Ошибка подключения",
-    name="Казань 24",
-    nickname="@kazan24",
-    adminType="admin",
-    membersCount="804K"
-)
-cards_db["@nsknews"] = NestedCommunityCard(
-    status="yellow",
-    statusText="Требуется разрешение",
-    name="Новосибирск – Главное",
-    nickname="@nsknews",
-    adminType="owner",
-    membersCount="325K"
-)
+def seed_demo_data() -> None:
+    cards_db["@mosnews24"] = NestedCommunityCard(
+        status=None,
+        statusText="Статус неизвестен",
+        name="Москва 24 – Новости",
+        nickname="@mosnews24",
+        adminType="admin",
+        membersCount="592K"
+    )
+    cards_db["@spbonline"] = NestedCommunityCard(
+        status="green",
+        statusText="Виджет настроен",
+        name="Питер Онлайн",
+        nickname="@spbonline",
+        adminType="owner",
+        membersCount="1.2M"
+    )
+    cards_db["@kazan24"] = NestedCommunityCard(
+        status="red",
+        statusText="Ошибка подключения",
+        name="Казань 24",
+        nickname="@kazan24",
+        adminType="admin",
+        membersCount="804K"
+    )
+    cards_db["@nsknews"] = NestedCommunityCard(
+        status="yellow",
+        statusText="Требуется разрешение",
+        name="Новосибирск – Главное",
+        nickname="@nsknews",
+        adminType="owner",
+        membersCount="325K"
+    )
 
 @router.get("/", response_model=NestedCommunityCardListResponse, summary="Получить все NestedCommunityCard")
 async def get_all_cards():
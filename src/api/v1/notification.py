@@ -1,12 +1,14 @@
 # Эндпоинты для работы с уведомлениями
 
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
 from fastapi import Body
-from typing import List, Dict
-from src.schemas.notification import Notification, NotificationCreate, NotificationUpdate
+from datetime import datetime, timezone
+from typing import List, Dict, Optional
+from src.schemas.notification import Notification, NotificationCreate, NotificationUpdate, NotificationType, NotificationBulkAction
 from src.db.session import get_db
 from src.db.models.notification import UserNotificationSettings as UserNotificationSettingsModel
 from src.schemas.notification import UserNotificationSettings as UserNotificationSettingsSchema
+from src.utils.pagination import encode_cursor, decode_cursor
 from sqlalchemy.orm import Session
 
 router = APIRouter(prefix="/notifications", tags=["Notifications"])
@@ -16,38 +18,62 @@ settings_router = APIRouter(prefix="/notification-settings", tags=["Notification
 notifications_db: Dict[int, Notification] = {}
 
 # Демо-данные
-notifications_db[1] = Notification(
-    id=1,
-    type="INFO",
-    title="Розыгрыш завершен",
-    message="Розыгрыш 'Технические новинки' успешно завершен. Победители определены.",
-    is_read=False,
-    created_at="2025-01-18T10:30:00Z"
-)
-notifications_db[2] = Notification(
-    id=2,
-    type="WARNING",
-    title="Низкий баланс",
-    message="Баланс сообщества 'Москва 24' приближается к лимиту.",
-    is_read=True,
-    created_at="2025-01-18T09:15:00Z"
-)
-notifications_db[3] = Notification(
-    id=3,
-    type="ERROR",
-    title="Ошибка подключения",
-    message="Не удалось подключиться к VK API для сообщества 'Казань 24'.",
-    is_read=False,
-    created_at="2025-01-18T08:45:00Z"
-)
+def seed_demo_data() -> None:
+    notifications_db[1] = Notification(
+        id=1,
+        type="INFO",
+        title="Розыгрыш завершен",
+        message="Розыгрыш 'Технические новинки' успешно завершен. Победители определены.",
+        is_read=False,
+        created_at="2025-01-18T10:30:00Z"
+    )
+    notifications_db[2] = Notification(
+        id=2,
+        type="WARNING",
+        title="Низкий баланс",
+        message="Баланс сообщества 'Москва 24' приближается к лимиту.",
+        is_read=True,
+        created_at="2025-01-18T09:15:00Z"
+    )
+    notifications_db[3] = Notification(
+        id=3,
+        type="ERROR",
+        title="Ошибка подключения",
+        message="Не удалось подключиться к VK API для сообщества 'Казань 24'.",
+        is_read=False,
+        created_at="2025-01-18T08:45:00Z"
+    )
 
-@router.get("/", response_model=List[Notification], summary="Получить все уведомления")
-async def get_notifications():
+def _created_at(notification: Notification) -> datetime:
+    # created_at хранится строкой ISO; без часового пояса считаем его UTC
+    created_at = datetime.fromisoformat(notification.created_at)
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return created_at
+
+@router.get("/", response_model=List[Notification], summary="Получить уведомления")
+async def get_notifications(
+    response: Response,
+    type: Optional[NotificationType] = Query(None, description="Фильтр по типу уведомления"),
+    is_read: Optional[bool] = Query(None, description="Фильтр по состоянию прочтения"),
+    cursor: Optional[str] = Query(None, description="Курсор из заголовка X-Next-Cursor предыдущего ответа"),
+    limit: int = Query(20, ge=1, le=100, description="Количество уведомлений на странице"),
+):
     """
-    Возвращает список всех уведомлений.
+    Возвращает уведомления от новых к старым с курсорной пагинацией.
+    
+    **Параметры:**
+    - type: Фильтр по типу (INFO, WARNING, ERROR, SUCCESS)
+    - is_read: Фильтр по состоянию прочтения
+    - cursor: Значение заголовка `X-Next-Cursor` из предыдущего ответа
+    - limit: Количество уведомлений на странице (1-100)
     
     **Возвращает:**
-    - Список всех уведомлений с полной информацией
+    - Страницу уведомлений; если есть следующая страница, ее курсор
+      передается в заголовке `X-Next-Cursor`
+    
+    **Ошибки:**
+    - 400: Некорректный курсор
     
     **Примеры ответов:**
     - 200: Успешно получен список уведомлений
@@ -75,7 +101,22 @@ async def get_notifications():
     ]
     ```
     """
-    return list(notifications_db.values())
+    items = [
+        (_created_at(n), n.id, n) for n in notifications_db.values()
+        if (type is None or n.type == type) and (is_read is None or n.is_read == is_read)
+    ]
+    if cursor:
+        try:
+            position = decode_cursor(cursor, aware=True)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        items = [item for item in items if (item[0], item[1]) < position]
+    items.sort(key=lambda item: (item[0], item[1]), reverse=True)
+
+    page = items[:limit]
+    if len(items) > limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(page[-1][0], page[-1][1])
+    return [n for _, _, n in page]
 
 @router.get("/{notification_id}", response_model=Notification, summary="Получить уведомление по ID")
 async def get_notification(notification_id: int):
@@ -321,6 +362,80 @@ async def mark_notification_read(notification_id: int):
     notifications_db[notification_id] = notification
     return notification
 
+def _select_for_bulk(action: NotificationBulkAction) -> List[int]:
+    # Отбор ID по тем же правилам, что и в массовых операциях над карточками
+    position = None
+    if action.before:
+        try:
+            position = decode_cursor(action.before, aware=True)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    ids = set(action.ids) if action.ids is not None else None
+    return [
+        n.id for n in notifications_db.values()
+        if (ids is None or n.id in ids) and (position is None or (_created_at(n), n.id) <= position)
+    ]
+
+@router.post("/mark-read", summary="Отметить несколько уведомлений как прочитанные")
+async def bulk_mark_notifications_read(action: NotificationBulkAction):
+    """
+    Отмечает прочитанными несколько уведомлений за один запрос.
+    
+    **Параметры:**
+    - ids: Список ID уведомлений (до 1000)
+    - before: Курсор; отметить уведомление в этой позиции и все более старые
+    
+    Если не переданы ни ids, ни before, отмечаются все уведомления.
+    
+    **Пример ответа:**
+    ```json
+    {
+      "affected": 2,
+      "unread_count": 0
+    }
+    ```
+    """
+    affected = 0
+    for notification_id in _select_for_bulk(action):
+        notification = notifications_db[notification_id]
+        if not notification.is_read:
+            notification.is_read = True
+            affected += 1
+    unread_count = sum(1 for notification in notifications_db.values() if not notification.is_read)
+    return {"affected": affected, "unread_count": unread_count}
+
+@router.post("/bulk-delete", summary="Удалить несколько уведомлений")
+async def bulk_delete_notifications(action: NotificationBulkAction):
+    """
+    Удаляет несколько уведомлений за один запрос.
+    
+    **Параметры:**
+    - ids: Список ID уведомлений (до 1000)
+    - before: Курсор; удалить уведомление в этой позиции и все более старые
+    - all: true - удалить все уведомления
+    
+    Без ids, before и all запрос отклоняется, чтобы пустое тело не удалило все уведомления.
+    
+    **Ошибки:**
+    - 400: Некорректный курсор
+    - 422: Не передан ни один из ids, before, all
+    
+    **Пример ответа:**
+    ```json
+    {
+      "affected": 2,
+      "unread_count": 1
+    }
+    ```
+    """
+    if action.ids is None and not action.before and not action.all:
+        raise HTTPException(status_code=422, detail="Укажите ids, before или all: true")
+    selected = _select_for_bulk(action)
+    for notification_id in selected:
+        del notifications_db[notification_id]
+    unread_count = sum(1 for notification in notifications_db.values() if not notification.is_read)
+    return {"affected": len(selected), "unread_count": unread_count}
+
 @settings_router.get("/{user_id}", response_model=UserNotificationSettingsSchema, summary="Получить настройки уведомлений пользователя", description="Возвращает все настройки уведомлений для указанного пользователя по его user_id. Если пользователь не найден, возвращаются значения по умолчанию.")
 async def get_user_notification_settings(user_id: str, db: Session = Depends(get_db)):
     """
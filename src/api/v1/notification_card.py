@@ -1,56 +1,54 @@
-from fastapi import APIRouter, HTTPException, status
-from typing import List, Dict
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+from typing import Literal, Optional
+from src.db.session import get_db
+from src.db.models.notification import Notification as NotificationModel, NotificationType
 from src.schemas.notification_card import (
     NotificationCard, NotificationCardResponse, NotificationCardListResponse,
-    CompletedNotificationCard, WarningNotificationCard, ErrorNotificationCard
+    CompletedNotificationCard, NotificationCardBulkAction, NotificationCardBulkResult,
+    encode_card_payload, decode_card
 )
+from src.services.notifications import count_unread, mark_read, delete_notifications
+from src.utils.pagination import encode_cursor, decode_cursor
 
 router = APIRouter(prefix="/notification-cards", tags=["NotificationCards"])
 
-# In-memory demo DB
-notifications_db: Dict[int, NotificationCard] = {}
+# Колонки, из которых собирается карточка; остальные колонки строки не загружаются
+CARD_SELECT = (NotificationModel.id, NotificationModel.type, NotificationModel.payload, NotificationModel.new)
 
-# Демо-данные
-notifications_db[38289] = CompletedNotificationCard(
-    type="completed",
-    raffleId=38289,
-    participantsCount=5920,
-    winners=["593IF", "REOOJ", "DOXO"],
-    reasonEnd="Достигнут лимит по числу участников.",
-    new=True
-)
-notifications_db[38941] = CompletedNotificationCard(
-    type="completed",
-    raffleId=38941,
-    participantsCount=4780,
-    winners=["XZ13B", "LK9FD"],
-    reasonEnd="Истекло время проведения розыгрыша.",
-    new=False
-)
-notifications_db[1] = WarningNotificationCard(
-    type="warning",
-    warningTitle="Не удалось подключить виджет",
-    warningDescription=[
-        'Сообщество "Казань 24 – Новости"',
-        'У пользователя недостаточно прав.',
-        'Розыгрыш не запущен.'
-    ],
-    new=True
-)
-notifications_db[2] = ErrorNotificationCard(
-    type="error",
-    errorTitle="Ошибка подключения сообщества",
-    errorDescription="На сервере VK ведутся технические работы. Приносим извинения за доставленные неудобства!",
-    new=False
-)
+def _to_card(row) -> NotificationCard:
+    return decode_card(row.id, row.type.value, row.payload, row.new)
 
-@router.get("/", response_model=NotificationCardListResponse, summary="Получить все NotificationCard")
-async def get_all_notifications():
+@router.get("/", response_model=NotificationCardListResponse, summary="Получить страницу NotificationCard")
+async def get_all_notifications(
+    user_id: Optional[str] = Query(None, description="VK user ID получателя"),
+    type: Optional[Literal["completed", "warning", "error"]] = Query(None, description="Фильтр по типу уведомления"),
+    new: Optional[bool] = Query(None, description="Фильтр по состоянию: true — непрочитанные, false — прочитанные"),
+    cursor: Optional[str] = Query(None, description="Курсор из next_cursor предыдущей страницы"),
+    limit: int = Query(20, ge=1, le=100, description="Количество уведомлений на странице"),
+    db: Session = Depends(get_db)
+):
     """
-    Возвращает список всех уведомлений.
+    Возвращает уведомления от новых к старым с курсорной пагинацией.
+    
+    **Параметры:**
+    - `user_id` - VK user ID получателя
+    - `type` - Фильтр по типу: completed, warning, error
+    - `new` - Фильтр по состоянию прочтения
+    - `cursor` - Значение `next_cursor` из предыдущего ответа
+    - `limit` - Количество уведомлений на странице (1-100)
+    
+    **Примеры запросов:**
+    - `GET /notification-cards/?user_id=123456` - Первая страница уведомлений пользователя
+    - `GET /notification-cards/?user_id=123456&new=true&limit=5` - Последние 5 непрочитанных
+    - `GET /notification-cards/?user_id=123456&cursor=...` - Следующая страница
     
     **Возвращает:**
-    - Список всех уведомлений с их данными
+    - Страницу уведомлений и `next_cursor` (null, если страниц больше нет)
+    
+    **Ошибки:**
+    - 400: Некорректный курсор
     
     **Примеры ответов:**
     - 200: Успешно получен список уведомлений
@@ -61,6 +59,7 @@ async def get_all_notifications():
     {
       "notifications": [
         {
+          "id": 38289,
           "type": "completed",
           "raffleId": 38289,
           "participantsCount": 5920,
@@ -69,6 +68,7 @@ async def get_all_notifications():
           "new": true
         },
         {
+          "id": 1,
           "type": "warning",
           "warningTitle": "Не удалось подключить виджет",
           "warningDescription": [
@@ -78,14 +78,131 @@ async def get_all_notifications():
           ],
           "new": true
         }
-      ]
+      ],
+      "next_cursor": "MjAyNS0wMS0xOFQxMDozMDowMHwx"
+    }
+    ```
+    """
+    query = db.query(*CARD_SELECT, NotificationModel.created_at)
+    if user_id:
+        query = query.filter(NotificationModel.user_id == user_id)
+    if type:
+        query = query.filter(NotificationModel.type == NotificationType(type))
+    if new is not None:
+        query = query.filter(NotificationModel.new == new)
+    if cursor:
+        try:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        query = query.filter(
+            tuple_(NotificationModel.created_at, NotificationModel.id) < tuple_(cursor_created_at, cursor_id)
+        )
+
+    # Берем на одну запись больше, чтобы понять, есть ли следующая страница
+    rows = query.order_by(NotificationModel.created_at.desc(), NotificationModel.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return {"notifications": [_to_card(row) for row in rows], "next_cursor": next_cursor}
+
+@router.get("/unread/count", summary="Получить количество непрочитанных NotificationCard")
+async def get_unread_count(
+    user_id: str = Query(..., description="VK user ID получателя"),
+    db: Session = Depends(get_db)
+):
+    """
+    Возвращает количество непрочитанных уведомлений пользователя.
+    
+    **Пример ответа:**
+    ```json
+    {
+      "unread_count": 2
+    }
+    ```
+    """
+    return {"unread_count": count_unread(db, user_id)}
+
+def _unread_after(db: Session, action: NotificationCardBulkAction) -> int:
+    # Операция над всей лентой не оставляет непрочитанных - пересчитывать нечего
+    if action.ids is None and not action.before:
+        return 0
+    return count_unread(db, action.user_id)
+
+@router.post("/mark-read", response_model=NotificationCardBulkResult, summary="Отметить NotificationCard прочитанными")
+async def bulk_mark_read(action: NotificationCardBulkAction, db: Session = Depends(get_db)):
+    """
+    Отмечает прочитанными несколько уведомлений пользователя одним запросом.
+    
+    **Параметры:**
+    - `user_id` - VK user ID получателя
+    - `ids` - Список ID уведомлений (до 1000)
+    - `before` - Курсор: отметить уведомление в этой позиции и все более старые
+    
+    Если не переданы ни `ids`, ни `before`, отмечаются все уведомления пользователя.
+    
+    **Ошибки:**
+    - 400: Некорректный курсор
+    
+    **Пример запроса:**
+    ```json
+    {
+      "user_id": "123456",
+      "ids": [38289, 1]
+    }
+    ```
+    
+    **Пример ответа:**
+    ```json
+    {
+      "affected": 2,
+      "unread_count": 0
+    }
+    ```
+    """
+    try:
+        affected = mark_read(db, action.user_id, action.ids, action.before)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"affected": affected, "unread_count": _unread_after(db, action)}
+
+@router.post("/bulk-delete", response_model=NotificationCardBulkResult, summary="Удалить несколько NotificationCard")
+async def bulk_delete(action: NotificationCardBulkAction, db: Session = Depends(get_db)):
+    """
+    Удаляет несколько уведомлений пользователя одним запросом.
+    
+    **Параметры:**
+    - `user_id` - VK user ID получателя
+    - `ids` - Список ID уведомлений (до 1000)
+    - `before` - Курсор: удалить уведомление в этой позиции и все более старые
+    - `all` - `true`: удалить все уведомления пользователя
+    
+    Без `ids`, `before` и `all` запрос отклоняется, чтобы тело с одним `user_id`
+    не удалило всю ленту.
+    
+    **Ошибки:**
+    - 400: Некорректный курсор
+    - 422: Не передан ни один из `ids`, `before`, `all`
+    
+    **Пример ответа:**
+    ```json
+    {
+      "affected": 2,
+      "unread_count": 1
     }
     ```
     """
-    return {"notifications": list(notifications_db.values())}
+    if action.ids is None and not action.before and not action.all:
+        raise HTTPException(status_code=422, detail="Укажите ids, before или all: true")
+    try:
+        affected = delete_notifications(db, action.user_id, action.ids, action.before)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"affected": affected, "unread_count": _unread_after(db, action)}
 
 @router.get("/{notification_id}", response_model=NotificationCardResponse, summary="Получить NotificationCard по ID")
-async def get_notification(notification_id: int):
+async def get_notification(notification_id: int, db: Session = Depends(get_db)):
     """
     Возвращает уведомление по указанному ID.
     
@@ -141,24 +258,29 @@ async def get_notification(notification_id: int):
     }
     ```
     """
-    notification = notifications_db.get(notification_id)
+    notification = db.query(*CARD_SELECT).filter(NotificationModel.id == notification_id).first()
     if not notification:
         raise HTTPException(status_code=404, detail="Уведомление не найдено")
-    return {"notification": notification}
+    return {"notification": _to_card(notification)}
 
 @router.post("/", response_model=NotificationCardResponse, status_code=status.HTTP_201_CREATED, summary="Создать NotificationCard")
-async def create_notification(notification: NotificationCard):
+async def create_notification(
+    notification: NotificationCard,
+    user_id: Optional[str] = Query(None, description="VK user ID получателя"),
+    db: Session = Depends(get_db)
+):
     """
     Создает новое уведомление.
     
     **Параметры:**
     - notification: Данные для создания уведомления (обязательно все поля)
+    - user_id: VK user ID получателя
     
     **Возвращает:**
     - Созданное уведомление
     
     **Ошибки:**
-    - 400: Уведомление с таким raffleId уже существует
+    - 400: Уведомление с таким raffleId у этого получателя уже существует
     - 422: Ошибка валидации данных
     - 500: Ошибка сервера при создании
     
@@ -201,6 +323,7 @@ async def create_notification(notification: NotificationCard):
     ```json
     {
       "notification": {
+        "id": 38942,
         "type": "completed",
         "raffleId": 50000,
         "participantsCount": 3000,
@@ -211,14 +334,26 @@ async def create_notification(notification: NotificationCard):
     }
     ```
     """
-    if hasattr(notification, "raffleId") and notification.raffleId in notifications_db:
-        raise HTTPException(status_code=400, detail="Уведомление с таким raffleId уже существует")
-    new_id = notification.raffleId if hasattr(notification, "raffleId") else max(notifications_db.keys(), default=100) + 1
-    notifications_db[new_id] = notification
-    return {"notification": notification}
+    if isinstance(notification, CompletedNotificationCard):
+        existing = db.query(NotificationModel.id).filter(
+            NotificationModel.payload["raffleId"].as_string() == str(notification.raffleId),
+            NotificationModel.user_id == user_id
+        ).first()
+        if existing:
+            raise HTTPException(status_code=400, detail="Уведомление с таким raffleId уже существует")
+    db_notification = NotificationModel(
+        type=NotificationType(notification.type),
+        user_id=user_id,
+        payload=encode_card_payload(notification),
+        new=notification.new
+    )
+    db.add(db_notification)
+    db.commit()
+    db.refresh(db_notification)
+    return {"notification": _to_card(db_notification)}
 
 @router.put("/{notification_id}", response_model=NotificationCardResponse, summary="Обновить NotificationCard по ID")
-async def update_notification(notification_id: int, notification: NotificationCard):
+async def update_notification(notification_id: int, notification: NotificationCard, db: Session = Depends(get_db)):
     """
     Обновляет уведомление по ID.
     
@@ -250,6 +385,7 @@ async def update_notification(notification_id: int, notification: NotificationCa
     ```json
     {
       "notification": {
+        "id": 38289,
         "type": "completed",
         "raffleId": 38289,
         "participantsCount": 6000,
@@ -260,13 +396,18 @@ async def update_notification(notification_id: int, notification: NotificationCa
     }
     ```
     """
-    if notification_id not in notifications_db:
+    db_notification = db.query(NotificationModel).filter(NotificationModel.id == notification_id).first()
+    if not db_notification:
         raise HTTPException(status_code=404, detail="Уведомление не найдено")
-    notifications_db[notification_id] = notification
-    return {"notification": notification}
+    db_notification.type = NotificationType(notification.type)
+    db_notification.payload = encode_card_payload(notification)
+    db_notification.new = notification.new
+    db.commit()
+    db.refresh(db_notification)
+    return {"notification": _to_card(db_notification)}
 
 @router.delete("/{notification_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Удалить NotificationCard по ID")
-async def delete_notification(notification_id: int):
+async def delete_notification(notification_id: int, db: Session = Depends(get_db)):
     """
     Удаляет уведомление по ID.
     
@@ -290,7 +431,8 @@ async def delete_notification(notification_id: int):
     HTTP/1.1 204 No Content
     ```
     """
-    if notification_id not in notifications_db:
+    deleted = db.query(NotificationModel).filter(NotificationModel.id == notification_id).delete()
+    if not deleted:
         raise HTTPException(status_code=404, detail="Уведомление не найдено")
-    del notifications_db[notification_id]
+    db.commit()
     return None 
\ No newline at end of file
@@ -1,6 +1,8 @@
 # Эндпоинты для работы с розыгрышами
 
-from fastapi import APIRouter, HTTPException, status, Depends, Query, UploadFile, File
+from fastapi import APIRouter, BackgroundTasks, HTTPException, status, Depends, Query, Request, UploadFile, File
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import uuid
@@ -9,14 +11,35 @@ import enum
 import shutil
 import os
 
-from src.db.session import get_db
-from src.db.models.raffle import Raffle, RaffleStatus
+from src.core.tracing import continue_trace, current_traceparent, set_span_attribute, tracer
+from src.db.session import SessionLocal, get_db
+from src.db.models.raffle import Raffle, RaffleParticipant, RaffleStatus
 from src.schemas.raffle import (
     RaffleCreate, 
     RaffleUpdate, 
     RaffleResponse, 
-    RaffleListResponse
+    RaffleListResponse,
+    RaffleDrawResponse,
+    RaffleDrawVerification,
+    RaffleEntryRequest,
+    RaffleEntryResponse
 )
+from src.services.admission import get_admission_controller
+from src.services.archive import find_raffle, participant_entries, participant_records
+from src.services.blacklist import clear_raffle_blacklist, sync_raffle_blacklist
+from src.services.draw import FAIR_DRAW_ALGORITHM, commit_seed, replay_draw, seed_commitment, stream_participants
+from src.services.participant_counter import clear_counter, configure_counter
+from src.services.raffle_partitions import lifetime_exceeded, live_created_after
+from src.services.participation import (
+    ENTRY_BLACKLISTED,
+    ENTRY_CLOSED,
+    ENTRY_DUPLICATE,
+    ENTRY_FULL,
+    ENTRY_NOT_FOUND,
+    ENTRY_REJECTED,
+    enter_raffle,
+)
+from src.services.raffle_lifecycle import REASON_MANUAL, complete_raffle, complete_raffle_at_limit
 
 router = APIRouter(prefix="/raffles", tags=["Raffles"])
 # Новый роутер-алиас для raffle-cards
@@ -25,6 +48,10 @@ raffle_cards_router = APIRouter(prefix="/raffle-cards", tags=["RaffleCards"])
 UPLOAD_DIR = "uploaded_photos"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# Статусы, которые бывают только у розыгрышей моложе предельного срока жизни
+LIVE_STATUSES = (RaffleStatus.ACTIVE, RaffleStatus.COMPLETING)
+LIFETIME_ERROR = "Розыгрыш не может длиться дольше RAFFLE_MAX_LIFETIME_DAYS с момента создания"
+
 @router.post("/", response_model=RaffleResponse, status_code=status.HTTP_201_CREATED, 
              summary="Создать новый розыгрыш",
              description="Создает новый розыгрыш с указанными параметрами")
@@ -68,8 +95,13 @@ async def create_raffle(
     }
     ```
     """
+    created_at = datetime.utcnow()
+    if lifetime_exceeded(created_at, raffle.end_date):
+        raise HTTPException(status_code=400, detail=LIFETIME_ERROR)
+
     # Генерируем уникальный ID
     raffle_id = str(uuid.uuid4())
+    set_span_attribute("raffle.id", raffle_id)
     
     # Создаем объект розыгрыша
     db_raffle = Raffle(
@@ -89,15 +121,20 @@ async def create_raffle(
         start_date=raffle.start_date,
         end_date=raffle.end_date,
         max_participants=raffle.max_participants,
+        bonus_entries=raffle.bonus_entries,
         publish_results=raffle.publish_results,
         hide_participants_count=raffle.hide_participants_count,
         exclude_me=raffle.exclude_me,
         exclude_admins=raffle.exclude_admins,
-        status=RaffleStatus.DRAFT
+        status=RaffleStatus.DRAFT,
+        created_at=created_at,
+        # Спан создания - корень трейса розыгрыша: его продолжают активация, завершение и архивация
+        trace_context=current_traceparent()
     )
     
     db.add(db_raffle)
     db.commit()
+    sync_raffle_blacklist(db, db_raffle)
     db.refresh(db_raffle)
 
     raffle_dict = db_raffle.__dict__.copy()
@@ -135,6 +172,9 @@ async def get_raffles(
     
     if status:
         query = query.filter(Raffle.status == status)
+        if status in LIVE_STATUSES:
+            # Активные и завершающиеся розыгрыши - только в свежих секциях raffles
+            query = query.filter(Raffle.created_at >= live_created_after())
     if community_id:
         query = query.filter(Raffle.community_id == community_id)
     if vk_user_id:
@@ -213,10 +253,12 @@ async def get_raffle(
     **Параметры:**
     - `raffle_id` - Уникальный идентификатор розыгрыша
     
+    Розыгрыши, перенесенные в архив, читаются из него.
+
     **Ошибки:**
     - `404` - Розыгрыш не найден
     """
-    raffle = db.query(Raffle).filter(Raffle.id == raffle_id).first()
+    raffle = find_raffle(db, raffle_id)
     if not raffle:
         raise HTTPException(status_code=404, detail="Розыгрыш не найден")
     
@@ -247,11 +289,19 @@ async def update_raffle(
     
     # Обновляем только переданные поля
     update_data = raffle_update.dict(exclude_unset=True)
+    if update_data.get("end_date") and lifetime_exceeded(db_raffle.created_at, update_data["end_date"]):
+        raise HTTPException(status_code=400, detail=LIFETIME_ERROR)
+    previous_blacklist = list(db_raffle.blacklist_participants or ())
     for field, value in update_data.items():
         setattr(db_raffle, field, value)
     
     db_raffle.updated_at = datetime.utcnow()
     db.commit()
+    if "blacklist_participants" in update_data:
+        sync_raffle_blacklist(db, db_raffle, previous_blacklist)
+    if "max_participants" in update_data and db_raffle.status == RaffleStatus.ACTIVE:
+        configure_counter(db, db_raffle)
+        get_admission_controller().reopen(db_raffle.id)
     db.refresh(db_raffle)
     
     return RaffleResponse.from_orm(db_raffle)
@@ -276,6 +326,14 @@ async def delete_raffle(
     if not db_raffle:
         raise HTTPException(status_code=404, detail="Розыгрыш не найден")
     
+    # Участники, части счетчика и черный список удаляются в той же транзакции, как при архивации
+    db.execute(
+        delete(RaffleParticipant)
+        .where(RaffleParticipant.raffle_id == raffle_id)
+        .execution_options(synchronize_session=False)
+    )
+    clear_raffle_blacklist(db, raffle_id)
+    clear_counter(db, raffle_id)
     db.delete(db_raffle)
     db.commit()
     
@@ -299,6 +357,9 @@ async def change_raffle_status(
     **Ошибки:**
     - `404` - Розыгрыш не найден
     - `400` - Недопустимое изменение статуса
+
+    Статус `completed` завершает активный розыгрыш так же, как планировщик:
+    выбор победителей, итоги и уведомления участникам.
     """
     db_raffle = db.query(Raffle).filter(Raffle.id == raffle_id).first()
     if not db_raffle:
@@ -307,14 +368,193 @@ async def change_raffle_status(
     # Проверяем допустимость изменения статуса
     if db_raffle.status == RaffleStatus.COMPLETED and status != RaffleStatus.COMPLETED:
         raise HTTPException(status_code=400, detail="Нельзя изменить статус завершенного розыгрыша")
+    if RaffleStatus.COMPLETING in (db_raffle.status, status):
+        raise HTTPException(status_code=400, detail="Статус completing устанавливается только при завершении розыгрыша")
+    if status == RaffleStatus.COMPLETED:
+        return _complete_manually(db, db_raffle)
     
-    db_raffle.status = status
-    db_raffle.updated_at = datetime.utcnow()
-    db.commit()
+    with continue_trace(f"raffle.status.{status.value}", db_raffle.trace_context, {"raffle.id": db_raffle.id}):
+        if status == RaffleStatus.ACTIVE:
+            commit_seed(db_raffle)
+        db_raffle.status = status
+        db_raffle.updated_at = datetime.utcnow()
+        db.commit()
+        if status == RaffleStatus.ACTIVE:
+            configure_counter(db, db_raffle)
+            get_admission_controller().reopen(db_raffle.id)
     db.refresh(db_raffle)
     
     return RaffleResponse.from_orm(db_raffle)
 
+def _complete_manually(db: Session, db_raffle: Raffle) -> RaffleResponse:
+    # Без розыгрыша победителей статус completed не ставится: только через complete_raffle
+    if db_raffle.status == RaffleStatus.COMPLETED:
+        return RaffleResponse.from_orm(db_raffle)
+    if db_raffle.status != RaffleStatus.ACTIVE:
+        raise HTTPException(status_code=400, detail="Завершить можно только активный розыгрыш")
+    # None - розыгрыш уже завершает планировщик или другой запрос; итог будет тот же
+    complete_raffle(db, db_raffle, REASON_MANUAL)
+    db.expire_all()
+    db_raffle = db.query(Raffle).filter(Raffle.id == db_raffle.id).one()
+    return RaffleResponse.from_orm(db_raffle)
+
+def _get_fair_raffle(db: Session, raffle_id: str) -> Raffle:
+    # Розыгрыш, завершенный в проверяемом режиме: seed раскрыт, победители сохранены
+    raffle = find_raffle(db, raffle_id)
+    if not raffle:
+        raise HTTPException(status_code=404, detail="Розыгрыш не найден")
+    if raffle.draw_seed is None:
+        raise HTTPException(status_code=400, detail="Розыгрыш проведен без проверяемого seed")
+    if raffle.status != RaffleStatus.COMPLETED or raffle.winners is None:
+        raise HTTPException(status_code=400, detail="Розыгрыш еще не завершен")
+    return raffle
+
+@router.get("/{raffle_id}/draw", response_model=RaffleDrawResponse,
+            summary="Данные проверяемого розыгрыша",
+            description="Возвращает хеш seed, а после завершения - сам seed и победителей")
+async def get_raffle_draw(
+    raffle_id: str,
+    db: Session = Depends(get_db)
+):
+    """
+    Данные для проверки итогов (commit-reveal).
+
+    При активации сервер публикует `seed_hash` = SHA-256 от секретного seed; после
+    завершения раскрываются `seed` и `winners`. Победители - первые `winners_count`
+    участников в порядке ключей (-log1p(-u) / weight, digest, user_id), где
+    digest = HMAC-SHA256(ключ = bytes.fromhex(seed), сообщение = user_id), а u - старшие
+    53 бита digest, деленные на 2^53. Проверить итоги можно самостоятельно по списку
+    `/{raffle_id}/draw/participants` или через `/{raffle_id}/draw/verify`.
+
+    **Ошибки:**
+    - `404` - Розыгрыш не найден
+    """
+    raffle = find_raffle(db, raffle_id)
+    if not raffle:
+        raise HTTPException(status_code=404, detail="Розыгрыш не найден")
+    revealed = raffle.status == RaffleStatus.COMPLETED and raffle.winners is not None
+    return RaffleDrawResponse(
+        raffle_id=raffle.id,
+        algorithm=FAIR_DRAW_ALGORITHM if raffle.draw_seed_hash else None,
+        seed_hash=raffle.draw_seed_hash,
+        seed=raffle.draw_seed if revealed else None,
+        winners_count=raffle.winners_count,
+        winners=raffle.winners if revealed else None,
+    )
+
+# Обычные def: потоковый проход по участникам большого розыгрыша идет в пуле потоков,
+# не блокируя цикл событий
+@router.get("/{raffle_id}/draw/verify", response_model=RaffleDrawVerification,
+            summary="Проверить итоги розыгрыша",
+            description="Повторяет выбор победителей по раскрытому seed и сравнивает с сохраненными")
+def verify_raffle_draw(
+    raffle_id: str,
+    db: Session = Depends(get_db)
+):
+    """
+    Повторяет выбор победителей по раскрытому seed.
+
+    Участники читаются из БД потоком, в памяти держатся только текущие лучшие
+    `winners_count`, поэтому проверка работает и для очень больших розыгрышей.
+
+    **Ошибки:**
+    - `404` - Розыгрыш не найден
+    - `400` - Розыгрыш не завершен или проведен без проверяемого seed
+    """
+    raffle = _get_fair_raffle(db, raffle_id)
+    recomputed, participants_count = replay_draw(db, raffle, participant_entries(db, raffle))
+    seed_matches_hash = seed_commitment(raffle.draw_seed) == raffle.draw_seed_hash
+    return RaffleDrawVerification(
+        raffle_id=raffle.id,
+        valid=seed_matches_hash and recomputed == raffle.winners,
+        seed_matches_hash=seed_matches_hash,
+        participants_count=participants_count,
+        winners=raffle.winners,
+        recomputed_winners=recomputed,
+    )
+
+@router.get("/{raffle_id}/draw/participants",
+            summary="Выгрузить участников для проверки",
+            description="Потоковая выгрузка участников завершенного розыгрыша: VK user ID, число записей и причина исключения через табуляцию")
+def export_raffle_draw_participants(
+    raffle_id: str,
+    db: Session = Depends(get_db)
+):
+    """
+    Участники завершенного проверяемого розыгрыша, по одному в строке:
+    `user_id<TAB>weight<TAB>excluded_reason`.
+
+    `weight` - число записей в выборе победителей (0 у исключенных), `excluded_reason` -
+    условие, по которому участник исключен (пусто, если не исключен).
+    Порядок строк не важен: выбор победителей от него не зависит.
+
+    **Ошибки:**
+    - `404` - Розыгрыш не найден
+    - `400` - Розыгрыш не завершен или проведен без проверяемого seed
+    """
+    raffle = _get_fair_raffle(db, raffle_id)
+
+    # Сессия зависимости закрывается до отправки тела ответа, поэтому у потока своя
+    def lines():
+        stream_db = SessionLocal()
+        try:
+            for user_id, weight, excluded_reason in participant_records(stream_db, raffle):
+                yield f"{user_id}\t{weight}\t{excluded_reason or ''}\n"
+        finally:
+            stream_db.close()
+
+    return StreamingResponse(lines(), media_type="text/plain; charset=utf-8")
+
+_ENTRY_ERRORS = {
+    ENTRY_NOT_FOUND: (404, "Розыгрыш не найден"),
+    ENTRY_CLOSED: (400, "Розыгрыш не принимает заявки"),
+    ENTRY_BLACKLISTED: (403, "Участник в черном списке"),
+    ENTRY_DUPLICATE: (409, "Участник уже зарегистрирован"),
+    ENTRY_FULL: (409, "Достигнут лимит участников"),
+    ENTRY_REJECTED: (429, "Слишком много заявок, попробуйте позже"),
+}
+
+@router.post("/{raffle_id}/participants", response_model=RaffleEntryResponse, status_code=status.HTTP_201_CREATED,
+             summary="Принять участие в розыгрыше",
+             description="Регистрирует участника активного розыгрыша")
+def enter_raffle_participant(
+    raffle_id: str,
+    entry: RaffleEntryRequest,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
+    """
+    Регистрирует участника активного розыгрыша.
+
+    Заявка проверяется на частоту (по пользователю и по IP) и на массовые
+    заявки от похожих аккаунтов. Подозрительные заявки принимаются
+    со статусом `flagged`, явные всплески отклоняются.
+
+    Заявка, занявшая последнее место (`max_participants`), запускает завершение
+    розыгрыша после отправки ответа.
+
+    **Ошибки:**
+    - `404` - Розыгрыш не найден
+    - `400` - Розыгрыш не активен
+    - `403` - Участник в черном списке
+    - `409` - Участник уже зарегистрирован или достигнут лимит участников
+    - `429` - Заявка отклонена проверкой частоты
+    """
+    result = enter_raffle(db, raffle_id, entry.user_id, request.client.host if request.client else None)
+    if not result.admitted:
+        status_code, detail = _ENTRY_ERRORS[result.status]
+        raise HTTPException(status_code=status_code, detail=detail)
+    if result.limit_reached:
+        background_tasks.add_task(complete_raffle_at_limit, raffle_id)
+    return RaffleEntryResponse(
+        raffle_id=raffle_id,
+        user_id=entry.user_id,
+        status=result.status,
+        weight=result.weight,
+        flags=list(result.reasons),
+    )
+
 # Дублируем основные эндпоинты для raffle-cards
 @raffle_cards_router.post("/", response_model=RaffleResponse, status_code=status.HTTP_201_CREATED, summary="Создать новый розыгрыш (алиас)")
 async def create_raffle_card(
@@ -352,6 +592,9 @@ async def update_raffle_card(
 @raffle_cards_router.post("/upload-photo/", summary="Загрузить фото для розыгрыша")
 async def upload_raffle_photo(file: UploadFile = File(...)):
     file_location = os.path.join(UPLOAD_DIR, file.filename)
-    with open(file_location, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    with tracer.start_as_current_span("raffle.photo_upload", attributes={"file.content_type": file.content_type or ""}) as span:
+        with open(file_location, "wb") as buffer:
+            shutil.copyfileobj(file.file, buffer)
+            if span:
+                span.set_attribute("file.size", buffer.tell())
     return {"url": f"/photos/{file.filename}"}
@@ -95,8 +95,9 @@ demo_raffles = [
 ]
 
 # Инициализация демо-данных
-for raffle_data in demo_raffles:
-    raffles_db[raffle_data["id"]] = RaffleResponse(**raffle_data)
+def seed_demo_data() -> None:
+    for raffle_data in demo_raffles:
+        raffles_db[raffle_data["id"]] = RaffleResponse(**raffle_data)
 
 @router.post("/", response_model=RaffleResponse, status_code=status.HTTP_201_CREATED, 
              summary="Создать новый розыгрыш",
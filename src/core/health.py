@@ -0,0 +1,110 @@
+# Проверки готовности сервиса (readiness)
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+
+from src.core.config import settings
+
+
+def utc_now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+
+
+class ReadinessProbe:
+    """
+    Проверяет базу данных, заполненность пула соединений и отставание планировщика.
+
+    Результат кешируется на cache_seconds, а одновременные пробы ждут одну
+    проверку, поэтому частые запросы балансировщика не добавляют нагрузки на БД.
+    """
+
+    def __init__(self, engine: Engine, scheduler=None, cache_seconds: float = 2.0, db_timeout: float = 1.0,
+                 pool_capacity: Optional[int] = None, max_scheduler_lag: float = 60.0):
+        self.engine = engine
+        self.scheduler = scheduler
+        self.cache_seconds = cache_seconds
+        self.db_timeout = db_timeout
+        self.pool_capacity = pool_capacity
+        self.max_scheduler_lag = max_scheduler_lag
+        self._cached: Optional[Tuple[float, bool, Dict[str, Any]]] = None
+        self._lock = asyncio.Lock()
+
+    def _ping(self) -> None:
+        # wait_for только перестает ждать поток пинга; чтобы зависший пинг не держал
+        # соединение из пула дольше db_timeout, запрос ограничивает и сама БД
+        with self.engine.connect() as connection:
+            if connection.dialect.name == "postgresql":
+                connection.execute(text(f"SET LOCAL statement_timeout = {max(1, int(self.db_timeout * 1000))}"))
+            connection.execute(text("SELECT 1"))
+
+    async def _check_database(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(run_in_threadpool(self._ping), timeout=self.db_timeout)
+        except asyncio.TimeoutError:
+            return {"ok": False, "error": f"нет ответа за {self.db_timeout} с"}
+        except Exception as e:
+            return {"ok": False, "error": type(e).__name__}
+        return {"ok": True, "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+
+    def _check_pool(self) -> Dict[str, Any]:
+        checked_out = getattr(self.engine.pool, "checkedout", lambda: 0)()
+        result: Dict[str, Any] = {"ok": True, "checked_out": checked_out}
+        if self.pool_capacity:
+            result["capacity"] = self.pool_capacity
+            result["ok"] = checked_out < self.pool_capacity
+        return result
+
+    def _check_scheduler(self) -> Dict[str, Any]:
+        if self.scheduler is None:
+            return {"ok": True, "enabled": False}
+        lag = self.scheduler.lag()
+        return {
+            "ok": self.scheduler.running and lag <= self.max_scheduler_lag,
+            "enabled": True,
+            "running": self.scheduler.running,
+            "lag_seconds": round(lag, 3),
+        }
+
+    async def _run_checks(self) -> Tuple[bool, Dict[str, Any]]:
+        # Пул проверяется до пинга: пинг сам занимает соединение. При занятом пуле
+        # пинг не запускается - он ждал бы освобождения соединения до pool_timeout
+        pool = self._check_pool()
+        database = await self._check_database() if pool["ok"] else {"ok": False, "error": "нет свободных соединений"}
+        checks = {
+            "pool": pool,
+            "database": database,
+            "scheduler": self._check_scheduler(),
+        }
+        ready = all(check["ok"] for check in checks.values())
+        return ready, {"status": "ready" if ready else "not_ready", "timestamp": utc_now_iso(), "checks": checks}
+
+    async def check(self) -> Tuple[bool, Dict[str, Any]]:
+        """Возвращает (готов ли сервис, подробности проверок) — из кеша, если он свежий"""
+        now = time.monotonic()
+        if self._cached and self._cached[0] > now:
+            return self._cached[1], self._cached[2]
+        async with self._lock:
+            now = time.monotonic()
+            if self._cached and self._cached[0] > now:
+                return self._cached[1], self._cached[2]
+            ready, body = await self._run_checks()
+            self._cached = (time.monotonic() + self.cache_seconds, ready, body)
+            return ready, body
+
+
+def create_readiness_probe(engine: Engine, scheduler=None) -> ReadinessProbe:
+    return ReadinessProbe(
+        engine,
+        scheduler=scheduler,
+        cache_seconds=settings.HEALTH_CACHE_SECONDS,
+        db_timeout=settings.HEALTH_DB_TIMEOUT_SECONDS,
+        pool_capacity=settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW,
+        max_scheduler_lag=settings.SCHEDULER_MAX_LAG_SECONDS,
+    )
@@ -1,28 +1,161 @@
 # Настройка логирования
 
+import atexit
+import json
 import logging
+import queue
+import random
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
 from typing import Optional
 
-def setup_logging(level: Optional[str] = None) -> None:
+from src.core.config import settings
+from src.core.request_context import current_request_id, current_route
+from src.core.tracing import current_trace_id
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s'
+
+# Стандартные атрибуты LogRecord; все остальное пришло через extra и попадает в JSON как есть
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id", "route", "trace_id"}
+
+_listener: Optional[QueueListener] = None
+
+
+class RequestContextFilter(logging.Filter):
+    """Добавляет в запись ID и маршрут текущего HTTP-запроса и ID трейса"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = current_request_id() or "-"
+        record.route = current_route()
+        record.trace_id = current_trace_id()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Пропускает только долю записей уровня INFO и ниже.
+
+    Предупреждения и ошибки не отбрасываются никогда.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.rate >= 1:
+            return True
+        return random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна запись - одна строка JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+            "route": getattr(record, "route", None),
+        }
+        if getattr(record, "trace_id", None):
+            entry["trace_id"] = record.trace_id
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _ContextQueueHandler(QueueHandler):
+    # Стандартный prepare склеивает сообщение с трейсбеком через форматтер обработчика;
+    # здесь сообщение и трейсбек сохраняются отдельно, форматирует уже слушатель
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def shutdown_logging() -> None:
+    """
+    Дописывает записи из очереди и останавливает фоновый поток логирования.
+
+    Дальнейшие записи (например, последние сообщения uvicorn) пишутся напрямую.
+    """
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, _ContextQueueHandler):
+            for output in _listener.handlers:
+                for log_filter in handler.filters:
+                    output.addFilter(log_filter)
+                root.addHandler(output)
+            root.removeHandler(handler)
+    _listener = None
+
+
+def setup_logging(level: Optional[str] = None, log_format: Optional[str] = None) -> None:
     """
     Настройка логирования для приложения.
-    
+
+    Записи попадают в очередь и пишутся в stdout отдельным потоком (QueueListener),
+    поэтому вывод логов не задерживает обработку запросов.
+
     Args:
-        level: Уровень логирования (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+        level: Уровень логирования (DEBUG, INFO, WARNING, ERROR, CRITICAL), по умолчанию LOG_LEVEL
+        log_format: "text" или "json", по умолчанию LOG_FORMAT
     """
-    if level is None:
-        level = "INFO"
-    
-    # Настройка базового логирования
-    logging.basicConfig(
-        level=getattr(logging, level.upper()),
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    
+    level = (level or settings.LOG_LEVEL).upper()
+    log_format = (log_format or settings.LOG_FORMAT).lower()
+
+    output = logging.StreamHandler()
+    if log_format == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter(TEXT_FORMAT, datefmt='%Y-%m-%d %H:%M:%S'))
+
+    root = logging.getLogger()
+    root.setLevel(getattr(logging, level))
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    shutdown_logging()
+    if settings.LOG_QUEUE_ENABLED:
+        global _listener
+        handler: logging.Handler = _ContextQueueHandler(queue.SimpleQueue())
+        _listener = QueueListener(handler.queue, output)
+        _listener.start()
+    else:
+        handler = output
+    # Фильтры работают в потоке запроса, где доступны contextvars
+    handler.addFilter(SamplingFilter(settings.LOG_INFO_SAMPLE_RATE))
+    handler.addFilter(RequestContextFilter())
+    root.addHandler(handler)
+
+    # Логи uvicorn идут через тот же обработчик: единый формат, очередь и сэмплирование
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers.clear()
+        uvicorn_logger.propagate = True
+
     # Настройка логгеров для внешних библиотек
     logging.getLogger("uvicorn").setLevel(logging.INFO)
     logging.getLogger("sqlalchemy").setLevel(logging.WARNING)
-    
+
     logger = logging.getLogger(__name__)
-    logger.info(f"Логирование настроено с уровнем: {level}")
+    logger.info(f"Логирование настроено с уровнем: {level}, формат: {log_format}")
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,94 @@
+# Метрики в формате Prometheus
+
+import os
+import time
+
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, disable_created_metrics, generate_latest
+from prometheus_client import multiprocess
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.request_context import current_db_stats, route_template
+
+# Формат экспозиции, который отдает generate_latest
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Каталог общих файлов метрик воркеров; задает src.server при нескольких воркерах
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Ряды *_created не нужны ни дашбордам, ни алертам и удваивают объем экспозиции
+disable_created_metrics()
+
+
+def render() -> bytes:
+    """
+    Текстовая экспозиция всех метрик.
+
+    При нескольких воркерах каждый пишет значения в файлы каталога
+    PROMETHEUS_MULTIPROC_DIR, и /metrics любого воркера отдает их сумму.
+    """
+    if os.environ.get(MULTIPROC_DIR_ENV):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def mark_process_dead() -> None:
+    """Убирает значения livesum-метрик завершающегося воркера из общей суммы"""
+    if os.environ.get(MULTIPROC_DIR_ENV):
+        multiprocess.mark_process_dead(os.getpid())
+
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "Количество HTTP-запросов", ("method", "route", "status"))
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Длительность обработки HTTP-запроса", ("method", "route"))
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP-запросы в обработке", ("method", "route"), multiprocess_mode="livesum")
+DB_QUERIES = Counter(
+    "db_queries_total", "Количество SQL-запросов", ("route",))
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds", "Длительность SQL-запроса", ("route",))
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request", "Количество SQL-запросов на один HTTP-запрос", ("route",),
+    buckets=QUERY_COUNT_BUCKETS)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_time_per_request_seconds", "Суммарное время SQL-запросов за один HTTP-запрос", ("route",))
+
+
+class MetricsMiddleware:
+    """ASGI-middleware: счетчики, гистограммы длительности и запросы в обработке по шаблону маршрута"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        # SQL-статистику запроса заводит внешний RequestContextMiddleware
+        stats = current_db_stats()
+        route = stats.route if stats else route_template(scope)
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method, route)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUEST_DURATION.labels(method, route).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+            if stats:
+                DB_QUERIES_PER_REQUEST.labels(route).observe(stats.queries)
+                DB_TIME_PER_REQUEST.labels(route).observe(stats.duration)
+            in_progress.dec()
@@ -0,0 +1,80 @@
+# OpenAPI-схема: сборка при первом обращении или загрузка заранее собранного файла
+
+import argparse
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from fastapi import FastAPI
+from fastapi.openapi.utils import get_openapi
+
+logger = logging.getLogger(__name__)
+
+
+def build_openapi(app: FastAPI) -> Dict[str, Any]:
+    return get_openapi(
+        title=app.title,
+        version=app.version,
+        openapi_version=app.openapi_version,
+        summary=app.summary,
+        description=app.description,
+        terms_of_service=app.terms_of_service,
+        contact=app.contact,
+        license_info=app.license_info,
+        routes=app.routes,
+        webhooks=app.webhooks.routes,
+        tags=app.openapi_tags,
+        servers=app.servers,
+        separate_input_output_schemas=app.separate_input_output_schemas,
+    )
+
+
+def _load_prebuilt(app: FastAPI, schema_path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(schema_path, encoding="utf-8") as f:
+            schema = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Не удалось загрузить OpenAPI-схему из {schema_path}: {e}")
+        return None
+    # Файл от другой сборки (поменялась версия или набор путей) не используется
+    routes = {route.path for route in app.routes if getattr(route, "include_in_schema", False)}
+    if schema.get("info", {}).get("version") != app.version or set(schema.get("paths", {})) != routes:
+        logger.warning(f"OpenAPI-схема в {schema_path} не соответствует приложению, схема будет собрана заново")
+        return None
+    return schema
+
+
+def install_openapi(app: FastAPI, schema_path: Optional[str] = None) -> None:
+    """
+    Подменяет app.openapi: схема собирается один раз при первом запросе /openapi.json или /docs,
+    а если задан schema_path — берется из файла, собранного при сборке образа.
+    """
+    lock = threading.Lock()
+
+    def openapi() -> Dict[str, Any]:
+        if app.openapi_schema is None:
+            with lock:
+                if app.openapi_schema is None:
+                    schema = _load_prebuilt(app, schema_path) if schema_path and os.path.exists(schema_path) else None
+                    app.openapi_schema = schema or build_openapi(app)
+        return app.openapi_schema
+
+    app.openapi = openapi
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Собрать OpenAPI-схему приложения в файл")
+    parser.add_argument("output", help="Путь к файлу схемы (например, openapi.json)")
+    args = parser.parse_args()
+
+    from src.main import app
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(build_openapi(app), f, ensure_ascii=False)
+    print(f"OpenAPI-схема записана в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# Контекст текущего HTTP-запроса, доступный из любого места обработки
+
+import re
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Метка маршрута для запросов, не попавших ни в один маршрут, и для работы вне запросов
+UNMATCHED_ROUTE = "<unmatched>"
+BACKGROUND_ROUTE = "<background>"
+
+REQUEST_ID_HEADER = "X-Request-ID"
+# Входящий ID запроса принимается, только если он короткий и без спецсимволов
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+@dataclass
+class RequestDbStats:
+    """SQL-статистика текущего HTTP-запроса"""
+    route: str
+    queries: int = 0
+    duration: float = 0.0
+    # Счетчик одинаковых SQL-выражений; заполняется только при профилировании запроса
+    statements: Optional[Counter] = None
+
+
+_request_db_stats: ContextVar[Optional[RequestDbStats]] = ContextVar("request_db_stats", default=None)
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+
+def current_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+def current_db_stats() -> Optional[RequestDbStats]:
+    return _request_db_stats.get()
+
+
+def current_route() -> str:
+    stats = _request_db_stats.get()
+    return stats.route if stats else BACKGROUND_ROUTE
+
+
+def route_template(scope: Scope) -> str:
+    # Шаблон пути (/api/v1/raffles/{raffle_id}), чтобы не плодить метки на каждый ID
+    app = scope.get("app")
+    router = getattr(app, "router", None)
+    for route in getattr(router, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return UNMATCHED_ROUTE
+
+
+class RequestContextMiddleware:
+    """
+    ASGI-middleware: определяет шаблон маршрута, заводит SQL-статистику запроса
+    и ID запроса для логов.
+
+    ID берется из заголовка X-Request-ID (если клиент или балансировщик его прислал)
+    или генерируется, и возвращается в том же заголовке ответа.
+
+    Должно быть внешним, чтобы метрики и профилирование видели один и тот же контекст.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = Headers(scope=scope).get(REQUEST_ID_HEADER)
+        if not request_id or not _VALID_REQUEST_ID.match(request_id):
+            request_id = uuid.uuid4().hex
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[REQUEST_ID_HEADER] = request_id
+            await send(message)
+
+        stats_token = _request_db_stats.set(RequestDbStats(route=route_template(scope)))
+        id_token = _request_id.set(request_id)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_id.reset(id_token)
+            _request_db_stats.reset(stats_token)
@@ -0,0 +1,143 @@
+# Учет SQL-запросов: метрики, журнал медленных запросов и профиль отдельного HTTP-запроса
+
+import logging
+import re
+import time
+from collections import Counter
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.metrics import DB_QUERIES, DB_QUERY_DURATION
+from src.core.request_context import current_db_stats, current_route
+
+logger = logging.getLogger(__name__)
+
+PROFILE_REQUEST_HEADER = "x-sql-profile"
+MAX_LOGGED_STATEMENT = 1000
+MAX_SHAPE_ITEMS = 20
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _compact(statement: str, limit: int = MAX_LOGGED_STATEMENT) -> str:
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    return statement if len(statement) <= limit else statement[:limit] + "..."
+
+
+def _type_names(items) -> str:
+    names = list(items)
+    extra = len(names) - MAX_SHAPE_ITEMS
+    names = names[:MAX_SHAPE_ITEMS]
+    if extra > 0:
+        names.append(f"... +{extra}")
+    return ", ".join(names)
+
+
+def _shape(parameters: Any) -> str:
+    if isinstance(parameters, dict):
+        return "{" + _type_names(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + _type_names(type(value).__name__ for value in parameters) + ")"
+    return type(parameters).__name__
+
+
+def parameter_shape(parameters: Any, executemany: bool = False) -> str:
+    """
+    Описание параметров запроса без значений: имена и типы.
+
+    Значения в журнал не попадают — в них могут быть персональные данные пользователей.
+    Для executemany выводится число наборов и форма первого из них.
+    """
+    if executemany:
+        rows = list(parameters or ())
+        return f"{len(rows)} x {_shape(rows[0])}" if rows else "[]"
+    return _shape(parameters)
+
+
+def instrument_engine(engine: Engine, slow_query_threshold_ms: Optional[float] = None) -> None:
+    """
+    Подключает к движку учет SQL-запросов.
+
+    Каждый запрос засекается и попадает в метрики и в статистику текущего HTTP-запроса.
+    Запросы дольше slow_query_threshold_ms (если порог задан и больше 0) пишутся
+    в журнал вместе с формой параметров и маршрутом, который их выполнил.
+    """
+    slow_threshold = slow_query_threshold_ms / 1000 if slow_query_threshold_ms and slow_query_threshold_ms > 0 else None
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info["query_started"].pop()
+        stats = current_db_stats()
+        route = current_route()
+        if stats:
+            stats.queries += 1
+            stats.duration += duration
+            if stats.statements is not None:
+                stats.statements[statement] += 1
+        DB_QUERIES.labels(route).inc()
+        DB_QUERY_DURATION.labels(route).observe(duration)
+        if slow_threshold is not None and duration >= slow_threshold:
+            logger.warning(
+                f"Медленный SQL-запрос ({duration * 1000:.1f} мс) в {route}: {_compact(statement)} "
+                f"параметры: {parameter_shape(parameters, executemany)}"
+            )
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(context):
+        # after_cursor_execute для упавшего запроса не вызывается
+        started = context.connection.info.get("query_started") if context.connection else None
+        if started:
+            started.pop()
+
+
+class SqlProfileMiddleware:
+    """
+    ASGI-middleware: профиль SQL по запросу клиента.
+
+    Если в запросе есть заголовок X-SQL-Profile, в ответ добавляются:
+    - `X-DB-Query-Count` - количество SQL-запросов
+    - `X-DB-Time-Ms` - суммарное время в БД
+    - `X-DB-Repeated-Queries` - сколько запросов повторили уже выполненное выражение (признак N+1)
+    - `Server-Timing` - то же время для панели Network в браузере
+
+    Учитываются запросы, выполненные до отправки заголовков ответа.
+    Должно стоять внутри RequestContextMiddleware.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        stats = current_db_stats() if scope["type"] == "http" else None
+        if stats is None or PROFILE_REQUEST_HEADER not in Headers(scope=scope):
+            await self.app(scope, receive, send)
+            return
+
+        stats.statements = Counter()
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                repeated = sum(count - 1 for count in stats.statements.values())
+                db_time_ms = stats.duration * 1000
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Query-Count"] = str(stats.queries)
+                headers["X-DB-Time-Ms"] = f"{db_time_ms:.2f}"
+                headers["X-DB-Repeated-Queries"] = str(repeated)
+                headers.append("Server-Timing", f'db;dur={db_time_ms:.2f};desc="{stats.queries} queries"')
+                if repeated:
+                    statement, count = stats.statements.most_common(1)[0]
+                    logger.info(
+                        f"SQL-профиль {scope['method']} {stats.route}: {stats.queries} запросов, "
+                        f"{db_time_ms:.1f} мс, повторов {repeated}; чаще всего (x{count}): {_compact(statement, 300)}"
+                    )
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
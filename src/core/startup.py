@@ -0,0 +1,42 @@
+# Замер времени запуска приложения по этапам
+
+import logging
+import time
+from typing import Dict, Optional
+
+from src.core.metrics import Gauge
+
+logger = logging.getLogger(__name__)
+
+APP_STARTUP_SECONDS = Gauge(
+    "app_startup_seconds", "Длительность этапов запуска приложения", ("phase",), multiprocess_mode="max")
+
+
+class StartupTimer:
+    """
+    Засекает этапы запуска: каждый mark() закрывает этап, начатый предыдущим.
+
+    Длительности попадают в метрику app_startup_seconds и в итоговую запись лога.
+    """
+
+    def __init__(self, started: Optional[float] = None):
+        self.started = started if started is not None else time.perf_counter()
+        self._last = self.started
+        self.phases: Dict[str, float] = {}
+
+    def mark(self, phase: str) -> float:
+        now = time.perf_counter()
+        duration = now - self._last
+        self._last = now
+        self.phases[phase] = duration
+        APP_STARTUP_SECONDS.labels(phase).set(duration)
+        return duration
+
+    @property
+    def total(self) -> float:
+        return self._last - self.started
+
+    def finish(self) -> None:
+        APP_STARTUP_SECONDS.labels("total").set(self.total)
+        phases = ", ".join(f"{name} {duration * 1000:.0f} мс" for name, duration in self.phases.items())
+        logger.info(f"Приложение запущено за {self.total:.2f} с ({phases})")
@@ -0,0 +1,284 @@
+# Трассировка на OpenTelemetry SDK: W3C traceparent и экспорт по OTLP
+
+import functools
+import logging
+import threading
+from typing import Any, Dict, Optional, Sequence
+
+from opentelemetry import trace
+from opentelemetry.context import Context
+from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    ConsoleSpanExporter,
+    SimpleSpanProcessor,
+    SpanExporter,
+    SpanExportResult,
+    SpanProcessor,
+)
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from opentelemetry.trace import Link, SpanKind, Status, StatusCode
+from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.config import settings
+from src.core.request_context import route_template
+
+logger = logging.getLogger(__name__)
+
+INSTRUMENTATION_SCOPE = "vk-randomizer"
+MAX_STATEMENT_LENGTH = 2000
+
+_PROPAGATOR = TraceContextTextMapPropagator()
+
+
+class _NoopSpanContext:
+    # Трассировка выключена: одна проверка и общий объект без аллокаций
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        return None
+
+
+_NOOP_SPAN_CONTEXT = _NoopSpanContext()
+
+
+class Tracer:
+    """
+    Обертка над TracerProvider OpenTelemetry.
+
+    Без процессора трассировка выключена: start_as_current_span возвращает общий
+    пустой контекстный менеджер, и SDK на горячем пути не вызывается вовсе.
+    Сэмплирование по родителю (ParentBased): решение принимается для корневого
+    спана с вероятностью sample_rate и наследуется дочерними спанами и продолжениями
+    сохраненного трейса.
+    """
+
+    def __init__(self):
+        self.provider: Optional[TracerProvider] = None
+        self._tracer: Optional[trace.Tracer] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._tracer is not None
+
+    def configure(self, processor: Optional[SpanProcessor], sample_rate: float, service_name: str) -> None:
+        if self.provider is not None:
+            self.provider.shutdown()
+        self.provider = self._tracer = None
+        if processor is None:
+            return
+        self.provider = TracerProvider(
+            sampler=ParentBased(TraceIdRatioBased(sample_rate)),
+            resource=Resource.create({"service.name": service_name}),
+        )
+        self.provider.add_span_processor(processor)
+        self._tracer = self.provider.get_tracer(INSTRUMENTATION_SCOPE)
+
+    def start_span(self, name: str, kind: SpanKind = SpanKind.INTERNAL, attributes: Optional[Dict[str, Any]] = None,
+                   parent: Optional[Context] = None, links: Optional[Sequence[Link]] = None) -> trace.Span:
+        """Спан, не ставший текущим (родитель - parent или текущий спан); только при включенной трассировке"""
+        return self._tracer.start_span(name, context=parent, kind=kind, attributes=attributes, links=links)
+
+    def start_as_current_span(self, name: str, kind: SpanKind = SpanKind.INTERNAL,
+                              attributes: Optional[Dict[str, Any]] = None, parent: Optional[Context] = None,
+                              links: Optional[Sequence[Link]] = None):
+        """Контекстный менеджер спана; при выключенной трассировке возвращает None вместо спана"""
+        if self._tracer is None:
+            return _NOOP_SPAN_CONTEXT
+        return self._tracer.start_as_current_span(name, context=parent, kind=kind, attributes=attributes, links=links)
+
+
+tracer = Tracer()
+
+
+def traced(name: str, kind: SpanKind = SpanKind.INTERNAL):
+    """Декоратор: выполняет синхронную функцию внутри спана"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.start_as_current_span(name, kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[Context]:
+    """Контекст родителя из W3C traceparent; пустой или некорректный заголовок - None"""
+    if not value:
+        return None
+    context = _PROPAGATOR.extract({"traceparent": value})
+    return context if trace.get_current_span(context).get_span_context().is_valid else None
+
+
+def current_trace_id() -> Optional[str]:
+    span_context = trace.get_current_span().get_span_context()
+    return trace.format_trace_id(span_context.trace_id) if span_context.is_valid else None
+
+
+def set_span_attribute(key: str, value: Any) -> None:
+    """Атрибут текущего спана; без активного спана ничего не делает"""
+    trace.get_current_span().set_attribute(key, value)
+
+
+def current_traceparent() -> Optional[str]:
+    """traceparent текущего спана, если он сэмплирован, - чтобы сохранить и продолжить трейс позже"""
+    span_context = trace.get_current_span().get_span_context()
+    if not span_context.is_valid or not span_context.trace_flags.sampled:
+        return None
+    carrier: Dict[str, str] = {}
+    _PROPAGATOR.inject(carrier)
+    return carrier.get("traceparent")
+
+
+def link_span(traceparent: Optional[str]) -> None:
+    """Добавляет текущему спану ссылку на сохраненный traceparent; пустой или некорректный пропускается"""
+    span = trace.get_current_span()
+    linked = parse_traceparent(traceparent) if span.is_recording() else None
+    if linked is not None:
+        span.add_link(trace.get_current_span(linked).get_span_context())
+
+
+def continue_trace(name: str, traceparent: Optional[str], attributes: Optional[Dict[str, Any]] = None):
+    """
+    Спан, продолжающий сохраненный трейс: родитель - спан из traceparent, а текущий
+    спан (HTTP-запрос, проход планировщика) попадает в ссылки. Так этапы жизни
+    объекта, выполненные в разных запросах и процессах, складываются в один трейс.
+
+    Без сохраненного traceparent - обычный дочерний спан текущего.
+    """
+    if not tracer.enabled:
+        return _NOOP_SPAN_CONTEXT
+    parent = parse_traceparent(traceparent)
+    links = None
+    if parent is not None:
+        current = trace.get_current_span().get_span_context()
+        links = [Link(current)] if current.is_valid else None
+    return tracer.start_as_current_span(name, attributes=attributes, parent=parent, links=links)
+
+
+# --- Экспорт ---
+
+class FileSpanExporter(SpanExporter):
+    """Дописывает спаны в файл, по одному JSON-объекту на строку"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        lines = "".join(span.to_json(indent=None) + "\n" for span in spans)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+        return SpanExportResult.SUCCESS
+
+
+def create_exporter(name: str, file_path: str, otlp_endpoint: str) -> SpanExporter:
+    if name == "otlp":
+        return OTLPSpanExporter(endpoint=otlp_endpoint)
+    if name == "file":
+        return FileSpanExporter(file_path)
+    if name == "memory":
+        return InMemorySpanExporter()
+    if name == "console":
+        return ConsoleSpanExporter(formatter=lambda span: span.to_json(indent=None) + "\n")
+    raise ValueError(f"Неизвестный экспортер трассировки: {name}")
+
+
+def configure_tracing(processor: Optional[SpanProcessor], sample_rate: float = 1.0,
+                      service_name: Optional[str] = None) -> None:
+    """Включает трассировку с заданным процессором (None - выключает, выгрузив накопленные спаны)"""
+    tracer.configure(processor, sample_rate, service_name or settings.TRACING_SERVICE_NAME)
+
+
+def shutdown_tracing() -> None:
+    """Экспортирует накопленные спаны и выключает трассировку"""
+    configure_tracing(None)
+
+
+# --- Инструментирование ---
+
+def instrument_engine_tracing(engine: Engine) -> None:
+    """Спан на каждый SQL-запрос движка (вид CLIENT, с текстом запроса без параметров)"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # Запросы вне трейса (пинги проб, сиды) и в несэмплированных трейсах не записываются;
+        # в стек кладется None, чтобы after_cursor_execute снимал ровно свою запись
+        span = None
+        if tracer.enabled and trace.get_current_span().is_recording():
+            span = tracer.start_span(statement.split(None, 1)[0].upper() if statement else "SQL", SpanKind.CLIENT, {
+                "db.system": engine.dialect.name,
+                "db.statement": statement[:MAX_STATEMENT_LENGTH],
+            })
+            if executemany:
+                span.set_attribute("db.executemany", True)
+        conn.info.setdefault("trace_spans", []).append(span)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        spans = conn.info.get("trace_spans")
+        span = spans.pop() if spans else None
+        if span is not None:
+            span.end()
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(context):
+        spans = context.connection.info.get("trace_spans") if context.connection else None
+        span = spans.pop() if spans else None
+        if span is not None:
+            span.record_exception(context.original_exception)
+            span.set_status(Status(StatusCode.ERROR))
+            span.end()
+
+
+class TracingMiddleware:
+    """ASGI-middleware: серверный спан на каждый HTTP-запрос с учетом входящего traceparent"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not tracer.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        route = route_template(scope)
+        parent = parse_traceparent(Headers(scope=scope).get("traceparent"))
+        attributes = {
+            "http.request.method": scope["method"],
+            "http.route": route,
+            "url.path": scope["path"],
+        }
+        with tracer.start_as_current_span(f"{scope['method']} {route}", SpanKind.SERVER, attributes, parent) as span:
+            async def send_wrapper(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.response.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.set_status(Status(StatusCode.ERROR))
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+
+
+def setup_tracing(engine: Engine) -> None:
+    """Включает трассировку по настройкам; при TRACING_ENABLED=False обработчики не подключаются вовсе"""
+    if not settings.TRACING_ENABLED:
+        return
+    exporter = create_exporter(
+        settings.TRACING_EXPORTER,
+        settings.TRACING_FILE_PATH,
+        settings.TRACING_OTLP_ENDPOINT,
+    )
+    configure_tracing(BatchSpanProcessor(exporter), settings.TRACING_SAMPLE_RATE)
+    instrument_engine_tracing(engine)
+    logger.info(f"Трассировка включена: экспортер {settings.TRACING_EXPORTER}, доля {settings.TRACING_SAMPLE_RATE}")
@@ -0,0 +1,44 @@
+# Массовая запись строк одним запросом
+
+from typing import List, Optional, Sequence
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+
+def insert_ignore(db: Session, model, rows: Sequence[dict], index_elements: Optional[List[str]] = None) -> int:
+    """
+    INSERT ... ON CONFLICT DO NOTHING одним выражением на все строки.
+
+    Для Postgres и SQLite строки, нарушающие уникальность (по index_elements или
+    по любому ограничению), пропускаются. Другие диалекты не поддерживаются.
+
+    Returns:
+        Количество вставленных строк
+    """
+    if not rows:
+        return 0
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        raise NotImplementedError(f"INSERT ... ON CONFLICT не поддерживается для {dialect}")
+    # Один INSERT на Core-уровне: драйвер отправляет строки пачками (insertmanyvalues),
+    # а rowcount суммируется по всем пачкам
+    statement = dialect_insert(model.__table__).on_conflict_do_nothing(index_elements=index_elements)
+    return db.connection().execute(statement, list(rows)).rowcount
+
+
+def sync_id_sequence(db: Session, model) -> None:
+    """
+    Подтягивает последовательность serial-ключа к MAX(id) после вставки строк с явными ID,
+    иначе следующие INSERT без ID упрутся в уже занятые значения. Только для Postgres.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    table = model.__table__.name
+    max_id = db.execute(select(model.id).order_by(model.id.desc()).limit(1)).scalar()
+    if max_id is not None:
+        db.execute(text("SELECT setval(pg_get_serial_sequence(:table, 'id'), :value)"), {"table": table, "value": max_id})
@@ -0,0 +1,135 @@
+# Миграции схемы БД: отдельная команда вместо alembic upgrade в каждом контейнере
+#
+#     python -m src.db.migrate
+
+import argparse
+import logging
+import sys
+import time
+import zlib
+from pathlib import Path
+from typing import Optional, Set, Tuple
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Connection, Engine
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+
+# Ключ advisory-lock, общий для всех реплик, которые пытаются мигрировать одну базу
+MIGRATION_LOCK_ID = zlib.crc32(b"vk-randomizer:alembic")
+
+
+class SchemaVersionError(RuntimeError):
+    """Схема БД не соответствует миграциям приложения"""
+
+
+def alembic_config() -> Config:
+    config = Config(str(BASE_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BASE_DIR / "alembic"))
+    return config
+
+
+def _acquire_lock(connection: Connection, timeout: float, poll_interval: float = 1.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not connection.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID}).scalar():
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"Блокировка миграций не получена за {timeout} с")
+        logger.info("Миграции выполняет другой процесс, ожидание блокировки...")
+        time.sleep(poll_interval)
+    # Блокировка уровня сессии переживает commit, а транзакцией миграций управляет Alembic
+    connection.commit()
+
+
+def _release_lock(connection: Connection) -> None:
+    connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+    connection.commit()
+
+
+def run_migrations(database_url: Optional[str] = None, revision: str = "head", lock_timeout: Optional[float] = None) -> None:
+    """
+    Применяет миграции до revision под advisory-lock Postgres.
+
+    Одновременно запущенные экземпляры ждут друг друга: первый мигрирует,
+    остальные после получения блокировки видят актуальную схему и ничего не делают.
+    """
+    engine = create_engine(database_url or settings.DATABASE_URL)
+    lock_timeout = settings.MIGRATION_LOCK_TIMEOUT_SECONDS if lock_timeout is None else lock_timeout
+    config = alembic_config()
+    try:
+        with engine.connect() as connection:
+            locking = connection.dialect.name == "postgresql"
+            if locking:
+                _acquire_lock(connection, lock_timeout)
+            try:
+                config.attributes["connection"] = connection
+                command.upgrade(config, revision)
+            finally:
+                if locking:
+                    _release_lock(connection)
+    finally:
+        engine.dispose()
+
+
+def schema_status(engine: Engine) -> Tuple[Set[str], Set[str]]:
+    """Текущие ревизии в базе и head-ревизии из каталога миграций"""
+    with engine.connect() as connection:
+        current = set(MigrationContext.configure(connection).get_current_heads())
+    heads = set(ScriptDirectory.from_config(alembic_config()).get_heads())
+    return current, heads
+
+
+def check_schema_version(engine: Engine) -> bool:
+    """
+    Быстрая проверка при старте: совпадает ли версия схемы с миграциями приложения.
+
+    Сама схема не меняется. В режиме SCHEMA_CHECK=fail отставание схемы приводит
+    к SchemaVersionError; недоступная БД только логируется — ее отследит readiness-проба.
+
+    Returns:
+        True, если схема актуальна
+    """
+    try:
+        current, heads = schema_status(engine)
+    except Exception as e:
+        logger.warning(f"Не удалось проверить версию схемы БД: {type(e).__name__}")
+        return False
+    if current == heads:
+        return True
+    message = (
+        f"Версия схемы БД {sorted(current) or 'пусто'} не совпадает с миграциями {sorted(heads)}; "
+        f"выполните python -m src.db.migrate"
+    )
+    if settings.SCHEMA_CHECK == "fail":
+        raise SchemaVersionError(message)
+    logger.error(message)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Применить миграции Alembic под advisory-lock")
+    parser.add_argument("revision", nargs="?", default="head")
+    parser.add_argument("--lock-timeout", type=float, help="Сколько секунд ждать блокировку миграций")
+    args = parser.parse_args()
+
+    from src.core.logging import setup_logging, shutdown_logging
+    setup_logging()
+    try:
+        run_migrations(revision=args.revision, lock_timeout=args.lock_timeout)
+    except Exception as e:
+        logger.error(f"Миграции не применены: {e}")
+        shutdown_logging()
+        sys.exit(1)
+    logger.info(f"Схема БД обновлена до {args.revision}")
+    shutdown_logging()
+
+
+if __name__ == "__main__":
+    main()
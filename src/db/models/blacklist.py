@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, DateTime, Index, text
+from sqlalchemy.sql import func
+from src.db.base import Base
+
+class BlacklistEntry(Base):
+    __tablename__ = "blacklist_entries"
+    __table_args__ = (
+        # Черный список владельца на все его розыгрыши (raffle_id IS NULL)
+        Index(
+            "uq_blacklist_entries_owner_user",
+            "owner_vk_user_id", "user_ref",
+            unique=True,
+            postgresql_where=text("raffle_id IS NULL"),
+            sqlite_where=text("raffle_id IS NULL"),
+        ),
+        # Черный список конкретного розыгрыша
+        Index(
+            "uq_blacklist_entries_raffle_user",
+            "raffle_id", "user_ref",
+            unique=True,
+            postgresql_where=text("raffle_id IS NOT NULL"),
+            sqlite_where=text("raffle_id IS NOT NULL"),
+        ),
+    )
+
+    id = Column(Integer, primary_key=True)
+    owner_vk_user_id = Column(String, nullable=False)  # VK user ID владельца списка
+    raffle_id = Column(String, nullable=True)  # NULL - запись действует на все розыгрыши владельца
+    user_ref = Column(String, nullable=False)  # Нормализованный VK ID или короткое имя без "@"
+    created_at = Column(DateTime, default=func.now(), nullable=False)
@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, String, Boolean, JSON, Enum, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, JSON, Enum, DateTime, Index, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
 from src.db.base import Base
 import enum
 from datetime import datetime
@@ -10,26 +12,31 @@ class NotificationType(enum.Enum):
 
 class Notification(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        # Лента пользователя: WHERE user_id = ? ORDER BY created_at DESC, id DESC
+        Index("ix_notifications_user_created", "user_id", "created_at", "id"),
+        # "Последние N непрочитанных": частичный индекс только по new = true
+        Index(
+            "ix_notifications_user_unread",
+            "user_id", "created_at", "id",
+            postgresql_where=text('"new"'),
+            sqlite_where=text('"new"'),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     type = Column(Enum(NotificationType), nullable=False)
+    user_id = Column(String, nullable=True)  # VK user ID получателя
     
-    # Для completed уведомлений
-    raffleId = Column(Integer, nullable=True)
-    participantsCount = Column(Integer, nullable=True)
-    winners = Column(JSON, nullable=True)  # Список победителей
-    reasonEnd = Column(String, nullable=True)
+    # Данные, специфичные для типа (JSONB в PostgreSQL):
+    # completed - raffleId, participantsCount, winners, reasonEnd
+    # warning - warningTitle, warningDescription
+    # error - errorTitle, errorDescription
+    payload = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=False)
     
-    # Для warning уведомлений
-    warningTitle = Column(String, nullable=True)
-    warningDescription = Column(JSON, nullable=True)  # Список строк
-    
-    # Для error уведомлений
-    errorTitle = Column(String, nullable=True)
-    errorDescription = Column(String, nullable=True)
-    
-    # Общее поле
+    # Общие поля
     new = Column(Boolean, default=True, nullable=False)
+    created_at = Column(DateTime, default=func.now(), nullable=False)
 
 class UserNotificationSettings(Base):
     __tablename__ = "user_notification_settings"
@@ -1,5 +1,7 @@
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, Text, Enum, JSON
+from sqlalchemy import DDL, Column, String, Integer, Boolean, DateTime, Text, Enum, JSON, LargeBinary, PrimaryKeyConstraint, UniqueConstraint, event
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.sql import func
+from datetime import datetime
 from src.db.base import Base
 import enum
 
@@ -7,13 +9,29 @@ class RaffleStatus(enum.Enum):
     DRAFT = "draft"
     ACTIVE = "active"
     PAUSED = "paused"
+    COMPLETING = "completing"  # Участники набраны, идет выбор победителей (services/raffle_lifecycle.py)
     COMPLETED = "completed"
     CANCELLED = "cancelled"
 
+@compiles(PrimaryKeyConstraint, "postgresql")
+def _primary_key_with_partition_key(constraint, compiler, **kw):
+    # Первичный ключ секционированной таблицы обязан включать ключ секционирования
+    ddl = compiler.visit_primary_key_constraint(constraint, **kw)
+    key = constraint.table.info.get("partition_key") if constraint.table is not None else None
+    if key is None or key in constraint.columns.keys():
+        return ddl
+    head, _, tail = ddl.rpartition(")")
+    return f"{head}, {compiler.preparer.quote(key)}){tail}"
+
+
+# На Postgres таблица секционирована по месяцам created_at (services/raffle_partitions.py),
+# первичный ключ там - (id, created_at), а уникальность одного id держит таблица raffle_ids.
+# На остальных СУБД таблица обычная с ключом id; объекты везде идентифицируются по id
 class Raffle(Base):
     __tablename__ = "raffles"
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)", "info": {"partition_key": "created_at"}}
 
-    id = Column(String, primary_key=True, index=True)
+    id = Column(String, primary_key=True)
     vk_user_id = Column(String, nullable=False, index=True)  # VK user ID владельца
     
     # Основная информация
@@ -37,6 +55,8 @@ class Raffle(Base):
     start_date = Column(DateTime, nullable=False, index=True)
     end_date = Column(DateTime, nullable=False, index=True)
     max_participants = Column(Integer, nullable=True)
+    # Дополнительные записи за каждую подписку на обязательное сообщество или партнера
+    bonus_entries = Column(Integer, default=0, nullable=False)
     
     # Дополнительные настройки
     publish_results = Column(Boolean, default=True, nullable=False)
@@ -47,5 +67,100 @@ class Raffle(Base):
     # Статус и метаданные
     status = Column(Enum(RaffleStatus), default=RaffleStatus.DRAFT, nullable=False, index=True)
     participants_count = Column(Integer, default=0, nullable=False)
-    created_at = Column(DateTime, default=func.now(), nullable=False)
+    # Ключ секционирования: задается при создании и не меняется. Время UTC,
+    # чтобы месяц секции и окна сканирований не зависели от часового пояса сервера
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+
+    # Проверяемый розыгрыш: хеш seed публикуется при активации, seed и победители - после завершения
+    draw_seed = Column(String(64), nullable=True)
+    draw_seed_hash = Column(String(64), nullable=True)
+    winners = Column(JSON, nullable=True)  # VK user ID победителей
+
+    # traceparent спана создания - корня трейса розыгрыша. Смена статуса, завершение (с выбором
+    # победителей и рассылкой) и архивация продолжают этот трейс дочерними спанами, а спаны
+    # заявок ссылаются на него (span links): заявок тысячи, и в одном трейсе они бы его переполнили
+    trace_context = Column(String(55), nullable=True)
+
+
+# Секция по умолчанию принимает строки, для месяца которых секция еще не создана
+event.listen(
+    Raffle.__table__,
+    "after_create",
+    DDL("CREATE TABLE raffles_default PARTITION OF raffles DEFAULT").execute_if(dialect="postgresql"),
+)
+
+# id всех строк raffles: триггер после вставки добавляет id, после удаления - убирает,
+# повторный id во вставке нарушает первичный ключ raffle_ids. Строки, пропущенные
+# ON CONFLICT DO NOTHING, триггер не видит (AFTER-триггеры срабатывают только на вставленные)
+RAFFLE_IDS_DDL = [
+    "CREATE TABLE raffle_ids (id VARCHAR PRIMARY KEY)",
+    """
+    CREATE FUNCTION raffles_track_id() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('DELETE', 'UPDATE') THEN
+            DELETE FROM raffle_ids WHERE id = OLD.id;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO raffle_ids (id) VALUES (NEW.id);
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "CREATE TRIGGER raffles_track_id AFTER INSERT OR DELETE OR UPDATE OF id ON raffles "
+    "FOR EACH ROW EXECUTE FUNCTION raffles_track_id()",
+]
+for statement in RAFFLE_IDS_DDL:
+    event.listen(Raffle.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+event.listen(
+    Raffle.__table__,
+    "after_drop",
+    DDL("DROP TABLE IF EXISTS raffle_ids; DROP FUNCTION IF EXISTS raffles_track_id()").execute_if(dialect="postgresql"),
+)
+
+
+class RaffleParticipant(Base):
+    __tablename__ = "raffle_participants"
+    __table_args__ = (
+        UniqueConstraint("raffle_id", "user_id", name="uq_raffle_participants_raffle_user"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    raffle_id = Column(String, nullable=False)  # Индекс даёт uq_raffle_participants_raffle_user
+    user_id = Column(String, nullable=False)  # VK user ID участника
+    weight = Column(Integer, default=1, nullable=False)  # Число записей участника
+    flags = Column(String, nullable=True)  # Проверки, пометившие заявку при приеме (через запятую)
+    # Условие, по которому участник исключен при завершении (services/eligibility.py);
+    # weight при этом сохраняется, в выборе победителей исключенный участвует с весом 0
+    excluded_reason = Column(String, nullable=True)
+    created_at = Column(DateTime, default=func.now(), nullable=False)
+
+
+# Часть счетчика участников розыгрыша: заявки увеличивают случайную часть, поэтому
+# параллельные записи не ждут блокировки одной строки raffles
+class RaffleCounterShard(Base):
+    __tablename__ = "raffle_counter_shards"
+
+    raffle_id = Column(String, primary_key=True)
+    shard = Column(Integer, primary_key=True)
+    count = Column(Integer, default=0, nullable=False)
+    capacity = Column(Integer, nullable=True)  # Доля max_participants этой части (NULL - без лимита)
+
+
+# Завершенные и отмененные розыгрыши, вынесенные из raffles (services/archive.py):
+# полная строка и участники хранятся сжатыми, в колонках - только поля для поиска
+class RaffleArchive(Base):
+    __tablename__ = "raffle_archive"
+
+    id = Column(String, primary_key=True)  # ID розыгрыша
+    vk_user_id = Column(String, nullable=False, index=True)
+    community_id = Column(String, nullable=False)
+    status = Column(String, nullable=False)  # completed или cancelled
+    end_date = Column(DateTime, nullable=False)
+    participants_count = Column(Integer, nullable=False)
+    winners = Column(JSON, nullable=True)
+    format = Column(Integer, nullable=False)  # Версия формата сжатых данных
+    raffle_data = Column(LargeBinary, nullable=False)  # zlib(JSON строки raffles)
+    participants_data = Column(LargeBinary, nullable=False)  # zlib(JSON lines: [user_id, weight, flags, excluded_reason])
+    archived_at = Column(DateTime, default=func.now(), nullable=False)
@@ -1,11 +1,32 @@
-from fastapi import FastAPI
+import time
+
+# Отсчет времени запуска начинается до импорта FastAPI и роутеров
+_started = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
-from src.api.v1 import community, raffle, notification, community_modal, nested_community_card, notification_card
+from starlette.concurrency import run_in_threadpool
+from src.api.v1 import community, raffle, notification, community_modal, nested_community_card, notification_card, blacklist
 from src.api.v1.raffle import raffle_cards_router
 from src.api.v1.notification import settings_router
 from src.core.config import settings
-from src.core.logging import setup_logging
+from src.core.health import create_readiness_probe, utc_now_iso
+from src.core.logging import setup_logging, shutdown_logging
+from src.core.metrics import CONTENT_TYPE, MetricsMiddleware, mark_process_dead, render as render_metrics
+from src.core.openapi import install_openapi
+from src.core.request_context import RequestContextMiddleware
+from src.core.sql_profiling import SqlProfileMiddleware
+from src.core.startup import StartupTimer
+from src.core.tracing import TracingMiddleware, setup_tracing, shutdown_tracing
+from src.db.migrate import check_schema_version
+from src.db.session import engine
+from src.services.membership import setup_membership
+from src.services.scheduler import create_scheduler
+
+startup_timer = StartupTimer(_started)
+startup_timer.mark("imports")
 
 # Настройка метаданных для Swagger
 app = FastAPI(
@@ -55,8 +76,19 @@ app.add_middleware(
     allow_headers=settings.CORS_ALLOW_HEADERS,
 )
 
-# Настройка логирования
+# Метрики охватывают все остальные middleware
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+if settings.SQL_PROFILE_ENABLED:
+    app.add_middleware(SqlProfileMiddleware)
+if settings.TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware)
+# Контекст запроса - самый внешний слой: его читают метрики и профилирование SQL
+app.add_middleware(RequestContextMiddleware)
+
+# Настройка логирования и трассировки
 setup_logging()
+setup_tracing(engine)
 
 # Подключение роутов
 app.include_router(community.router, prefix="/api/v1", tags=["Communities"])
@@ -67,7 +99,44 @@ app.include_router(nested_community_card.router, prefix="/api/v1", tags=["Nested
 app.include_router(notification_card.router, prefix="/api/v1", tags=["NotificationCards"])
 app.include_router(raffle_cards_router, prefix="/api/v1", tags=["RaffleCards"])
 app.include_router(settings_router, prefix="/api/v1", tags=["NotificationSettings"])
+app.include_router(blacklist.router, prefix="/api/v1", tags=["Blacklists"])
 app.mount("/photos", StaticFiles(directory="uploaded_photos"), name="photos")
+install_openapi(app, settings.OPENAPI_SCHEMA_PATH)
+startup_timer.mark("routers")
+
+if settings.DEMO_DATA_ENABLED:
+    for demo_router in (community, community_modal, nested_community_card, notification):
+        demo_router.seed_demo_data()
+    startup_timer.mark("demo_data")
+
+# Снимки подписок для условий участия (если заданы) загружаются при старте
+# и обновляются планировщиком
+membership_store = setup_membership()
+
+# Фоновый планировщик и readiness-проба
+scheduler = create_scheduler(settings.SCHEDULER_INTERVAL_SECONDS) if settings.SCHEDULER_ENABLED else None
+readiness_probe = create_readiness_probe(engine, scheduler)
+startup_timer.mark("app")
+
+@app.on_event("startup")
+async def startup():
+    # Миграции здесь не применяются (см. python -m src.db.migrate), только сверяется версия
+    if settings.SCHEMA_CHECK != "off":
+        await run_in_threadpool(check_schema_version, engine)
+    if membership_store:
+        await run_in_threadpool(membership_store.refresh)
+    if scheduler:
+        scheduler.start()
+    startup_timer.mark("server_start")
+    startup_timer.finish()
+
+@app.on_event("shutdown")
+async def shutdown():
+    if scheduler:
+        await scheduler.stop(timeout=settings.SERVER_GRACEFUL_TIMEOUT_SECONDS)
+    mark_process_dead()
+    shutdown_tracing()
+    shutdown_logging()
 
 @app.get("/", tags=["Root"])
 async def root():
@@ -89,5 +158,46 @@ async def health_check():
     Проверка состояния сервиса.
     
     Используется для мониторинга работоспособности API.
+    Не обращается к зависимостям; для балансировщика используйте /health/ready.
+    """
+    return {"status": "healthy", "timestamp": utc_now_iso()}
+
+@app.get("/health/live", tags=["Health"])
+async def liveness():
+    """
+    Liveness-проба: процесс жив и обрабатывает запросы.
+    
+    Не обращается к БД, поэтому сбой базы не приводит к перезапуску воркеров.
+    """
+    return {"status": "alive", "timestamp": utc_now_iso()}
+
+@app.get("/health/ready", tags=["Health"])
+async def readiness():
+    """
+    Readiness-проба: воркер готов принимать трафик.
+    
+    **Проверки:**
+    - `database` - пинг БД с таймаутом
+    - `pool` - в пуле соединений есть свободные слоты
+    - `scheduler` - планировщик работает и не отстает
+    
+    Результат кешируется на несколько секунд, поэтому частые пробы не нагружают БД.
+    
+    **Ответы:**
+    - 200: Готов
+    - 503: Не готов (подробности в `checks`)
+    """
+    ready, body = await readiness_probe.check()
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+@app.get("/metrics", tags=["Health"], response_class=PlainTextResponse, include_in_schema=settings.METRICS_ENABLED)
+async def metrics():
+    """
+    Метрики сервиса в текстовом формате Prometheus.
+    
+    Количество и длительность HTTP-запросов и запросы в обработке по шаблону
+    маршрута, а также количество и длительность SQL-запросов.
     """
-    return {"status": "healthy", "timestamp": "2025-01-18T12:00:00Z"}
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Метрики отключены")
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
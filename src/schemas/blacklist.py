@@ -0,0 +1,20 @@
+# Схемы для черных списков участников
+
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+class BlacklistImport(BaseModel):
+    """Записи для массового добавления в черный список или удаления из него"""
+    entries: List[str] = Field(..., max_items=100_000, description="VK ID, короткие имена или ссылки на профили",
+                               example=["@spam_user", "id123456", "https://vk.com/bot1"])
+    raffle_id: Optional[str] = Field(None, description="ID розыгрыша; без него - список на все розыгрыши владельца")
+
+class BlacklistImportResult(BaseModel):
+    """Итог массового импорта"""
+    received: int = Field(..., description="Сколько записей передано")
+    imported: int = Field(..., description="Сколько новых записей добавлено")
+    invalid: int = Field(..., description="Сколько записей не удалось разобрать")
+
+class BlacklistRemoveResult(BaseModel):
+    """Итог удаления записей"""
+    removed: int = Field(..., description="Сколько записей удалено")
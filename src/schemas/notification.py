@@ -1,7 +1,7 @@
 # Схемы для уведомлений
 
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from enum import Enum
 from datetime import datetime
 
@@ -60,3 +60,9 @@ class UserNotificationSettings(BaseModel):
 
     class Config:
         from_attributes = True
+
+class NotificationBulkAction(BaseModel):
+    """Схема для массовых операций над уведомлениями"""
+    ids: Optional[List[int]] = Field(None, description="ID уведомлений", max_items=1000)
+    before: Optional[str] = Field(None, description="Курсор: затронуть уведомление в этой позиции и все более старые")
+    all: bool = Field(False, description="Явно затронуть все уведомления; удаление без ids, before и all отклоняется")
@@ -1,15 +1,17 @@
 from pydantic import BaseModel, Field
-from typing import List, Literal, Union, Optional
+from typing import Annotated, List, Literal, Union, Optional
 
 class CompletedNotificationCard(BaseModel):
+    id: Optional[int] = Field(None, example=38289)
     type: Literal["completed"] = Field(..., example="completed")
-    raffleId: int = Field(..., example=38289)
+    raffleId: Union[int, str] = Field(..., example=38289)
     participantsCount: int = Field(..., example=5920)
     winners: List[str] = Field(..., example=["593IF", "REOOJ", "DOXO"])
     reasonEnd: str = Field(..., example="Достигнут лимит по числу участников.")
     new: bool = Field(..., example=True)
 
 class WarningNotificationCard(BaseModel):
+    id: Optional[int] = Field(None, example=1)
     type: Literal["warning"] = Field(..., example="warning")
     warningTitle: str = Field(..., example="Не удалось подключить виджет")
     warningDescription: List[str] = Field(..., example=[
@@ -20,19 +22,72 @@ class WarningNotificationCard(BaseModel):
     new: bool = Field(..., example=True)
 
 class ErrorNotificationCard(BaseModel):
+    id: Optional[int] = Field(None, example=2)
     type: Literal["error"] = Field(..., example="error")
     errorTitle: str = Field(..., example="Ошибка подключения сообщества")
     errorDescription: str = Field(..., example="На сервере VK ведутся технические работы. Приносим извинения за доставленные неудобства!")
     new: bool = Field(..., example=False)
 
-NotificationCard = Union[
-    CompletedNotificationCard,
-    WarningNotificationCard,
-    ErrorNotificationCard
+NotificationCard = Annotated[
+    Union[
+        CompletedNotificationCard,
+        WarningNotificationCard,
+        ErrorNotificationCard
+    ],
+    Field(discriminator="type")
 ]
 
+# Класс карточки по значению поля type
+CARD_CLASSES = {
+    "completed": CompletedNotificationCard,
+    "warning": WarningNotificationCard,
+    "error": ErrorNotificationCard,
+}
+
+# Поля, которые хранятся в колонках notifications, а не в payload
+CARD_COLUMNS = {"id", "type", "new"}
+
+def encode_card_payload(card: NotificationCard) -> dict:
+    """
+    Поля карточки, специфичные для ее типа, для колонки notifications.payload.
+
+    Карточка проверяется схемой здесь, при записи: decode_card доверяет payload
+    и собирает карточку без проверки.
+    """
+    return CARD_CLASSES[card.type].model_validate(card.dict()).dict(exclude=CARD_COLUMNS)
+
+# Значения полей, которых нет в payload: так прежний _to_card заполнял NULL в старых колонках
+CARD_DEFAULTS = {
+    "completed": {"raffleId": "", "participantsCount": 0, "winners": [], "reasonEnd": ""},
+    "warning": {"warningTitle": "", "warningDescription": []},
+    "error": {"errorTitle": "", "errorDescription": ""},
+}
+
+def decode_card(id: int, type: str, payload: dict, new: bool) -> NotificationCard:
+    """
+    Собирает карточку из колонок notifications.
+
+    payload проверен при записи (encode_card_payload), поэтому карточка собирается
+    без проверки схемой - это горячий путь ленты. Поля, которых нет в payload
+    (строки, перенесенные из старых колонок до 6c1f0e9a2d47), получают значения
+    из CARD_DEFAULTS.
+    """
+    data = {**CARD_DEFAULTS[type], **{key: value for key, value in payload.items() if value is not None}}
+    return CARD_CLASSES[type].model_construct(**data, id=id, type=type, new=new)
+
 class NotificationCardResponse(BaseModel):
     notification: NotificationCard
 
 class NotificationCardListResponse(BaseModel):
-    notifications: List[NotificationCard] 
\ No newline at end of file
+    notifications: List[NotificationCard]
+    next_cursor: Optional[str] = Field(None, description="Курсор следующей страницы (null, если страниц больше нет)")
+
+class NotificationCardBulkAction(BaseModel):
+    user_id: str = Field(..., description="VK user ID получателя", example="123456")
+    ids: Optional[List[int]] = Field(None, description="ID уведомлений", max_items=1000, example=[38289, 1])
+    before: Optional[str] = Field(None, description="Курсор: затронуть уведомление в этой позиции и все более старые")
+    all: bool = Field(False, description="Явно затронуть все уведомления; удаление без ids, before и all отклоняется")
+
+class NotificationCardBulkResult(BaseModel):
+    affected: int = Field(..., description="Количество затронутых уведомлений", example=2)
+    unread_count: int = Field(..., description="Количество непрочитанных уведомлений после операции", example=0)
@@ -26,6 +26,7 @@ class RaffleCreate(BaseModel):
     start_date: datetime = Field(..., description="Дата и время старта розыгрыша", example="2025-07-09T14:33:00")
     end_date: datetime = Field(..., description="Дата и время завершения розыгрыша", example="2025-08-09T11:33:00")
     max_participants: Optional[int] = Field(None, description="Максимальное количество участников", ge=1, example=1000)
+    bonus_entries: int = Field(0, description="Дополнительные записи за каждую подписку на обязательное сообщество или партнера", ge=0, le=100, example=1)
     
     # Дополнительные настройки
     publish_results: bool = Field(True, description="Опубликовать пост с итогами")
@@ -68,6 +69,7 @@ class RaffleUpdate(BaseModel):
     start_date: Optional[datetime] = Field(None, description="Дата и время старта розыгрыша")
     end_date: Optional[datetime] = Field(None, description="Дата и время завершения розыгрыша")
     max_participants: Optional[int] = Field(None, description="Максимальное количество участников", ge=1)
+    bonus_entries: Optional[int] = Field(None, description="Дополнительные записи за каждую подписку на обязательное сообщество или партнера", ge=0, le=100)
     
     # Дополнительные настройки
     publish_results: Optional[bool] = Field(None, description="Опубликовать пост с итогами")
@@ -79,6 +81,7 @@ class RaffleStatus(str, Enum):
     draft = "draft"
     active = "active"
     paused = "paused"
+    completing = "completing"
     completed = "completed"
     cancelled = "cancelled"
 
@@ -106,6 +109,7 @@ class RaffleResponse(BaseModel):
     start_date: datetime = Field(..., description="Дата и время старта розыгрыша")
     end_date: datetime = Field(..., description="Дата и время завершения розыгрыша")
     max_participants: Optional[int] = Field(None, description="Максимальное количество участников")
+    bonus_entries: int = Field(0, description="Дополнительные записи за каждую подписку на обязательное сообщество или партнера")
     
     # Дополнительные настройки
     publish_results: bool = Field(..., description="Опубликовать пост с итогами")
@@ -118,6 +122,7 @@ class RaffleResponse(BaseModel):
     created_at: datetime = Field(..., description="Дата создания")
     updated_at: datetime = Field(..., description="Дата последнего обновления")
     participants_count: int = Field(0, description="Количество участников")
+    draw_seed_hash: Optional[str] = Field(None, description="SHA-256 секретного seed, опубликованный при активации")
     
     class Config:
         from_attributes = True
@@ -128,3 +133,33 @@ class RaffleListResponse(BaseModel):
     total: int = Field(..., description="Общее количество розыгрышей")
     page: int = Field(..., description="Номер страницы")
     per_page: int = Field(..., description="Количество элементов на странице")
+
+class RaffleDrawResponse(BaseModel):
+    """Данные для проверки итогов розыгрыша"""
+    raffle_id: str = Field(..., description="ID розыгрыша")
+    algorithm: Optional[str] = Field(None, description="Алгоритм выбора победителей (null - розыгрыш без проверяемого seed)", example="hmac-sha256-v2")
+    seed_hash: Optional[str] = Field(None, description="SHA-256 от seed, опубликованный при активации")
+    seed: Optional[str] = Field(None, description="Seed в hex; раскрывается только после завершения")
+    winners_count: int = Field(..., description="Количество победителей")
+    winners: Optional[List[str]] = Field(None, description="Победители; заполняются после завершения")
+
+class RaffleDrawVerification(BaseModel):
+    """Результат повторного выбора победителей по раскрытому seed"""
+    raffle_id: str = Field(..., description="ID розыгрыша")
+    valid: bool = Field(..., description="Seed соответствует хешу, а победители совпадают с повторным выбором")
+    seed_matches_hash: bool = Field(..., description="SHA-256 раскрытого seed равен опубликованному хешу")
+    participants_count: int = Field(..., description="Сколько участников учтено при повторном выборе")
+    winners: List[str] = Field(..., description="Сохраненные победители")
+    recomputed_winners: List[str] = Field(..., description="Победители по seed и текущему списку участников")
+
+class RaffleEntryRequest(BaseModel):
+    """Заявка на участие в розыгрыше"""
+    user_id: str = Field(..., min_length=1, max_length=64, description="VK user ID участника", example="123456")
+
+class RaffleEntryResponse(BaseModel):
+    """Результат приема заявки"""
+    raffle_id: str = Field(..., description="ID розыгрыша")
+    user_id: str = Field(..., description="VK user ID участника")
+    status: str = Field(..., description="accepted или flagged (принята с пометкой для проверки)")
+    weight: int = Field(..., description="Число записей участника")
+    flags: List[str] = Field(default=[], description="Проверки, пометившие заявку: user, source, cluster")
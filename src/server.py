@@ -0,0 +1,107 @@
+# Запуск приложения в продакшене: несколько воркеров uvicorn без автоперезагрузки
+#
+#     python -m src.server
+
+import importlib.util
+import logging
+import os
+import shutil
+import tempfile
+from typing import Any, Dict, Optional
+
+import uvicorn
+
+from src.core.config import settings
+from src.core.logging import setup_logging
+from src.core.metrics import MULTIPROC_DIR_ENV
+
+logger = logging.getLogger(__name__)
+
+APP = "src.main:app"
+
+
+def _cgroup_cpu_limit() -> Optional[float]:
+    # Лимит CPU контейнера (cgroup v2): "max 100000" или "200000 100000"
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+    except (OSError, ValueError):
+        return None
+    if quota == "max":
+        return None
+    return int(quota) / int(period)
+
+
+def available_cpus() -> int:
+    """Число доступных процессу CPU с учетом привязки к ядрам и лимита контейнера"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    limit = _cgroup_cpu_limit()
+    if limit is not None:
+        cpus = min(cpus, max(1, int(limit)))
+    return cpus
+
+
+def worker_count() -> int:
+    if settings.SERVER_WORKERS > 0:
+        return settings.SERVER_WORKERS
+    return max(1, min(available_cpus(), settings.SERVER_MAX_WORKERS))
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def server_options(workers: int) -> Dict[str, Any]:
+    """Параметры uvicorn.run для продакшена"""
+    return {
+        "host": settings.SERVER_HOST,
+        "port": settings.APP_PORT,
+        "workers": workers,
+        "loop": "uvloop" if _installed("uvloop") else "asyncio",
+        "http": "httptools" if _installed("httptools") else "h11",
+        "backlog": settings.SERVER_BACKLOG,
+        "timeout_keep_alive": settings.SERVER_KEEPALIVE_SECONDS,
+        "timeout_graceful_shutdown": settings.SERVER_GRACEFUL_TIMEOUT_SECONDS,
+        "limit_concurrency": settings.SERVER_LIMIT_CONCURRENCY,
+        "proxy_headers": True,
+        "forwarded_allow_ips": settings.SERVER_FORWARDED_ALLOW_IPS,
+        "access_log": settings.SERVER_ACCESS_LOG,
+        # Логирование настраивает само приложение (setup_logging), в т.ч. логи uvicorn
+        "log_config": None,
+    }
+
+
+def _prepare_metrics_dir(workers: int) -> None:
+    # Воркеры пишут метрики в общий каталог, /metrics суммирует их (core/metrics.py).
+    # Каталог должен быть пустым при запуске: старые файлы - значения прошлых процессов
+    if workers <= 1:
+        return
+    path = os.environ.get(MULTIPROC_DIR_ENV)
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+    else:
+        os.environ[MULTIPROC_DIR_ENV] = tempfile.mkdtemp(prefix="prometheus-")
+
+
+def main():
+    setup_logging()
+    workers = worker_count()
+    # Воркеры получают фактическое число процессов: по нему делятся лимиты проверки заявок
+    os.environ["SERVER_WORKERS"] = str(workers)
+    _prepare_metrics_dir(workers)
+    options = server_options(workers)
+    connections = workers * (settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW)
+    logger.info(
+        f"Запуск {APP}: воркеров {workers}, loop {options['loop']}, http {options['http']}, "
+        f"keep-alive {options['timeout_keep_alive']} с, backlog {options['backlog']}, "
+        f"до {connections} соединений с БД"
+    )
+    uvicorn.run(APP, **options)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# Допуск заявок в розыгрыш с лимитом участников
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from src.core.config import settings
+from src.db.models.raffle import Raffle
+from src.services.participant_counter import participant_total, try_increment
+
+# Причины, по которым розыгрыш закрыт для заявок в кеше быстрого пути
+CLOSED_FULL = "full"
+CLOSED_INACTIVE = "inactive"
+
+
+@dataclass(frozen=True)
+class Reservation:
+    """
+    Место участника, занятое в счетчике в текущей транзакции.
+
+    Действует до фиксации: откат транзакции возвращает место. fills_shard -
+    заявка заняла последнее место своей части; только такие заявки проверяют,
+    не набран ли лимит розыгрыша целиком.
+    """
+
+    raffle_id: str
+    shard: int
+    fills_shard: bool
+
+
+class AdmissionController:
+    """
+    Допуск заявок без блокировки строки розыгрыша.
+
+    Места выдаются разделенным счетчиком (participant_counter): сумма лимитов
+    частей равна max_participants, поэтому параллельные заявки не превысят лимит.
+    Набранный или неактивный розыгрыш запоминается в памяти процесса на closed_ttl
+    секунд, и следующие заявки отклоняются без обращения к БД. Другие воркеры
+    узнают о повторном открытии (новый лимит, активация) по истечении closed_ttl.
+
+    Кеш у каждого воркера свой и общим быть не должен: он только экономит запросы.
+    Лимит соблюдается счетчиком в БД, так что число воркеров на корректность не
+    влияет - каждый воркер закрывает розыгрыш у себя после первого отказа счетчика.
+    """
+
+    def __init__(self, closed_ttl: float = 30.0):
+        self.closed_ttl = closed_ttl
+        self._closed: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def closed_reason(self, raffle_id: str) -> Optional[str]:
+        """Быстрый путь: причина закрытия из кеша или None, если нужно идти в БД"""
+        entry = self._closed.get(raffle_id)
+        if entry is None:
+            return None
+        reason, expires_at = entry
+        if time.monotonic() >= expires_at:
+            with self._lock:
+                if self._closed.get(raffle_id) == entry:
+                    del self._closed[raffle_id]
+            return None
+        return reason
+
+    def close(self, raffle_id: str, reason: str = CLOSED_FULL) -> None:
+        with self._lock:
+            self._closed[raffle_id] = (reason, time.monotonic() + self.closed_ttl)
+
+    def reopen(self, raffle_id: str) -> None:
+        """Сбрасывает кеш после активации или изменения max_participants"""
+        with self._lock:
+            self._closed.pop(raffle_id, None)
+
+    def reserve(self, db: Session, raffle: Raffle) -> Optional[Reservation]:
+        """Занимает место участника; None - мест нет, розыгрыш запоминается как набранный"""
+        slot = try_increment(db, raffle)
+        if slot is None:
+            self.close(raffle.id, CLOSED_FULL)
+            return None
+        return Reservation(raffle.id, slot.shard, slot.fills_shard)
+
+    def limit_reached(self, db: Session, raffle: Raffle, reservation: Reservation) -> bool:
+        """
+        Вызывается после фиксации заявки: заняла ли она последнее место розыгрыша.
+
+        Сумма частей читается только заявками, заполнившими свою часть, - не больше
+        PARTICIPANT_COUNTER_SHARDS раз за розыгрыш.
+        """
+        if raffle.max_participants is None or not reservation.fills_shard:
+            return False
+        if participant_total(db, raffle) < raffle.max_participants:
+            return False
+        self.close(raffle.id, CLOSED_FULL)
+        return True
+
+
+_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController(closed_ttl=settings.ADMISSION_CLOSED_TTL_SECONDS)
+    return _controller
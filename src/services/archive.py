@@ -0,0 +1,205 @@
+# Архив завершенных розыгрышей: перенос из горячих таблиц в сжатое хранение и чтение обратно
+
+import json
+import logging
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Iterator, Optional, Tuple
+
+from sqlalchemy import delete, inspect, select
+from sqlalchemy.orm import Session
+
+from src.core.config import settings
+from src.core.tracing import continue_trace, set_span_attribute
+from src.db.models.raffle import Raffle, RaffleArchive, RaffleCounterShard, RaffleParticipant, RaffleStatus
+from src.services.blacklist import clear_raffle_blacklist
+from src.services.draw import STREAM_BATCH_SIZE, stream_participant_records, stream_participants
+
+logger = logging.getLogger(__name__)
+
+# Версия формата raffle_data и participants_data:
+# 1 - участник [user_id, weight, flags], 2 - добавлена причина исключения
+ARCHIVE_FORMAT = 2
+
+ARCHIVABLE_STATUSES = (RaffleStatus.COMPLETED, RaffleStatus.CANCELLED)
+
+_DATETIME_FIELDS = ("start_date", "end_date", "created_at", "updated_at")
+
+# Размер куска сжатых данных при потоковой распаковке участников
+_CHUNK_SIZE = 1 << 16
+
+
+@dataclass(frozen=True)
+class ArchivedRaffle:
+    """Итог переноса: сколько участников и байт до и после сжатия"""
+
+    raffle_id: str
+    participants: int
+    raw_bytes: int
+    stored_bytes: int
+
+
+def _raffle_row(raffle: Raffle) -> dict:
+    row = {column.key: getattr(raffle, column.key) for column in inspect(Raffle).column_attrs}
+    row["status"] = raffle.status.value
+    for field in _DATETIME_FIELDS:
+        if row[field] is not None:
+            row[field] = row[field].isoformat()
+    return row
+
+
+def _compress_participants(db: Session, raffle_id: str) -> Tuple[bytes, int, int]:
+    # JSON lines сжимаются потоком: в памяти только текущая пачка строк и сжатый результат
+    compressor = zlib.compressobj(level=6)
+    chunks = []
+    count = raw = 0
+    rows = db.execute(
+        select(RaffleParticipant.user_id, RaffleParticipant.weight, RaffleParticipant.flags, RaffleParticipant.excluded_reason)
+        .where(RaffleParticipant.raffle_id == raffle_id)
+        .order_by(RaffleParticipant.id)
+        .execution_options(yield_per=STREAM_BATCH_SIZE)
+    )
+    for row in rows:
+        line = json.dumps(list(row), ensure_ascii=False, separators=(",", ":")).encode() + b"\n"
+        raw += len(line)
+        count += 1
+        chunks.append(compressor.compress(line))
+    chunks.append(compressor.flush())
+    return b"".join(chunks), count, raw
+
+
+def archive_raffle(db: Session, raffle: Raffle) -> ArchivedRaffle:
+    """
+    Переносит завершенный или отмененный розыгрыш в raffle_archive одной транзакцией:
+    строка розыгрыша и участники сжимаются, из горячих таблиц удаляются розыгрыш,
+    участники, части счетчика и черный список розыгрыша.
+    """
+    if raffle.status not in ARCHIVABLE_STATUSES:
+        raise ValueError(f"Розыгрыш {raffle.id} в статусе {raffle.status.value} нельзя перенести в архив")
+    # Архивация продолжает трейс создания розыгрыша, как и его завершение
+    with continue_trace("raffle.archive", raffle.trace_context, {"raffle.id": raffle.id}):
+        raffle_json = json.dumps(_raffle_row(raffle), ensure_ascii=False, separators=(",", ":")).encode()
+        raffle_data = zlib.compress(raffle_json, 6)
+        participants_data, participants, participants_raw = _compress_participants(db, raffle.id)
+
+        db.add(RaffleArchive(
+            id=raffle.id,
+            vk_user_id=raffle.vk_user_id,
+            community_id=raffle.community_id,
+            status=raffle.status.value,
+            end_date=raffle.end_date,
+            participants_count=participants,
+            winners=raffle.winners,
+            format=ARCHIVE_FORMAT,
+            raffle_data=raffle_data,
+            participants_data=participants_data,
+        ))
+        for model in (RaffleParticipant, RaffleCounterShard):
+            db.execute(delete(model).where(model.raffle_id == raffle.id).execution_options(synchronize_session=False))
+        clear_raffle_blacklist(db, raffle.id)
+        db.delete(raffle)
+        db.commit()
+
+        result = ArchivedRaffle(
+            raffle_id=raffle.id,
+            participants=participants,
+            raw_bytes=len(raffle_json) + participants_raw,
+            stored_bytes=len(raffle_data) + len(participants_data),
+        )
+        set_span_attribute("raffle.participants", participants)
+        return result
+
+
+def archive_old_raffles(db: Session, now: Optional[datetime] = None) -> int:
+    """
+    Задача планировщика: переносит в архив розыгрыши, завершенные или отмененные
+    больше ARCHIVE_AFTER_DAYS дней назад, не больше ARCHIVE_BATCH_SIZE за проход.
+
+    Returns:
+        Количество перенесенных розыгрышей
+    """
+    now = now or datetime.utcnow()
+    threshold = now - timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+    # created_at <= updated_at, так что условие по created_at ничего не меняет в выборке,
+    # но позволяет Postgres не сканировать секции raffles новее threshold
+    candidates = db.query(Raffle).filter(
+        Raffle.status.in_(ARCHIVABLE_STATUSES),
+        Raffle.updated_at < threshold,
+        Raffle.created_at < threshold
+    ).order_by(Raffle.updated_at).limit(settings.ARCHIVE_BATCH_SIZE).all()
+    raw = stored = 0
+    for raffle in candidates:
+        result = archive_raffle(db, raffle)
+        raw += result.raw_bytes
+        stored += result.stored_bytes
+    if candidates:
+        logger.info(
+            f"В архив перенесено розыгрышей: {len(candidates)}, "
+            f"данные {raw / 2**20:.1f} МБ -> {stored / 2**20:.1f} МБ после сжатия"
+        )
+    return len(candidates)
+
+
+def load_archived_raffle(db: Session, raffle_id: str) -> Optional[Raffle]:
+    """
+    Розыгрыш из архива как несвязанный с сессией объект Raffle (только для чтения).
+    """
+    data = db.execute(select(RaffleArchive.raffle_data).where(RaffleArchive.id == raffle_id)).scalar()
+    if data is None:
+        return None
+    row = json.loads(zlib.decompress(data))
+    row["status"] = RaffleStatus(row["status"])
+    for field in _DATETIME_FIELDS:
+        if row.get(field) is not None:
+            row[field] = datetime.fromisoformat(row[field])
+    return Raffle(**row)
+
+
+def find_raffle(db: Session, raffle_id: str) -> Optional[Raffle]:
+    """Розыгрыш по ID: из raffles, а если его там нет - из архива"""
+    raffle = db.query(Raffle).filter(Raffle.id == raffle_id).first()
+    if raffle is not None:
+        return raffle
+    return load_archived_raffle(db, raffle_id)
+
+
+def is_archived(raffle: Raffle) -> bool:
+    """Объект получен из архива (find_raffle, load_archived_raffle), а не из raffles"""
+    return inspect(raffle).transient
+
+
+def archived_participants(db: Session, raffle_id: str) -> Iterator[Tuple[str, int, Optional[str]]]:
+    """Тройки (user_id, weight в выборе, причина исключения) из архива; данные распаковываются потоком"""
+    data = db.execute(select(RaffleArchive.participants_data).where(RaffleArchive.id == raffle_id)).scalar()
+    if data is None:
+        return
+    decompressor = zlib.decompressobj()
+
+    def chunks() -> Iterator[bytes]:
+        for start in range(0, len(data), _CHUNK_SIZE):
+            yield decompressor.decompress(data[start:start + _CHUNK_SIZE])
+        yield decompressor.flush()
+
+    tail = b""
+    for chunk in chunks():
+        lines = (tail + chunk).split(b"\n")
+        tail = lines.pop()
+        for line in lines:
+            user_id, weight, _, *rest = json.loads(line)
+            excluded_reason = rest[0] if rest else None
+            yield user_id, 0 if excluded_reason else weight, excluded_reason
+
+
+def participant_records(db: Session, raffle: Raffle) -> Iterator[Tuple[str, int, Optional[str]]]:
+    """Участники для выгрузки (user_id, weight в выборе, причина исключения) - из raffle_participants или из архива"""
+    if is_archived(raffle):
+        return archived_participants(db, raffle.id)
+    return iter(stream_participant_records(db, raffle.id))
+
+
+def participant_entries(db: Session, raffle: Raffle) -> Iterator[Tuple[str, int]]:
+    """Участники розыгрыша (user_id, weight в выборе) - из raffle_participants или из архива"""
+    if is_archived(raffle):
+        return ((user_id, weight) for user_id, weight, _ in archived_participants(db, raffle.id))
+    return iter(stream_participants(db, raffle.id))
@@ -0,0 +1,165 @@
+# Черные списки участников: нормализация, массовый импорт и выгрузка, загрузка перед розыгрышем
+
+import logging
+import re
+from typing import FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, delete, exists, or_, select
+from sqlalchemy.orm import Session
+
+from src.db.bulk import insert_ignore
+from src.db.models.blacklist import BlacklistEntry
+from src.db.models.raffle import Raffle
+
+logger = logging.getLogger(__name__)
+
+# Строк в одном INSERT ... ON CONFLICT DO NOTHING при импорте
+IMPORT_BATCH_SIZE = 5000
+
+# Строк, читаемых из курсора за раз при выгрузке
+EXPORT_BATCH_SIZE = 10_000
+
+_PROFILE_URL = re.compile(r"^(?:https?://)?(?:www\.|m\.)?vk\.(?:com|ru)/")
+_VK_ID_TAG = re.compile(r"^id(\d+)$")
+_USER_REF = re.compile(r"^[a-z0-9_.\-]+$")
+
+
+def normalize_entry(entry: str) -> Optional[str]:
+    """
+    Приводит запись черного списка к виду, в котором она хранится и сравнивается с user_id.
+
+    "@Name", "name", "https://vk.com/name" -> "name"; "@id123", "id123", "vk.com/id123" -> "123".
+    Пустые и некорректные записи дают None.
+    """
+    ref = entry.strip().lower()
+    ref = _PROFILE_URL.sub("", ref).lstrip("@").rstrip("/")
+    match = _VK_ID_TAG.match(ref)
+    if match:
+        ref = match.group(1)
+    if not ref or not _USER_REF.match(ref):
+        return None
+    return ref
+
+
+def normalize_entries(entries: Iterable[str]) -> Tuple[List[str], int]:
+    """
+    Нормализованные записи без повторов (в порядке первого появления) и число некорректных.
+    """
+    refs: List[str] = []
+    seen: Set[str] = set()
+    invalid = 0
+    for entry in entries:
+        ref = normalize_entry(entry)
+        if ref is None:
+            invalid += 1
+        elif ref not in seen:
+            seen.add(ref)
+            refs.append(ref)
+    return refs, invalid
+
+
+def _scope(owner_vk_user_id: str, raffle_id: Optional[str]):
+    if raffle_id is None:
+        return and_(BlacklistEntry.owner_vk_user_id == owner_vk_user_id, BlacklistEntry.raffle_id.is_(None))
+    return BlacklistEntry.raffle_id == raffle_id
+
+
+def import_blacklist(db: Session, owner_vk_user_id: str, entries: Iterable[str], raffle_id: Optional[str] = None) -> Tuple[int, int]:
+    """
+    Массово добавляет записи в черный список владельца (raffle_id=None) или розыгрыша.
+
+    Уже имеющиеся записи пропускаются уникальным индексом, поэтому повторный
+    импорт того же файла ничего не меняет.
+
+    Returns:
+        (добавлено записей, некорректных записей)
+    """
+    refs, invalid = normalize_entries(entries)
+    imported = 0
+    for start in range(0, len(refs), IMPORT_BATCH_SIZE):
+        imported += insert_ignore(db, BlacklistEntry, [
+            {"owner_vk_user_id": owner_vk_user_id, "raffle_id": raffle_id, "user_ref": ref}
+            for ref in refs[start:start + IMPORT_BATCH_SIZE]
+        ])
+    db.commit()
+    scope = f"розыгрыша {raffle_id}" if raffle_id else f"владельца {owner_vk_user_id}"
+    logger.info(f"Черный список {scope}: добавлено {imported} из {len(refs)}, некорректных {invalid}")
+    return imported, invalid
+
+
+def remove_from_blacklist(db: Session, owner_vk_user_id: str, entries: Iterable[str], raffle_id: Optional[str] = None) -> int:
+    """
+    Удаляет записи из черного списка владельца или розыгрыша.
+
+    Returns:
+        Количество удаленных записей
+    """
+    refs, _ = normalize_entries(entries)
+    removed = 0
+    for start in range(0, len(refs), IMPORT_BATCH_SIZE):
+        removed += db.execute(
+            delete(BlacklistEntry)
+            .where(_scope(owner_vk_user_id, raffle_id), BlacklistEntry.user_ref.in_(refs[start:start + IMPORT_BATCH_SIZE]))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+    db.commit()
+    return removed
+
+
+def export_blacklist(db: Session, owner_vk_user_id: str, raffle_id: Optional[str] = None) -> Iterator[str]:
+    """Записи черного списка владельца или розыгрыша, по порядку, без загрузки всего списка в память"""
+    statement = (
+        select(BlacklistEntry.user_ref)
+        .where(_scope(owner_vk_user_id, raffle_id))
+        .order_by(BlacklistEntry.user_ref)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    for (ref,) in db.execute(statement):
+        yield ref
+
+
+def sync_raffle_blacklist(db: Session, raffle: Raffle, previous: Iterable[str] = ()) -> None:
+    """
+    Переносит blacklist_participants розыгрыша в таблицу черного списка.
+
+    previous - прежнее значение поля при обновлении: записи, которых больше нет
+    в поле, удаляются из списка розыгрыша; добавленные через импорт остаются.
+    """
+    current, _ = normalize_entries(raffle.blacklist_participants or ())
+    dropped = set(normalize_entries(previous)[0]) - set(current)
+    if dropped:
+        remove_from_blacklist(db, raffle.vk_user_id, dropped, raffle_id=raffle.id)
+    if current:
+        import_blacklist(db, raffle.vk_user_id, current, raffle_id=raffle.id)
+
+
+def clear_raffle_blacklist(db: Session, raffle_id: str) -> None:
+    """Удаляет черный список розыгрыша вместе с ним; фиксация - в транзакции вызывающего"""
+    db.execute(delete(BlacklistEntry).where(BlacklistEntry.raffle_id == raffle_id).execution_options(synchronize_session=False))
+
+
+def _applicable(raffle: Raffle):
+    # Записи владельца на все розыгрыши и записи самого розыгрыша; каждую часть
+    # условия обслуживает свой частичный уникальный индекс
+    return or_(_scope(raffle.vk_user_id, None), _scope(raffle.vk_user_id, raffle.id))
+
+
+def load_blacklist(db: Session, raffle: Raffle) -> FrozenSet[str]:
+    """
+    Черный список, действующий для розыгрыша, одним запросом перед проверкой участников.
+
+    Возвращается точное множество, а не фильтр Блума: списки - тысячи записей,
+    и ложное срабатывание несправедливо исключило бы участника.
+    Поле blacklist_participants учитывается на случай записей, еще не перенесенных в таблицу.
+    """
+    refs = set(db.execute(select(BlacklistEntry.user_ref).where(_applicable(raffle))).scalars())
+    refs.update(normalize_entries(raffle.blacklist_participants or ())[0])
+    return frozenset(refs)
+
+
+def is_blacklisted(db: Session, raffle: Raffle, user_id: str) -> bool:
+    """Проверка одного участника при приеме заявки: поиск по уникальному индексу"""
+    ref = normalize_entry(user_id)
+    if ref is None:
+        return False
+    return db.execute(select(exists().where(_applicable(raffle), BlacklistEntry.user_ref == ref))).scalar()
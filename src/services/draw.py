@@ -0,0 +1,181 @@
+# Определение победителей розыгрыша
+
+import hashlib
+import heapq
+import hmac
+import math
+import random
+import secrets
+from typing import Collection, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import case, select
+from sqlalchemy.orm import Session
+
+from src.core.tracing import set_span_attribute, traced
+from src.db.models.raffle import Raffle, RaffleParticipant
+from src.utils.weighted_sampler import FenwickSampler
+
+# Версия алгоритма проверяемого розыгрыша; меняется при любом изменении правил выбора.
+# v1 - порядок по (digest, user_id), v2 - взвешенные ключи participant_key. При весах 1
+# порядок v2 совпадает с v1, поэтому розыгрыши, проведенные по v1, проверяются и по v2
+FAIR_DRAW_ALGORITHM = "hmac-sha256-v2"
+
+# Сколько участников читается из БД за раз при потоковом проходе
+STREAM_BATCH_SIZE = 10_000
+
+
+def new_seed() -> str:
+    """Секретный seed розыгрыша: 32 случайных байта в hex"""
+    return secrets.token_hex(32)
+
+
+def seed_commitment(seed: str) -> str:
+    """Обязательство по seed: SHA-256 от строки seed (echo -n <seed> | sha256sum)"""
+    return hashlib.sha256(seed.encode()).hexdigest()
+
+
+def commit_seed(raffle: Raffle) -> None:
+    """
+    Фиксирует seed розыгрыша при переводе в ACTIVE.
+
+    Публикуется только хеш; сам seed раскрывается после завершения. Повторная
+    активация (например, после паузы) seed не меняет.
+    """
+    if raffle.draw_seed is None:
+        raffle.draw_seed = new_seed()
+        raffle.draw_seed_hash = seed_commitment(raffle.draw_seed)
+
+
+def entry_weight(raffle: Raffle, subscriptions: Collection[str]) -> int:
+    """
+    Число записей участника: одна основная и bonus_entries за каждое обязательное
+    сообщество или партнера из raffle, на которых он подписан.
+    """
+    if not raffle.bonus_entries:
+        return 1
+    tags = set(raffle.required_communities or ()) | set(raffle.partner_tags or ())
+    return 1 + raffle.bonus_entries * len(tags.intersection(subscriptions))
+
+
+def participant_key(seed: str, user_id: str, weight: int = 1) -> Tuple[float, bytes, str]:
+    """
+    Место участника в каноническом порядке.
+
+    digest = HMAC-SHA256(ключ = seed, сообщение = user_id), u - старшие 53 бита digest,
+    деленные на 2^53; ключ - (-log1p(-u) / weight, digest, user_id). Первые k ключей -
+    взвешенная выборка без повторов (Efraimidis-Spirakis); при весах 1 порядок
+    совпадает с порядком digest.
+    """
+    digest = hmac.new(bytes.fromhex(seed), user_id.encode(), hashlib.sha256).digest()
+    return _weighted_key(digest, weight), digest, user_id
+
+
+def _weighted_key(digest: bytes, weight: int) -> float:
+    # 53 бита помещаются в double без округления, поэтому u < 1 и логарифм определен
+    return -math.log1p(-(int.from_bytes(digest[:8], "big") >> 11) / 2 ** 53) / weight
+
+
+def select_winners(seed: str, entries: Iterable[Tuple[str, int]], winners_count: int) -> List[str]:
+    """
+    Детерминированный выбор победителей по seed.
+
+    entries - пары (user_id, weight). Участники с весом 0 не участвуют, остальные
+    упорядочиваются по participant_key, победители - первые winners_count. Порядок выборки из БД на результат не влияет,
+    а проход потоковый: в памяти держится только winners_count лучших, O(n log k).
+    """
+    keyed = hmac.new(bytes.fromhex(seed), digestmod=hashlib.sha256)
+
+    def key(entry: Tuple[str, int]):
+        # То же, что participant_key, без повторной подготовки ключа HMAC для каждого участника
+        user_id, weight = entry
+        mac = keyed.copy()
+        mac.update(user_id.encode())
+        digest = mac.digest()
+        return _weighted_key(digest, weight), digest, user_id
+
+    weighted = (entry for entry in entries if entry[1] > 0)
+    return [user_id for user_id, _ in heapq.nsmallest(winners_count, weighted, key=key)]
+
+
+# Число записей, с которым участник входит в выбор победителей: исключенные - с весом 0
+DRAW_WEIGHT = case((RaffleParticipant.excluded_reason.isnot(None), 0), else_=RaffleParticipant.weight)
+
+
+def stream_participants(db: Session, raffle_id: str, batch_size: int = STREAM_BATCH_SIZE) -> Iterator[Tuple[str, int]]:
+    """Пары (user_id, weight в выборе) без загрузки всего списка в память (серверный курсор на Postgres)"""
+    return db.execute(
+        select(RaffleParticipant.user_id, DRAW_WEIGHT)
+        .where(RaffleParticipant.raffle_id == raffle_id)
+        .execution_options(yield_per=batch_size)
+    ).tuples()
+
+
+def stream_participant_records(
+    db: Session, raffle_id: str, batch_size: int = STREAM_BATCH_SIZE
+) -> Iterator[Tuple[str, int, Optional[str]]]:
+    """Тройки (user_id, weight в выборе, причина исключения) для выгрузки участников"""
+    return db.execute(
+        select(RaffleParticipant.user_id, DRAW_WEIGHT, RaffleParticipant.excluded_reason)
+        .where(RaffleParticipant.raffle_id == raffle_id)
+        .execution_options(yield_per=batch_size)
+    ).tuples()
+
+
+def replay_draw(db: Session, raffle: Raffle, entries: Optional[Iterable[Tuple[str, int]]] = None) -> Tuple[List[str], int]:
+    """
+    Повторяет проверяемый выбор победителей по раскрытому seed.
+
+    entries - участники (user_id, weight), если они читаются не из raffle_participants
+    (например, из архива); по умолчанию - поток из БД.
+
+    Returns:
+        Победители и число участников, прочитанных при повторном выборе
+    """
+    counted = 0
+
+    def counting(entries: Iterable[Tuple[str, int]]) -> Iterator[Tuple[str, int]]:
+        nonlocal counted
+        for entry in entries:
+            counted += 1
+            yield entry
+
+    if entries is None:
+        entries = stream_participants(db, raffle.id)
+    winners = select_winners(raffle.draw_seed, counting(entries), raffle.winners_count)
+    return winners, counted
+
+
+@traced("raffle.draw")
+def draw_winners(db: Session, raffle: Raffle, rng: Optional[random.Random] = None) -> List[str]:
+    """
+    Выбирает победителей без повторов, с вероятностью пропорционально числу записей участника.
+
+    Если при активации был зафиксирован seed, выбор проверяемый (select_winners)
+    и rng не используется; иначе - случайная выборка, как для розыгрышей,
+    активированных до появления проверяемого режима: равновероятная, а при
+    бонусных записях - по дереву Фенвика за O(k log n).
+
+    Args:
+        db: Сессия базы данных
+        raffle: Розыгрыш
+        rng: Генератор случайных чисел (по умолчанию системный, random.SystemRandom)
+
+    Returns:
+        VK user ID победителей; если участников меньше winners_count, победителями становятся все
+    """
+    set_span_attribute("raffle.id", raffle.id)
+    if raffle.draw_seed is not None:
+        set_span_attribute("raffle.draw_algorithm", FAIR_DRAW_ALGORITHM)
+        return select_winners(raffle.draw_seed, stream_participants(db, raffle.id), raffle.winners_count)
+
+    rows = db.execute(
+        select(RaffleParticipant.user_id, RaffleParticipant.weight)
+        .where(RaffleParticipant.raffle_id == raffle.id, RaffleParticipant.excluded_reason.is_(None))
+        .order_by(RaffleParticipant.id)
+    ).all()
+    set_span_attribute("raffle.participants", len(rows))
+    rng = rng or random.SystemRandom()
+    if all(row.weight == 1 for row in rows):
+        return [row.user_id for row in rng.sample(rows, min(raffle.winners_count, len(rows)))]
+    sampler = FenwickSampler([row.weight for row in rows])
+    return [rows[index].user_id for index in sampler.sample(raffle.winners_count, rng)]
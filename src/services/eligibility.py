@@ -0,0 +1,239 @@
+# Проверка условий участия в розыгрыше
+
+import logging
+from dataclasses import dataclass
+from typing import AbstractSet, Dict, FrozenSet, Iterable, Iterator, List, Optional, Protocol, Sequence, Set, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from src.core.tracing import set_span_attribute, traced
+from src.db.models.raffle import Raffle, RaffleParticipant
+from src.services.blacklist import normalize_entries
+from src.services.draw import stream_participants
+
+logger = logging.getLogger(__name__)
+
+# Сколько участников проверяется за один проход операций над множествами
+ELIGIBILITY_BATCH_SIZE = 10_000
+
+# Размер пачки user_id в UPDATE ... WHERE user_id IN (...)
+UPDATE_BATCH_SIZE = 1000
+
+class MembershipSource(Protocol):
+    """
+    Источник данных о подписках и администраторах.
+
+    None означает, что данных о сообществе или канале нет; такое условие
+    пропускается с предупреждением, а не исключает всех участников.
+    """
+
+    def community_members(self, community: str) -> Optional[AbstractSet[str]]: ...
+
+    def community_admins(self, community: str) -> Optional[AbstractSet[str]]: ...
+
+    def telegram_subscribers(self, channel: str) -> Optional[AbstractSet[str]]: ...
+
+
+class InMemoryMembershipSource:
+    """Подписки и администраторы в словарях множеств (тесты, бенчмарки, ручной импорт)"""
+
+    def __init__(
+        self,
+        members: Optional[Dict[str, AbstractSet[str]]] = None,
+        admins: Optional[Dict[str, AbstractSet[str]]] = None,
+        telegram: Optional[Dict[str, AbstractSet[str]]] = None,
+    ):
+        self.members = members or {}
+        self.admins = admins or {}
+        self.telegram = telegram or {}
+
+    def community_members(self, community: str) -> Optional[AbstractSet[str]]:
+        return self.members.get(community)
+
+    def community_admins(self, community: str) -> Optional[AbstractSet[str]]:
+        return self.admins.get(community)
+
+    def telegram_subscribers(self, channel: str) -> Optional[AbstractSet[str]]:
+        return self.telegram.get(channel)
+
+
+_source: Optional[MembershipSource] = None
+
+
+def set_membership_source(source: Optional[MembershipSource]) -> None:
+    """Подключает источник подписок (None - проверяются только черный список и exclude_me)"""
+    global _source
+    _source = source
+
+
+def get_membership_source() -> Optional[MembershipSource]:
+    return _source
+
+
+def blacklist_ids(entries: Iterable[str]) -> FrozenSet[str]:
+    """
+    Идентификаторы из черного списка в том виде, в каком они сравниваются с user_id.
+
+    Записи нормализуются как в таблице черного списка: "@Name" дает "name",
+    "@id123" или "vk.com/id123" - "123".
+    """
+    return frozenset(normalize_entries(entries)[0])
+
+
+@dataclass(frozen=True)
+class RuleSet:
+    """
+    Скомпилированные условия участия розыгрыша.
+
+    required - множества, в каждое из которых должен входить участник (от меньшего
+    к большему, чтобы кандидаты отсеивались как можно раньше); excluded - кто
+    не участвует ни при каких условиях. required_rules и exclusions - имена
+    условий для required и источники excluded: по ним reason объясняет исключение.
+    """
+
+    required: Tuple[AbstractSet[str], ...] = ()
+    excluded: FrozenSet[str] = frozenset()
+    rules: Tuple[str, ...] = ()
+    required_rules: Tuple[str, ...] = ()
+    exclusions: Tuple[Tuple[str, AbstractSet[str]], ...] = ()
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.required and not self.excluded
+
+    def eligible(self, batch: Iterable[str]) -> Set[str]:
+        """Подходящие участники пачки; проверка идет операциями над множествами, а не по одному"""
+        candidates = set(batch)
+        candidates -= self.excluded
+        for members in self.required:
+            if not candidates:
+                break
+            if isinstance(members, (set, frozenset)):
+                candidates &= members
+            else:
+                candidates = {user_id for user_id in candidates if user_id in members}
+        return candidates
+
+    def filter(self, user_ids: Sequence[str]) -> List[str]:
+        """Подходящие участники в исходном порядке"""
+        eligible = self.eligible(user_ids)
+        return [user_id for user_id in user_ids if user_id in eligible]
+
+    def ineligible(self, user_ids: Iterable[str], batch_size: int = ELIGIBILITY_BATCH_SIZE) -> Iterator[str]:
+        """Неподходящие участники потока, пачками по batch_size"""
+        batch: List[str] = []
+        for user_id in user_ids:
+            batch.append(user_id)
+            if len(batch) >= batch_size:
+                yield from self._rejected(batch)
+                batch = []
+        if batch:
+            yield from self._rejected(batch)
+
+    def reason(self, user_id: str) -> str:
+        """Первое условие, которому не удовлетворяет исключенный участник"""
+        for rule, members in self.exclusions:
+            if user_id in members:
+                return rule
+        for rule, members in zip(self.required_rules, self.required):
+            if user_id not in members:
+                return rule
+        return "ineligible"
+
+    def _rejected(self, batch: List[str]) -> Iterator[str]:
+        eligible = self.eligible(batch)
+        return (user_id for user_id in batch if user_id not in eligible)
+
+
+def compile_rules(
+    raffle: Raffle,
+    source: Optional[MembershipSource] = None,
+    blacklist: Optional[AbstractSet[str]] = None,
+) -> RuleSet:
+    """
+    Собирает условия участия розыгрыша в RuleSet один раз перед проверкой участников.
+
+    Черный список и exclude_me проверяются всегда; подписки и администраторы -
+    только при наличии источника и данных в нем. blacklist - нормализованные записи,
+    загруженные load_blacklist; без него берется поле blacklist_participants.
+    """
+    required: List[Tuple[str, AbstractSet[str]]] = []
+    exclusions: List[Tuple[str, AbstractSet[str]]] = []
+    if blacklist is None:
+        blacklist = blacklist_ids(raffle.blacklist_participants or ())
+    if blacklist:
+        exclusions.append(("blacklist", blacklist))
+    if raffle.exclude_me:
+        exclusions.append(("exclude_me", {raffle.vk_user_id}))
+
+    def lookup(rule: str, method: str, key: Optional[str]) -> Optional[Tuple[str, AbstractSet[str]]]:
+        if source is None or not key:
+            return None
+        members = getattr(source, method)(key)
+        if members is None:
+            logger.warning(f"Розыгрыш {raffle.id}: нет данных для условия {rule} ({key}), условие не проверяется")
+            return None
+        return f"{rule}:{key}", members
+
+    if raffle.require_community_subscription:
+        required.append(lookup("community", "community_members", raffle.community_id))
+    for tag in raffle.required_communities or ():
+        required.append(lookup("required_community", "community_members", tag))
+    if raffle.require_telegram_subscription:
+        required.append(lookup("telegram", "telegram_subscribers", raffle.telegram_channel))
+    if raffle.exclude_admins:
+        exclusions.append(lookup("exclude_admins", "community_admins", raffle.community_id))
+
+    exclusions = [rule for rule in exclusions if rule is not None]
+    required = sorted((rule for rule in required if rule is not None), key=lambda rule: len(rule[1]))
+    excluded: Set[str] = set()
+    for _, members in exclusions:
+        excluded.update(members)
+    return RuleSet(
+        required=tuple(members for _, members in required),
+        excluded=frozenset(excluded),
+        rules=tuple(rule for rule, _ in exclusions + required),
+        required_rules=tuple(rule for rule, _ in required),
+        exclusions=tuple(exclusions),
+    )
+
+
+@traced("raffle.eligibility")
+def apply_eligibility(db: Session, raffle: Raffle, rules: RuleSet, batch_size: int = ELIGIBILITY_BATCH_SIZE) -> int:
+    """
+    Исключает из розыгрыша неподходящих участников: в excluded_reason записывается
+    условие, которому участник не удовлетворяет.
+
+    Строки участников не удаляются и weight не меняется: выгрузка показывает, кто
+    и почему исключен, а в выборе победителей исключенные идут с весом 0, так что
+    повторный выбор дает тот же результат. Выполняется в транзакции выбора
+    победителей; фиксация - на вызывающем.
+
+    Returns:
+        Количество исключенных участников
+    """
+    set_span_attribute("raffle.id", raffle.id)
+    if rules.is_empty:
+        return 0
+    user_ids = (user_id for user_id, weight in stream_participants(db, raffle.id) if weight > 0)
+    by_reason: Dict[str, List[str]] = {}
+    for user_id in rules.ineligible(user_ids, batch_size):
+        by_reason.setdefault(rules.reason(user_id), []).append(user_id)
+    for reason, rejected in by_reason.items():
+        for start in range(0, len(rejected), UPDATE_BATCH_SIZE):
+            db.execute(
+                update(RaffleParticipant)
+                .where(
+                    RaffleParticipant.raffle_id == raffle.id,
+                    RaffleParticipant.user_id.in_(rejected[start:start + UPDATE_BATCH_SIZE]),
+                )
+                .values(excluded_reason=reason)
+                .execution_options(synchronize_session=False)
+            )
+    excluded = sum(len(rejected) for rejected in by_reason.values())
+    set_span_attribute("raffle.ineligible", excluded)
+    if excluded:
+        counts = ", ".join(f"{reason}: {len(rejected)}" for reason, rejected in by_reason.items())
+        logger.info(f"Розыгрыш {raffle.id}: исключено участников по условиям {counts}")
+    return excluded
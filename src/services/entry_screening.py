@@ -0,0 +1,242 @@
+# Проверка заявок на участие при приеме: частота по пользователю и источнику, похожие аккаунты
+
+import hashlib
+import math
+import operator
+import re
+import threading
+import time
+from array import array
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from src.core.config import settings
+from src.core.metrics import Counter
+
+ACCEPT = "accept"
+FLAG = "flag"
+REJECT = "reject"
+
+ENTRY_SCREENING = Counter(
+    "raffle_entry_screening_total", "Результаты проверки заявок на участие", ("verdict",))
+
+# Блок подряд идущих VK ID: аккаунты, зарегистрированные пачкой, получают близкие номера
+ID_BLOCK_BITS = 10
+
+_NAME_SUFFIX = re.compile(r"[\d_.\-]+$")
+
+
+class CountMinSketch:
+    """
+    Приблизительные счетчики ключей в фиксированной памяти: depth строк по width ячеек.
+
+    Оценка никогда не меньше истинного значения; при N добавлениях ошибка с высокой
+    вероятностью не больше 2N/width. Ячейки только увеличиваются на count, поэтому
+    скетч с теми же размерами можно вычесть из другого (subtract) - на этом
+    построено скользящее окно.
+    """
+
+    def __init__(self, width: int = 1 << 15, depth: int = 4):
+        if not 1 <= depth <= 16:
+            raise ValueError("depth должен быть от 1 до 16")
+        self.width = 1 << max(width - 1, 1).bit_length()
+        self.depth = depth
+        self._mask = self.width - 1
+        self._rows = [array("I", bytes(4 * self.width)) for _ in range(depth)]
+
+    def indexes(self, key: str) -> List[int]:
+        # Один вызов blake2b на ключ: по 4 байта дайджеста на строку
+        digest = hashlib.blake2b(key.encode(), digest_size=4 * self.depth).digest()
+        mask = self._mask
+        return [int.from_bytes(digest[offset:offset + 4], "little") & mask for offset in range(0, 4 * self.depth, 4)]
+
+    def add_at(self, indexes: List[int], count: int = 1) -> int:
+        estimate = None
+        for row, index in zip(self._rows, indexes):
+            value = row[index] + count
+            row[index] = value
+            if estimate is None or value < estimate:
+                estimate = value
+        return estimate
+
+    def estimate_at(self, indexes: List[int]) -> int:
+        return min(row[index] for row, index in zip(self._rows, indexes))
+
+    def add(self, key: str, count: int = 1) -> int:
+        """Добавляет count к ключу и возвращает новую оценку"""
+        return self.add_at(self.indexes(key), count)
+
+    def estimate(self, key: str) -> int:
+        return self.estimate_at(self.indexes(key))
+
+    def subtract(self, other: "CountMinSketch") -> None:
+        """Вычитает счетчики другого скетча тех же размеров, в который добавлялось подмножество событий"""
+        for index, (row, other_row) in enumerate(zip(self._rows, other._rows)):
+            self._rows[index] = array("I", map(operator.sub, row, other_row))
+
+    def clear(self) -> None:
+        for index in range(self.depth):
+            self._rows[index] = array("I", bytes(4 * self.width))
+
+    def nbytes(self) -> int:
+        return sum(row.itemsize * len(row) for row in self._rows)
+
+
+class SlidingWindowCounter:
+    """
+    Счетчики событий за последние window секунд.
+
+    Окно делится на buckets интервалов со своими скетчами; общий скетч окна
+    хранит их сумму. Событие добавляется в текущий интервал и в окно, а при смене
+    интервала самый старый вычитается из окна и обнуляется - оценка за окно
+    стоит одного поиска по depth ячейкам. Точность границы окна - window / buckets.
+    """
+
+    def __init__(self, window: float, buckets: int = 6, width: int = 1 << 15, depth: int = 4):
+        self.window = window
+        self.bucket_seconds = window / buckets
+        self._buckets = [CountMinSketch(width, depth) for _ in range(buckets)]
+        self._total = CountMinSketch(width, depth)
+        self._slot: Optional[int] = None
+
+    def _advance(self, now: float) -> CountMinSketch:
+        slot = int(now // self.bucket_seconds)
+        buckets = len(self._buckets)
+        if self._slot is None or slot - self._slot >= buckets:
+            for bucket in self._buckets:
+                bucket.clear()
+            self._total.clear()
+        elif slot > self._slot:
+            for expired in range(self._slot + 1, slot + 1):
+                bucket = self._buckets[expired % buckets]
+                self._total.subtract(bucket)
+                bucket.clear()
+        if self._slot is None or slot > self._slot:
+            self._slot = slot
+        return self._buckets[self._slot % buckets]
+
+    def add(self, key: str, now: float) -> int:
+        """Учитывает событие и возвращает оценку числа событий ключа за окно"""
+        bucket = self._advance(now)
+        indexes = self._total.indexes(key)
+        bucket.add_at(indexes)
+        return self._total.add_at(indexes)
+
+    def estimate(self, key: str, now: float) -> int:
+        self._advance(now)
+        return self._total.estimate(key)
+
+    def nbytes(self) -> int:
+        return self._total.nbytes() + sum(bucket.nbytes() for bucket in self._buckets)
+
+
+def account_cluster(user_id: str) -> Optional[str]:
+    """
+    Группа похожих аккаунтов: блок соседних числовых VK ID или основа короткого
+    имени без числового хвоста ("bot_123", "bot124" -> "bot"). None - признака нет.
+    """
+    if user_id.isdigit():
+        return f"id:{int(user_id) >> ID_BLOCK_BITS}"
+    stem = _NAME_SUFFIX.sub("", user_id.lower())
+    if stem != user_id.lower() and len(stem) >= 3:
+        return f"name:{stem}"
+    return None
+
+
+@dataclass(frozen=True)
+class Screening:
+    """Решение по заявке: accept, flag (принять с пометкой) или reject; reasons - сработавшие проверки"""
+
+    verdict: str
+    reasons: Tuple[str, ...] = ()
+
+
+class EntryScreener:
+    """
+    Проверка заявок без обращения к БД: все счетчики в памяти процесса.
+
+    - user: сколько заявок пользователь подал за окно во все розыгрыши;
+    - source: сколько заявок пришло с одного источника (IP, клиент);
+    - cluster: сколько заявок в розыгрыш пришло от похожих аккаунтов (account_cluster).
+
+    Превышение лимита - пометка, превышение в reject_factor раз - отказ.
+    Счетчики у каждого воркера свои, поэтому лимиты действуют на процесс;
+    get_entry_screener делит лимиты сервиса между воркерами (worker_limit).
+    """
+
+    def __init__(
+        self,
+        window: float = 60.0,
+        user_limit: int = 30,
+        source_limit: int = 120,
+        cluster_limit: int = 20,
+        reject_factor: float = 3.0,
+        width: int = 1 << 15,
+    ):
+        self.limits = {"user": user_limit, "source": source_limit, "cluster": cluster_limit}
+        self.reject_factor = reject_factor
+        self._counters = {check: SlidingWindowCounter(window, width=width) for check in self.limits}
+        self._lock = threading.Lock()
+
+    def screen(self, raffle_id: str, user_id: str, source: Optional[str] = None, now: Optional[float] = None) -> Screening:
+        now = time.monotonic() if now is None else now
+        keys = {"user": user_id, "source": source}
+        cluster = account_cluster(user_id)
+        if cluster is not None:
+            keys["cluster"] = f"{raffle_id}:{cluster}"
+
+        flagged: List[str] = []
+        rejected: List[str] = []
+        with self._lock:
+            for check, key in keys.items():
+                if key is None:
+                    continue
+                count = self._counters[check].add(key, now)
+                limit = self.limits[check]
+                if count > limit * self.reject_factor:
+                    rejected.append(check)
+                elif count > limit:
+                    flagged.append(check)
+
+        if rejected:
+            result = Screening(REJECT, tuple(rejected + flagged))
+        elif flagged:
+            result = Screening(FLAG, tuple(flagged))
+        else:
+            result = Screening(ACCEPT)
+        ENTRY_SCREENING.labels(result.verdict).inc()
+        return result
+
+    def nbytes(self) -> int:
+        return sum(counter.nbytes() for counter in self._counters.values())
+
+
+def worker_limit(limit: int, workers: int) -> int:
+    """
+    Доля лимита сервиса на один воркер.
+
+    Соединения распределяются между воркерами примерно поровну, и воркер видит
+    около 1/workers заявок каждого ключа. Клиент, который шлет все заявки по
+    одному keep-alive соединению, попадает в один воркер, и для него лимит строже.
+    """
+    return max(1, math.ceil(limit / max(1, workers)))
+
+
+_screener: Optional[EntryScreener] = None
+
+
+def get_entry_screener() -> Optional[EntryScreener]:
+    """Общий экземпляр с лимитами из настроек (None - проверка выключена)"""
+    global _screener
+    if not settings.ENTRY_SCREENING_ENABLED:
+        return None
+    if _screener is None:
+        workers = settings.SERVER_WORKERS
+        _screener = EntryScreener(
+            window=settings.ENTRY_WINDOW_SECONDS,
+            user_limit=worker_limit(settings.ENTRY_USER_LIMIT, workers),
+            source_limit=worker_limit(settings.ENTRY_SOURCE_LIMIT, workers),
+            cluster_limit=worker_limit(settings.ENTRY_CLUSTER_LIMIT, workers),
+            reject_factor=settings.ENTRY_REJECT_FACTOR,
+        )
+    return _screener
@@ -0,0 +1,232 @@
+# Локальные снимки подписок и администраторов для проверки условий участия
+
+import logging
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from collections.abc import Set as AbstractSetBase
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Protocol, Tuple, Union
+
+from sqlalchemy.orm import Session
+
+from src.core.config import settings
+from src.services.eligibility import get_membership_source, set_membership_source
+
+logger = logging.getLogger(__name__)
+
+# Контейнер блока из 65536 ID: до ARRAY_LIMIT членов - отсортированный array('H')
+# (2 байта на члена), больше - битовая карта на 8 КБ (как в Roaring)
+ARRAY_LIMIT = 4096
+BITMAP_BYTES = 1 << 13
+
+KINDS = ("members", "admins", "telegram")
+
+Container = Union[array, bytearray]
+
+
+def _numeric_id(user_id: str) -> Optional[int]:
+    # Числовые VK ID хранятся в контейнерах; "007" и нецифровые ID - отдельным множеством,
+    # чтобы строка, восстановленная из числа, совпадала с исходной
+    if user_id.isascii() and user_id.isdigit() and (user_id[0] != "0" or user_id == "0"):
+        return int(user_id)
+    return None
+
+
+class CompactIdSet(AbstractSetBase):
+    """
+    Неизменяемое множество VK user ID в стиле Roaring bitmap.
+
+    Числовые ID делятся на блоки по старшим битам (id >> 16); в блоке хранятся
+    младшие 16 бит - отсортированным массивом или битовой картой. Проверка
+    членства - поиск блока в словаре и bisect/проверка бита, единицы микросекунд.
+    """
+
+    __slots__ = ("_containers", "_other", "_size")
+
+    def __init__(self, user_ids: Iterable[str] = ()):
+        blocks: Dict[int, List[int]] = defaultdict(list)
+        other = set()
+        for user_id in user_ids:
+            number = _numeric_id(user_id)
+            if number is None:
+                other.add(user_id)
+            else:
+                blocks[number >> 16].append(number & 0xFFFF)
+
+        self._containers: Dict[int, Container] = {}
+        size = 0
+        for high, lows in blocks.items():
+            lows = sorted(set(lows))
+            size += len(lows)
+            if len(lows) > ARRAY_LIMIT:
+                bitmap = bytearray(BITMAP_BYTES)
+                for low in lows:
+                    bitmap[low >> 3] |= 1 << (low & 7)
+                self._containers[high] = bitmap
+            else:
+                self._containers[high] = array("H", lows)
+        self._other = frozenset(other)
+        self._size = size + len(self._other)
+
+    def __contains__(self, user_id: object) -> bool:
+        if not isinstance(user_id, str):
+            return False
+        number = _numeric_id(user_id)
+        if number is None:
+            return user_id in self._other
+        container = self._containers.get(number >> 16)
+        if container is None:
+            return False
+        low = number & 0xFFFF
+        if isinstance(container, bytearray):
+            return bool(container[low >> 3] >> (low & 7) & 1)
+        index = bisect_left(container, low)
+        return index < len(container) and container[index] == low
+
+    def __iter__(self) -> Iterator[str]:
+        for high in sorted(self._containers):
+            container = self._containers[high]
+            base = high << 16
+            if isinstance(container, bytearray):
+                for byte_index, byte in enumerate(container):
+                    while byte:
+                        bit = (byte & -byte).bit_length() - 1
+                        yield str(base | byte_index << 3 | bit)
+                        byte &= byte - 1
+            else:
+                for low in container:
+                    yield str(base | low)
+        yield from self._other
+
+    def __len__(self) -> int:
+        return self._size
+
+    def nbytes(self) -> int:
+        """Приблизительный объем памяти: контейнеры, словарь блоков и нечисловые ID"""
+        total = sys.getsizeof(self._containers) + sys.getsizeof(self._other)
+        for high, container in self._containers.items():
+            total += sys.getsizeof(container) + sys.getsizeof(high)
+        total += sum(sys.getsizeof(user_id) for user_id in self._other)
+        return total
+
+
+class MembershipLoader(Protocol):
+    """Источник полных списков для обновления снимков (VK API, выгрузки, файлы)"""
+
+    def keys(self, kind: str) -> Iterable[str]:
+        """Сообщества или каналы, для которых есть список вида kind (members, admins, telegram)"""
+        ...
+
+    def load(self, kind: str, key: str) -> Iterable[str]:
+        """VK user ID из списка kind для сообщества или канала key"""
+        ...
+
+
+class FileMembershipLoader:
+    """
+    Списки из файлов: <directory>/<kind>/<сообщество или канал>.txt, по одному ID в строке.
+
+    Локальная замена внешнего сервиса для разработки и тестов.
+    """
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+
+    def keys(self, kind: str) -> Iterable[str]:
+        return sorted(path.stem for path in (self.directory / kind).glob("*.txt"))
+
+    def load(self, kind: str, key: str) -> Iterable[str]:
+        with open(self.directory / kind / f"{key}.txt", encoding="utf-8") as f:
+            for line in f:
+                user_id = line.strip()
+                if user_id:
+                    yield user_id
+
+
+class MembershipSnapshotStore:
+    """
+    Снимки подписок и администраторов в памяти процесса (реализует MembershipSource).
+
+    refresh() перечитывает все списки загрузчика и подменяет снимки целиком, поэтому
+    проверки во время обновления видят либо старые, либо новые данные.
+    """
+
+    def __init__(self, loader: MembershipLoader, max_age: float = 3600.0):
+        self.loader = loader
+        self.max_age = max_age
+        self.refreshed_at: Optional[float] = None
+        self._snapshots: Dict[Tuple[str, str], CompactIdSet] = {}
+
+    def refresh(self) -> None:
+        started = time.perf_counter()
+        snapshots = {
+            (kind, key): CompactIdSet(self.loader.load(kind, key))
+            for kind in KINDS
+            for key in self.loader.keys(kind)
+        }
+        self._snapshots = snapshots
+        self.refreshed_at = time.monotonic()
+        members = sum(len(snapshot) for snapshot in snapshots.values())
+        memory = sum(snapshot.nbytes() for snapshot in snapshots.values())
+        logger.info(
+            f"Снимки подписок обновлены за {time.perf_counter() - started:.2f} с: списков {len(snapshots)}, "
+            f"ID {members}, память {memory / 2**20:.1f} МБ"
+        )
+
+    def refresh_if_stale(self) -> bool:
+        if self.refreshed_at is not None and time.monotonic() - self.refreshed_at < self.max_age:
+            return False
+        self.refresh()
+        return True
+
+    def community_members(self, community: str) -> Optional[CompactIdSet]:
+        return self._snapshots.get(("members", community))
+
+    def community_admins(self, community: str) -> Optional[CompactIdSet]:
+        return self._snapshots.get(("admins", community))
+
+    def telegram_subscribers(self, channel: str) -> Optional[CompactIdSet]:
+        return self._snapshots.get(("telegram", channel))
+
+    def is_member(self, user_id: str, communities: Iterable[str]) -> bool:
+        """Подписан ли пользователь на все сообщества; сообщество без снимка считается неподписанным"""
+        for community in communities:
+            snapshot = self.community_members(community)
+            if snapshot is None or user_id not in snapshot:
+                return False
+        return True
+
+    def footprint(self) -> List[dict]:
+        """Объем памяти по спискам, в том числе в пересчете на миллион ID"""
+        return [
+            {
+                "kind": kind,
+                "key": key,
+                "members": len(snapshot),
+                "bytes": snapshot.nbytes(),
+                "bytes_per_million": round(snapshot.nbytes() / len(snapshot) * 1_000_000) if len(snapshot) else 0,
+            }
+            for (kind, key), snapshot in sorted(self._snapshots.items())
+        ]
+
+
+def setup_membership() -> Optional[MembershipSnapshotStore]:
+    """Подключает снимки из MEMBERSHIP_SNAPSHOT_DIR как источник для проверки условий участия"""
+    if not settings.MEMBERSHIP_SNAPSHOT_DIR:
+        return None
+    store = MembershipSnapshotStore(
+        FileMembershipLoader(settings.MEMBERSHIP_SNAPSHOT_DIR),
+        max_age=settings.MEMBERSHIP_REFRESH_SECONDS,
+    )
+    set_membership_source(store)
+    return store
+
+
+def refresh_membership(db: Session) -> None:
+    """Задача планировщика: обновляет снимки, если они старше MEMBERSHIP_REFRESH_SECONDS"""
+    source = get_membership_source()
+    if isinstance(source, MembershipSnapshotStore):
+        source.refresh_if_stale()
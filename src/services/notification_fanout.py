@@ -0,0 +1,138 @@
+# Рассылка уведомлений о завершении розыгрыша
+
+import logging
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from src.core.tracing import set_span_attribute, traced
+from src.db.models.notification import Notification, NotificationType, UserNotificationSettings
+from src.db.models.raffle import Raffle, RaffleParticipant
+from src.schemas.notification_card import CompletedNotificationCard, encode_card_payload
+
+logger = logging.getLogger(__name__)
+
+# Размер пачки для INSERT и для выборки настроек через IN (...)
+FANOUT_BATCH_SIZE = 1000
+
+DEFAULT_REASON_END = "Истекло время проведения розыгрыша."
+
+
+def _chunked(items: Sequence, size: int) -> Iterator[Sequence]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _card_raffle_id(raffle_id: str):
+    # В карточках числовые ID розыгрышей передаются числом
+    return int(raffle_id) if raffle_id.isdigit() else raffle_id
+
+
+def resolve_recipients(db: Session, raffle: Raffle, winners: Iterable[str]) -> Dict[str, bool]:
+    """
+    Собирает получателей уведомлений о завершении розыгрыша.
+
+    Returns:
+        Словарь {user_id: является ли победителем}. В него входят владелец
+        розыгрыша, все участники и победители.
+    """
+    recipients: Dict[str, bool] = {raffle.vk_user_id: False}
+    participant_ids = db.execute(
+        select(RaffleParticipant.user_id).where(RaffleParticipant.raffle_id == raffle.id)
+    ).scalars()
+    for user_id in participant_ids:
+        recipients.setdefault(user_id, False)
+    for user_id in winners:
+        recipients[user_id] = True
+    return recipients
+
+
+def load_notification_preferences(
+    db: Session,
+    user_ids: Sequence[str],
+    batch_size: int = FANOUT_BATCH_SIZE,
+) -> Dict[str, Tuple[bool, bool]]:
+    """
+    Загружает настройки win_notify/finish_notify пачками, без запроса на каждого пользователя.
+
+    Returns:
+        Словарь {user_id: (win_notify, finish_notify)} только для пользователей,
+        у которых настройки сохранены; для остальных действуют значения по умолчанию.
+    """
+    preferences: Dict[str, Tuple[bool, bool]] = {}
+    for chunk in _chunked(user_ids, batch_size):
+        rows = db.execute(
+            select(
+                UserNotificationSettings.user_id,
+                UserNotificationSettings.win_notify,
+                UserNotificationSettings.finish_notify,
+            ).where(UserNotificationSettings.user_id.in_(chunk))
+        )
+        for user_id, win_notify, finish_notify in rows:
+            preferences[user_id] = (win_notify, finish_notify)
+    return preferences
+
+
+@traced("notifications.fan_out")
+def fan_out_raffle_completion(
+    db: Session,
+    raffle: Raffle,
+    winners: Iterable[str],
+    reason_end: str = DEFAULT_REASON_END,
+    batch_size: int = FANOUT_BATCH_SIZE,
+) -> int:
+    """
+    Создает уведомления о завершении розыгрыша для всех получателей.
+
+    Победители получают уведомление, если у них включен win_notify,
+    владелец и остальные участники — если включен finish_notify.
+    Уведомления записываются пачками по batch_size строк в транзакции
+    завершения розыгрыша; фиксация - на вызывающем.
+
+    Args:
+        db: Сессия базы данных
+        raffle: Завершенный розыгрыш
+        winners: VK user ID победителей
+        reason_end: Причина завершения розыгрыша
+        batch_size: Размер пачки для INSERT
+
+    Returns:
+        Количество созданных уведомлений
+    """
+    winners = list(winners)
+    recipients = resolve_recipients(db, raffle, winners)
+    preferences = load_notification_preferences(db, list(recipients), batch_size)
+
+    payload = encode_card_payload(CompletedNotificationCard(
+        type="completed",
+        raffleId=_card_raffle_id(raffle.id),
+        participantsCount=raffle.participants_count,
+        winners=winners,
+        reasonEnd=reason_end,
+        new=True,
+    ))
+    created = 0
+    rows: List[dict] = []
+    for user_id, is_winner in recipients.items():
+        win_notify, finish_notify = preferences.get(user_id, (True, True))
+        if not (win_notify if is_winner else finish_notify):
+            continue
+        rows.append({
+            "type": NotificationType.COMPLETED,
+            "user_id": user_id,
+            "payload": payload,
+            "new": True,
+        })
+        if len(rows) >= batch_size:
+            db.execute(insert(Notification), rows)
+            created += len(rows)
+            rows = []
+    if rows:
+        db.execute(insert(Notification), rows)
+        created += len(rows)
+
+    set_span_attribute("raffle.id", raffle.id)
+    set_span_attribute("notifications.created", created)
+    logger.info(f"Розыгрыш {raffle.id}: создано уведомлений о завершении: {created} (получателей: {len(recipients)})")
+    return created
@@ -0,0 +1,81 @@
+# Массовые операции над уведомлениями пользователя
+
+from typing import List, Optional
+
+from sqlalchemy import delete, func, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from src.db.models.notification import Notification
+from src.utils.pagination import decode_cursor
+
+
+def _scope(user_id: str, ids: Optional[List[int]], before: Optional[str]) -> list:
+    """
+    Условия выборки уведомлений пользователя для массовой операции.
+
+    Args:
+        user_id: VK user ID получателя
+        ids: Конкретные ID уведомлений
+        before: Курсор; затрагиваются уведомления в этой позиции и старше
+
+    Raises:
+        ValueError: Некорректный курсор
+    """
+    conditions = [Notification.user_id == user_id]
+    if ids is not None:
+        conditions.append(Notification.id.in_(ids))
+    if before:
+        created_at, item_id = decode_cursor(before)
+        conditions.append(tuple_(Notification.created_at, Notification.id) <= tuple_(created_at, item_id))
+    return conditions
+
+
+def count_unread(db: Session, user_id: str) -> int:
+    """
+    Количество непрочитанных уведомлений (идет по частичному индексу ix_notifications_user_unread).
+
+    Отдельного счетчика нет: уведомления создают рассылка итогов, API и сиды, и
+    хранимый счетчик пришлось бы менять на каждом из этих путей. Пересчет
+    читает только строки частичного индекса - непрочитанные уведомления одного
+    пользователя, - поэтому его стоимость не растет с длиной ленты.
+    """
+    return db.execute(
+        select(func.count()).select_from(Notification).where(Notification.user_id == user_id, Notification.new == True)
+    ).scalar_one()
+
+
+def mark_read(db: Session, user_id: str, ids: Optional[List[int]] = None, before: Optional[str] = None) -> int:
+    """
+    Отмечает уведомления прочитанными одним UPDATE.
+
+    Если не переданы ни ids, ни before, отмечаются все уведомления пользователя.
+
+    Returns:
+        Количество уведомлений, которые были непрочитанными
+    """
+    result = db.execute(
+        update(Notification)
+        .where(*_scope(user_id, ids, before), Notification.new == True)
+        .values(new=False)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
+
+
+def delete_notifications(db: Session, user_id: str, ids: Optional[List[int]] = None, before: Optional[str] = None) -> int:
+    """
+    Удаляет уведомления одним DELETE.
+
+    Если не переданы ни ids, ни before, удаляются все уведомления пользователя.
+
+    Returns:
+        Количество удаленных уведомлений
+    """
+    result = db.execute(
+        delete(Notification)
+        .where(*_scope(user_id, ids, before))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
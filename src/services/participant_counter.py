@@ -0,0 +1,165 @@
+# Счетчик участников розыгрыша, разделенный на части
+
+import random
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import delete, exists, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from src.core.config import settings
+from src.db.bulk import insert_ignore
+from src.db.models.raffle import Raffle, RaffleCounterShard, RaffleStatus
+from src.services.raffle_partitions import live_created_after
+
+
+class Slot(NamedTuple):
+    """Место, занятое в части счетчика: значение части после увеличения и ее лимит"""
+
+    shard: int
+    count: int
+    capacity: Optional[int]
+
+    @property
+    def fills_shard(self) -> bool:
+        return self.capacity is not None and self.count >= self.capacity
+
+
+def split_capacity(limit: Optional[int], counts: List[int]) -> List[Optional[int]]:
+    """
+    Лимиты частей счетчика: уже набранное плюс поровну от оставшихся мест.
+
+    Сумма лимитов равна limit (или набранному, если оно уже больше), поэтому
+    счетчик не превысит max_participants, сколько бы заявок ни шло параллельно.
+    """
+    if limit is None:
+        return [None] * len(counts)
+    remaining = max(0, limit - sum(counts))
+    base, extra = divmod(remaining, len(counts))
+    return [count + base + (1 if index < extra else 0) for index, count in enumerate(counts)]
+
+
+def _configure(db: Session, raffle: Raffle, shards: int) -> None:
+    insert_ignore(db, RaffleCounterShard, [
+        {"raffle_id": raffle.id, "shard": shard, "count": (raffle.participants_count or 0) if shard == 0 else 0}
+        for shard in range(shards)
+    ])
+    rows = (
+        db.query(RaffleCounterShard)
+        .filter(RaffleCounterShard.raffle_id == raffle.id)
+        .order_by(RaffleCounterShard.shard)
+        .with_for_update()
+        .all()
+    )
+    for row, capacity in zip(rows, split_capacity(raffle.max_participants, [row.count for row in rows])):
+        row.capacity = capacity
+    db.flush()
+
+
+def configure_counter(db: Session, raffle: Raffle, shards: Optional[int] = None) -> None:
+    """
+    Создает части счетчика розыгрыша или перераспределяет лимиты после изменения
+    max_participants. Вызывается при активации и редактировании, не на каждую заявку.
+
+    Участники, набранные до появления частей (participants_count), попадают в часть 0.
+    """
+    _configure(db, raffle, shards or settings.PARTICIPANT_COUNTER_SHARDS)
+    db.commit()
+
+
+def _increment(db: Session, raffle_id: str, shard: int) -> Optional[Slot]:
+    row = db.execute(
+        update(RaffleCounterShard)
+        .where(
+            RaffleCounterShard.raffle_id == raffle_id,
+            RaffleCounterShard.shard == shard,
+            or_(RaffleCounterShard.capacity.is_(None), RaffleCounterShard.count < RaffleCounterShard.capacity),
+        )
+        .values(count=RaffleCounterShard.count + 1)
+        .returning(RaffleCounterShard.count, RaffleCounterShard.capacity)
+        .execution_options(synchronize_session=False)
+    ).first()
+    return Slot(shard, *row) if row else None
+
+
+def try_increment(db: Session, raffle: Raffle) -> Optional[Slot]:
+    """
+    Занимает место в счетчике: увеличивает случайную часть, у которой не исчерпан лимит.
+
+    Блокировка строки части держится до конца транзакции вызывающего; откат
+    освобождает место. Фиксация - на вызывающем.
+
+    Returns:
+        Занятое место или None, если мест больше нет
+    """
+    shards = settings.PARTICIPANT_COUNTER_SHARDS
+    slot = _increment(db, raffle.id, random.randrange(shards))
+    if slot is not None:
+        return slot
+
+    # Случайная часть заполнена, ее нет (розыгрыш активирован до появления частей)
+    # или PARTICIPANT_COUNTER_SHARDS изменился: пробуем части, где еще есть места
+    available = db.execute(
+        select(RaffleCounterShard.shard).where(
+            RaffleCounterShard.raffle_id == raffle.id,
+            or_(RaffleCounterShard.capacity.is_(None), RaffleCounterShard.count < RaffleCounterShard.capacity),
+        )
+    ).scalars().all()
+    if not available and not db.execute(select(exists().where(RaffleCounterShard.raffle_id == raffle.id))).scalar():
+        _configure(db, raffle, shards)
+        return try_increment(db, raffle)
+    for shard in random.sample(available, len(available)):
+        slot = _increment(db, raffle.id, shard)
+        if slot is not None:
+            return slot
+    return None
+
+
+def clear_counter(db: Session, raffle_id: str) -> None:
+    """Удаляет части счетчика розыгрыша (при удалении розыгрыша); фиксация - на вызывающем"""
+    db.execute(
+        delete(RaffleCounterShard)
+        .where(RaffleCounterShard.raffle_id == raffle_id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _shard_total(raffle_id):
+    return select(func.coalesce(func.sum(RaffleCounterShard.count), 0)).where(RaffleCounterShard.raffle_id == raffle_id).scalar_subquery()
+
+
+def participant_total(db: Session, raffle: Raffle) -> int:
+    """Точное число участников: сумма частей (без частей - participants_count)"""
+    total = db.execute(select(func.sum(RaffleCounterShard.count)).where(RaffleCounterShard.raffle_id == raffle.id)).scalar()
+    return raffle.participants_count if total is None else total
+
+
+def sync_participant_count(db: Session, raffle: Raffle) -> int:
+    """Переносит сумму частей в raffles.participants_count одного розыгрыша; фиксация - на вызывающем"""
+    total = participant_total(db, raffle)
+    if total != raffle.participants_count:
+        raffle.participants_count = total
+    return total
+
+
+def sync_participant_counts(db: Session) -> int:
+    """
+    Задача планировщика: переносит суммы частей в participants_count активных розыгрышей
+    одним UPDATE; строки, у которых значение не изменилось, не перезаписываются.
+
+    Returns:
+        Количество обновленных розыгрышей
+    """
+    total = _shard_total(Raffle.id)
+    updated = db.execute(
+        update(Raffle)
+        .where(
+            Raffle.status == RaffleStatus.ACTIVE,
+            Raffle.created_at >= live_created_after(),
+            exists().where(RaffleCounterShard.raffle_id == Raffle.id),
+            Raffle.participants_count != total,
+        )
+        .values(participants_count=total)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return updated
@@ -0,0 +1,127 @@
+# Прием заявок на участие в розыгрыше
+
+import logging
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from src.core.tracing import link_span, set_span_attribute, traced
+from src.db.bulk import insert_ignore
+from src.db.models.raffle import Raffle, RaffleParticipant, RaffleStatus
+from src.services.admission import CLOSED_FULL, CLOSED_INACTIVE, get_admission_controller
+from src.services.blacklist import is_blacklisted
+from src.services.draw import entry_weight
+from src.services.eligibility import get_membership_source
+from src.services.entry_screening import FLAG, REJECT, get_entry_screener
+
+logger = logging.getLogger(__name__)
+
+ENTRY_ACCEPTED = "accepted"
+ENTRY_FLAGGED = "flagged"
+ENTRY_DUPLICATE = "duplicate"
+ENTRY_BLACKLISTED = "blacklisted"
+ENTRY_REJECTED = "rejected"
+ENTRY_CLOSED = "closed"
+ENTRY_FULL = "full"
+ENTRY_NOT_FOUND = "not_found"
+
+# Статусы, из которых розыгрыш уже не вернется к приему заявок
+_FINAL_STATUSES = (RaffleStatus.COMPLETING, RaffleStatus.COMPLETED, RaffleStatus.CANCELLED)
+
+
+@dataclass(frozen=True)
+class EntryResult:
+    """
+    Итог заявки: status - одна из констант ENTRY_*, reasons - сработавшие проверки,
+    limit_reached - заявка заняла последнее место, розыгрыш пора завершать.
+    """
+
+    status: str
+    reasons: Tuple[str, ...] = ()
+    weight: int = 0
+    limit_reached: bool = False
+
+    @property
+    def admitted(self) -> bool:
+        return self.status in (ENTRY_ACCEPTED, ENTRY_FLAGGED)
+
+
+def _subscriptions(raffle: Raffle, user_id: str) -> List[str]:
+    # Подписки для бонусных записей по снимкам; без источника - только основная запись
+    source = get_membership_source()
+    if source is None or not raffle.bonus_entries:
+        return []
+    subscriptions = []
+    for tag in {*(raffle.required_communities or ()), *(raffle.partner_tags or ())}:
+        members = source.community_members(tag)
+        if members is not None and user_id in members:
+            subscriptions.append(tag)
+    return subscriptions
+
+
+@traced("raffle.enter")
+def enter_raffle(db: Session, raffle_id: str, user_id: str, source: Optional[str] = None) -> EntryResult:
+    """
+    Принимает заявку пользователя на участие.
+
+    Сначала заявка проходит проверку частоты и похожих аккаунтов в памяти
+    (entry_screening) - отклоненные заявки не доходят до БД. Затем проверяются
+    статус розыгрыша и черный список, участник записывается с числом записей
+    по подпискам; повторная заявка отсекается уникальным индексом.
+
+    Строка розыгрыша читается с блокировкой FOR SHARE, поэтому заявка не
+    попадает в розыгрыш, который уже перешел в COMPLETING.
+
+    Место выдает AdmissionController в той же транзакции: если мест нет, запись
+    участника откатывается. Набранный или завершенный розыгрыш отклоняет заявки
+    из кеша, без обращения к БД.
+    """
+    set_span_attribute("raffle.id", raffle_id)
+    admission = get_admission_controller()
+    closed = admission.closed_reason(raffle_id)
+    if closed is not None:
+        return EntryResult(ENTRY_FULL if closed == CLOSED_FULL else ENTRY_CLOSED)
+
+    screener = get_entry_screener()
+    screening = screener.screen(raffle_id, user_id, source) if screener else None
+    if screening is not None and screening.verdict == REJECT:
+        logger.warning(f"Розыгрыш {raffle_id}: заявка {user_id} отклонена проверкой ({', '.join(screening.reasons)})")
+        return EntryResult(ENTRY_REJECTED, screening.reasons)
+
+    # FOR SHARE до конца транзакции: переход ACTIVE -> COMPLETING (complete_raffle) ждет
+    # принятые заявки, а заявка после него видит новый статус. Заявки друг друга не ждут
+    raffle = db.query(Raffle).filter(Raffle.id == raffle_id).with_for_update(read=True).first()
+    if raffle is None:
+        return EntryResult(ENTRY_NOT_FOUND)
+    # Заявка - отдельный трейс со ссылкой на трейс розыгрыша: дочерними спанами
+    # тысячи заявок переполнили бы трейс жизни розыгрыша
+    link_span(raffle.trace_context)
+    if raffle.status != RaffleStatus.ACTIVE:
+        if raffle.status in _FINAL_STATUSES:
+            admission.close(raffle.id, CLOSED_INACTIVE)
+        return EntryResult(ENTRY_CLOSED)
+    if is_blacklisted(db, raffle, user_id):
+        return EntryResult(ENTRY_BLACKLISTED)
+
+    flagged = screening is not None and screening.verdict == FLAG
+    reasons = screening.reasons if flagged else ()
+    weight = entry_weight(raffle, _subscriptions(raffle, user_id))
+    inserted = insert_ignore(db, RaffleParticipant, [{
+        "raffle_id": raffle.id,
+        "user_id": user_id,
+        "weight": weight,
+        "flags": ",".join(reasons) or None,
+    }])
+    if not inserted:
+        db.rollback()
+        return EntryResult(ENTRY_DUPLICATE)
+    reservation = admission.reserve(db, raffle)
+    if reservation is None:
+        db.rollback()
+        return EntryResult(ENTRY_FULL)
+    db.commit()
+    limit_reached = admission.limit_reached(db, raffle, reservation)
+    if limit_reached:
+        logger.info(f"Розыгрыш {raffle.id}: набран лимит участников {raffle.max_participants}")
+    return EntryResult(ENTRY_FLAGGED if flagged else ENTRY_ACCEPTED, reasons, weight, limit_reached)
@@ -0,0 +1,169 @@
+# Завершение розыгрышей: определение победителей и рассылка уведомлений
+
+import logging
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from src.core.tracing import continue_trace
+from src.db.models.raffle import Raffle, RaffleStatus
+from src.db.session import SessionLocal
+from src.services.blacklist import load_blacklist
+from src.services.draw import draw_winners
+from src.services.eligibility import apply_eligibility, compile_rules, get_membership_source
+from src.services.notification_fanout import DEFAULT_REASON_END, fan_out_raffle_completion
+from src.services.participant_counter import participant_total, sync_participant_count
+from src.services.raffle_partitions import live_created_after
+
+logger = logging.getLogger(__name__)
+
+REASON_TIME_EXPIRED = DEFAULT_REASON_END
+REASON_PARTICIPANTS_LIMIT = "Достигнут лимит по числу участников."
+REASON_MANUAL = "Розыгрыш завершен организатором."
+
+
+def _finish_raffle(db: Session, raffle_id: str, created_at: datetime, reason_end: str) -> Optional[List[str]]:
+    # Одна транзакция: исключение неподходящих, выбор победителей, итоги и уведомления.
+    # Строка COMPLETING блокируется; занятую другим процессом пропускаем, а не ждем.
+    # created_at (ключ секционирования) сужает поиск до одной секции
+    raffle = (
+        db.query(Raffle)
+        .filter(Raffle.id == raffle_id, Raffle.created_at == created_at, Raffle.status == RaffleStatus.COMPLETING)
+        .with_for_update(skip_locked=True)
+        .populate_existing()
+        .first()
+    )
+    if raffle is None:
+        db.rollback()
+        return None
+    try:
+        rules = compile_rules(raffle, get_membership_source(), load_blacklist(db, raffle))
+        apply_eligibility(db, raffle, rules)
+        winners = draw_winners(db, raffle)
+        raffle.winners = winners
+        raffle.status = RaffleStatus.COMPLETED
+        raffle.updated_at = datetime.utcnow()
+        sync_participant_count(db, raffle)
+        fan_out_raffle_completion(db, raffle, winners, reason_end=reason_end)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    logger.info(f"Розыгрыш {raffle.id} завершен: {reason_end} Победителей: {len(winners)}")
+    return winners
+
+
+def complete_raffle(db: Session, raffle: Raffle, reason_end: str = REASON_TIME_EXPIRED) -> Optional[List[str]]:
+    """
+    Завершает активный розыгрыш: исключает участников, не выполнивших условия
+    (eligibility), выбирает победителей, сохраняет их в розыгрыше (вместе
+    с раскрытым seed это позволяет проверить итоги) и рассылает уведомления.
+
+    Сначала розыгрыш условным UPDATE переводится из ACTIVE в COMPLETING и это
+    фиксируется: заявки больше не принимаются, а при одновременном завершении
+    из нескольких процессов продолжит ровно один. Все остальное - одна транзакция,
+    которая переводит розыгрыш в COMPLETED. Если она не прошла (ошибка источника
+    подписок, БД, остановка процесса), розыгрыш остается в COMPLETING без
+    частичных изменений, и его доводит задача resume_completing_raffles.
+
+    Спан завершения продолжает трейс создания розыгрыша (trace_context): выбор
+    победителей, проверка условий и рассылка попадают в тот же трейс.
+
+    Returns:
+        Список победителей или None, если розыгрыш уже завершает кто-то другой
+    """
+    raffle_id, created_at = raffle.id, raffle.created_at
+    with continue_trace("raffle.complete", raffle.trace_context, {"raffle.id": raffle_id}):
+        claimed = db.execute(
+            update(Raffle)
+            .where(Raffle.id == raffle_id, Raffle.created_at == created_at, Raffle.status == RaffleStatus.ACTIVE)
+            .values(status=RaffleStatus.COMPLETING, updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not claimed:
+            db.rollback()
+            return None
+        db.commit()
+        return _finish_raffle(db, raffle_id, created_at, reason_end)
+
+
+def resume_completing_raffles(db: Session) -> int:
+    """
+    Задача планировщика: доводит розыгрыши, оставшиеся в COMPLETING после сбоя.
+
+    Причина завершения не хранится и восстанавливается по счетчику: набран
+    max_participants - лимит участников, иначе - истечение времени.
+
+    Returns:
+        Количество завершенных розыгрышей
+    """
+    stalled = db.query(Raffle).filter(
+        Raffle.status == RaffleStatus.COMPLETING,
+        Raffle.created_at >= live_created_after()
+    ).all()
+    completed = 0
+    for raffle in stalled:
+        full = raffle.max_participants is not None and participant_total(db, raffle) >= raffle.max_participants
+        reason_end = REASON_PARTICIPANTS_LIMIT if full else REASON_TIME_EXPIRED
+        with continue_trace("raffle.complete.resume", raffle.trace_context, {"raffle.id": raffle.id}):
+            if _finish_raffle(db, raffle.id, raffle.created_at, reason_end) is not None:
+                completed += 1
+    return completed
+
+
+def complete_expired_raffles(db: Session, now: Optional[datetime] = None) -> int:
+    """
+    Завершает активные розыгрыши, у которых наступила дата завершения.
+
+    Returns:
+        Количество завершенных розыгрышей
+    """
+    now = now or datetime.now()
+    expired = db.query(Raffle).filter(
+        Raffle.status == RaffleStatus.ACTIVE,
+        Raffle.created_at >= live_created_after(),
+        Raffle.end_date <= now
+    ).all()
+    completed = 0
+    for raffle in expired:
+        if complete_raffle(db, raffle, REASON_TIME_EXPIRED) is not None:
+            completed += 1
+    return completed
+
+
+def complete_full_raffles(db: Session) -> int:
+    """
+    Завершает активные розыгрыши, набравшие max_participants. Обычно их завершает
+    заявка, занявшая последнее место; задача планировщика подстраховывает, если
+    это завершение не состоялось (например, процесс перезапустился).
+
+    Returns:
+        Количество завершенных розыгрышей
+    """
+    full = db.query(Raffle).filter(
+        Raffle.status == RaffleStatus.ACTIVE,
+        Raffle.created_at >= live_created_after(),
+        Raffle.max_participants.isnot(None),
+        Raffle.participants_count >= Raffle.max_participants
+    ).all()
+    completed = 0
+    for raffle in full:
+        if complete_raffle(db, raffle, REASON_PARTICIPANTS_LIMIT) is not None:
+            completed += 1
+    return completed
+
+
+def complete_raffle_at_limit(raffle_id: str, session_factory: Callable[[], Session] = SessionLocal) -> None:
+    """Фоновая задача после заявки, занявшей последнее место: завершает розыгрыш в своей сессии"""
+    db = session_factory()
+    try:
+        raffle = db.query(Raffle).filter(Raffle.id == raffle_id).first()
+        if raffle is not None:
+            complete_raffle(db, raffle, REASON_PARTICIPANTS_LIMIT)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Не удалось завершить розыгрыш {raffle_id} по лимиту участников: {e}")
+    finally:
+        db.close()
@@ -0,0 +1,197 @@
+# Секции таблицы raffles по месяцам created_at (Postgres)
+
+import logging
+import re
+import zlib
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "raffles"
+DEFAULT_PARTITION = "raffles_default"
+# Несекционированная таблица id розыгрышей: держит уникальность id (models/raffle.py)
+ID_TABLE = "raffle_ids"
+
+# Ключ advisory-lock: секции обслуживает одна реплика за раз, остальные пропускают проход
+PARTITION_LOCK_ID = zlib.crc32(b"vk-randomizer:raffle-partitions")
+
+# DDL ждет блокировку raffles не дольше, чтобы не задерживать запросы за собой; задача повторится
+_LOCK_TIMEOUT = "5s"
+
+_PARTITION_NAME = re.compile(r"^raffles_p(\d{4})(\d{2})$")
+
+
+def month_start(moment: datetime) -> date:
+    return date(moment.year, moment.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_p{month:%Y%m}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    """Месяц секции по имени; None - секция по умолчанию или чужая таблица"""
+    match = _PARTITION_NAME.match(name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def lifetime_exceeded(created_at: datetime, end_date: datetime) -> bool:
+    """end_date дальше RAFFLE_MAX_LIFETIME_DAYS от создания: такой розыгрыш выпал бы из окна live_created_after"""
+    if end_date.tzinfo is not None:
+        end_date = end_date.astimezone(timezone.utc).replace(tzinfo=None)
+    return end_date > created_at + timedelta(days=settings.RAFFLE_MAX_LIFETIME_DAYS)
+
+
+def live_created_after(now: Optional[datetime] = None) -> datetime:
+    """
+    Нижняя граница created_at розыгрышей, которые еще могут быть активны или завершаться.
+
+    end_date не дальше RAFFLE_MAX_LIFETIME_DAYS от создания, а истекшие розыгрыши
+    планировщик завершает в течение прохода; RAFFLE_SCAN_GRACE_DAYS - запас на простой
+    планировщика и разницу часовых поясов end_date и created_at. Условие
+    created_at >= границы позволяет Postgres не читать секции старых месяцев.
+    """
+    days = settings.RAFFLE_MAX_LIFETIME_DAYS + settings.RAFFLE_SCAN_GRACE_DAYS
+    return (now or datetime.utcnow()) - timedelta(days=days)
+
+
+def is_partitioned(db: Session) -> bool:
+    """raffles - секционированная таблица (на SQLite и до миграции - обычная)"""
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    return db.execute(
+        text("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(:table)"), {"table": PARENT_TABLE}
+    ).scalar() is True
+
+
+def list_partitions(db: Session) -> List[str]:
+    return db.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE pg_inherits.inhparent = to_regclass(:table) ORDER BY child.relname"
+    ), {"table": PARENT_TABLE}).scalars().all()
+
+
+def create_partition(db: Session, month: date, has_default: bool = True) -> int:
+    """
+    Создает секцию месяца. Секция создается отдельной таблицей и присоединяется:
+    CHECK по границам избавляет ATTACH от проверки ее строк, а строки этого месяца
+    из секции по умолчанию переносятся в нее до присоединения. Удаление из секции
+    по умолчанию убирает их id из raffle_ids (триггер), а вставка в еще не
+    присоединенную таблицу триггер не вызывает - id возвращаются явно.
+
+    Returns:
+        Количество строк, перенесенных из секции по умолчанию
+    """
+    name = partition_name(month)
+    lower, upper = month.isoformat(), add_months(month, 1).isoformat()
+    db.execute(text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS)"))
+    db.execute(text(
+        f"ALTER TABLE {name} ADD CONSTRAINT {name}_bounds "
+        f"CHECK (created_at >= '{lower}' AND created_at < '{upper}')"
+    ))
+    moved = 0
+    if has_default:
+        moved = db.execute(text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+            f"WHERE created_at >= '{lower}' AND created_at < '{upper}' RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        )).rowcount
+    if moved:
+        db.execute(text(f"INSERT INTO {ID_TABLE} (id) SELECT id FROM {name}"))
+    db.execute(text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} FOR VALUES FROM ('{lower}') TO ('{upper}')"))
+    db.execute(text(f"ALTER TABLE {name} DROP CONSTRAINT {name}_bounds"))
+    return moved
+
+
+def plan_partitions(existing: List[str], current: date, row_months: Iterable[date] = ()) -> Tuple[List[date], List[str]]:
+    """
+    Что сделать с секциями: месяцы, для которых секцию нужно создать (текущий,
+    RAFFLE_PARTITIONS_AHEAD следующих и месяцы строк из секции по умолчанию),
+    и секции прошлых месяцев - кандидаты на удаление, если они пусты.
+    """
+    months = {add_months(current, offset) for offset in range(settings.RAFFLE_PARTITIONS_AHEAD + 1)}
+    months.update(row_months)
+    to_create = sorted(month for month in months if partition_name(month) not in existing)
+    past = [name for name in existing if (partition_month(name) or current) < current]
+    return to_create, past
+
+
+def _status_counts(db: Session, name: str) -> dict:
+    return dict(db.execute(text(f"SELECT status, count(*) FROM {name} GROUP BY status")).all())
+
+
+def maintain_raffle_partitions(db: Session, now: Optional[datetime] = None) -> int:
+    """
+    Задача планировщика: создает секции raffles на текущий и RAFFLE_PARTITIONS_AHEAD
+    следующих месяцев (и на месяцы строк, попавших в секцию по умолчанию) и удаляет
+    опустевшие секции прошлых месяцев - их строки перенесены в архив.
+
+    Секция удаляется только пустой: архив забирает лишь завершенные и отмененные
+    розыгрыши, и один забытый черновик держит секцию своего месяца. Сканирования
+    это не замедляет - окно live_created_after ее не читает, - но такие секции
+    старше окна попадают в предупреждение в логе со счетчиками по статусам:
+    черновик стоит отменить или удалить, и секция уйдет следующим проходом.
+    На несекционированной таблице ничего не делает.
+
+    Returns:
+        Количество созданных и удаленных секций
+    """
+    if not is_partitioned(db):
+        return 0
+    if not db.execute(text("SELECT pg_try_advisory_xact_lock(:id)"), {"id": PARTITION_LOCK_ID}).scalar():
+        db.rollback()
+        return 0
+    db.execute(text(f"SET LOCAL lock_timeout = '{_LOCK_TIMEOUT}'"))
+
+    now = now or datetime.utcnow()
+    current = month_start(now)
+    existing = list_partitions(db)
+    has_default = DEFAULT_PARTITION in existing
+    row_months = []
+    if has_default:
+        row_months = [
+            month_start(moment) for moment in db.execute(
+                text(f"SELECT DISTINCT date_trunc('month', created_at) FROM {DEFAULT_PARTITION}")
+            ).scalars()
+        ]
+    to_create, past = plan_partitions(existing, current, row_months)
+
+    moved = 0
+    for month in to_create:
+        moved += create_partition(db, month, has_default)
+    dropped, stragglers = [], {}
+    live_month = month_start(live_created_after(now))
+    for name in past:
+        counts = _status_counts(db, name)
+        if not counts:
+            db.execute(text(f"DROP TABLE {name}"))
+            dropped.append(name)
+        elif partition_month(name) < live_month:
+            stragglers[name] = counts
+    db.commit()
+
+    created = len(to_create)
+    if stragglers:
+        logger.warning(
+            "Секции старше окна активных розыгрышей не удалены - в них есть строки не из архива: "
+            + "; ".join(f"{name} {counts}" for name, counts in sorted(stragglers.items()))
+        )
+
+    if created or dropped:
+        logger.info(
+            f"Секции {PARENT_TABLE}: создано {created} (перенесено строк из секции по умолчанию: {moved}), "
+            f"удалено {len(dropped)}{': ' + ', '.join(dropped) if dropped else ''}"
+        )
+    return created + len(dropped)
@@ -0,0 +1,158 @@
+# Фоновый планировщик периодических задач
+
+import asyncio
+import logging
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from src.core.config import settings
+from src.core.tracing import tracer
+from src.db.session import SessionLocal
+from src.services.archive import archive_old_raffles
+from src.services.eligibility import get_membership_source
+from src.services.membership import MembershipSnapshotStore, refresh_membership
+from src.services.participant_counter import sync_participant_counts
+from src.services.raffle_lifecycle import complete_expired_raffles, complete_full_raffles, resume_completing_raffles
+from src.services.raffle_partitions import maintain_raffle_partitions
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[Session], object]
+
+
+def job_lock_id(name: str) -> int:
+    """Ключ advisory-lock задачи, по схеме PARTITION_LOCK_ID"""
+    return zlib.crc32(f"vk-randomizer:scheduler:{name}".encode())
+
+
+@contextmanager
+def exclusive_run(engine: Engine, lock_id: int) -> Iterator[bool]:
+    """
+    Сессионный advisory-lock на отдельном соединении на время задачи: задача
+    коммитит несколько раз, и сессия между коммитами возвращает соединение в пул,
+    поэтому блокировка транзакции или соединения сессии не удержалась бы.
+
+    Отдает False, если задачу уже выполняет другой воркер. Не на Postgres - всегда True.
+    """
+    if engine.dialect.name != "postgresql":
+        yield True
+        return
+    with engine.connect() as conn:
+        acquired = conn.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": lock_id}).scalar()
+        conn.commit()
+        try:
+            yield bool(acquired)
+        finally:
+            if acquired:
+                conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": lock_id})
+                conn.commit()
+
+
+class Scheduler:
+    """
+    Запускает задачи по кругу в фоне event loop, каждую в пуле потоков.
+
+    После каждого прохода обновляется отметка last_tick_at, по которой
+    readiness-проба определяет, не отстает ли планировщик.
+    При остановке текущий проход доводится до конца, новые не начинаются.
+    Задачи, добавленные с exclusive=True, в каждый момент выполняет только один
+    воркер (процесс) - остальные пропускают проход, а не сканируют и не гоняются за теми же строками.
+    """
+
+    def __init__(self, interval: float, session_factory: Callable[[], Session] = SessionLocal):
+        self.interval = interval
+        self.session_factory = session_factory
+        self.jobs: List[Tuple[str, Job, bool]] = []
+        self.last_tick_at: Optional[float] = None
+        self._started_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+
+    def add_job(self, name: str, job: Job, exclusive: bool = False) -> None:
+        self.jobs.append((name, job, exclusive))
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def lag(self) -> float:
+        """Сколько секунд прошло сверх интервала с последнего прохода (0, если не отстает)"""
+        reference = self.last_tick_at or self._started_at
+        if reference is None:
+            return 0.0
+        return max(0.0, time.monotonic() - reference - self.interval)
+
+    def run_jobs(self) -> None:
+        for name, job, exclusive in self.jobs:
+            db = self.session_factory()
+            try:
+                # Каждый запуск задачи - корневой спан отдельного трейса
+                with tracer.start_as_current_span(f"scheduler.{name}"):
+                    if not exclusive:
+                        job(db)
+                        continue
+                    with exclusive_run(db.get_bind(), job_lock_id(name)) as acquired:
+                        if acquired:
+                            job(db)
+                        else:
+                            logger.debug(f"Задача {name} уже выполняется другим воркером, проход пропущен")
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Ошибка в задаче планировщика {name}: {e}")
+            finally:
+                db.close()
+        self.last_tick_at = time.monotonic()
+
+    async def _loop(self) -> None:
+        while not self._stopping.is_set():
+            await run_in_threadpool(self.run_jobs)
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._started_at = time.monotonic()
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self._loop())
+        logger.info(f"Планировщик запущен: {len(self.jobs)} задач(и), интервал {self.interval} с")
+
+    async def stop(self, timeout: Optional[float] = None) -> None:
+        """Дожидается текущего прохода (не дольше timeout секунд, затем отменяет) и останавливает цикл"""
+        if not self._task:
+            return
+        self._stopping.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Проход планировщика не завершился за {timeout} с и был прерван")
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info("Планировщик остановлен")
+
+
+def create_scheduler(interval: float) -> Scheduler:
+    scheduler = Scheduler(interval)
+    if isinstance(get_membership_source(), MembershipSnapshotStore):
+        scheduler.add_job("refresh_membership", refresh_membership)
+    # Задачи над общими строками БД - по одному воркеру; снимки подписок у каждого воркера свои,
+    # секции берут собственную блокировку транзакции
+    scheduler.add_job("complete_expired_raffles", complete_expired_raffles, exclusive=True)
+    scheduler.add_job("sync_participant_counts", sync_participant_counts, exclusive=True)
+    scheduler.add_job("complete_full_raffles", complete_full_raffles, exclusive=True)
+    scheduler.add_job("resume_completing_raffles", resume_completing_raffles, exclusive=True)
+    if settings.ARCHIVE_ENABLED:
+        scheduler.add_job("archive_old_raffles", archive_old_raffles, exclusive=True)
+    if settings.RAFFLE_PARTITIONS_ENABLED:
+        scheduler.add_job("maintain_raffle_partitions", maintain_raffle_partitions)
+    return scheduler
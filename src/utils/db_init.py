@@ -1,17 +1,24 @@
 from sqlalchemy.orm import Session
+from src.db.bulk import insert_ignore, sync_id_sequence
 from src.db.models.community import Community
 from src.db.models.notification import Notification, NotificationType
 from src.db.models.raffle import Raffle, RaffleStatus
 from src.db.session import get_db
 import logging
+from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# created_at - часть первичного ключа raffles (ключ секционирования): у сидов он фиксирован,
+# чтобы повторная инициализация попадала в ON CONFLICT, а не вставляла копии
+SEED_CREATED_AT = datetime(2025, 1, 1)
+
 def init_community_data(db: Session):
     """Инициализация данных для сообществ"""
     communities_data = [
         {
             "id": "1",
+            "vk_user_id": "123456",
             "name": "Техно-сообщество",
             "nickname": "@techclub",
             "membersCount": "12 500",
@@ -24,6 +31,7 @@ def init_community_data(db: Session):
         },
         {
             "id": "2",
+            "vk_user_id": "123456",
             "name": "Москва 24 – Новости",
             "nickname": "@mosnews24",
             "membersCount": "522K",
@@ -36,6 +44,7 @@ def init_community_data(db: Session):
         },
         {
             "id": "3",
+            "vk_user_id": "654321",
             "name": "Казань 24 – Новости",
             "nickname": "@kazan24",
             "membersCount": "804K",
@@ -48,6 +57,7 @@ def init_community_data(db: Session):
         },
         {
             "id": "4",
+            "vk_user_id": "654321",
             "name": "Санкт-Петербург Онлайн",
             "nickname": "@spbonline",
             "membersCount": "878K",
@@ -60,14 +70,9 @@ def init_community_data(db: Session):
         }
     ]
     
-    for data in communities_data:
-        existing = db.query(Community).filter(Community.id == data["id"]).first()
-        if not existing:
-            community = Community(**data)
-            db.add(community)
-            logger.info(f"Добавлено сообщество: {data['name']}")
-    
+    added = insert_ignore(db, Community, communities_data)
     db.commit()
+    logger.info(f"Добавлено сообществ: {added} из {len(communities_data)}")
     logger.info("Инициализация данных сообществ завершена")
 
 def init_notification_data(db: Session):
@@ -76,58 +81,64 @@ def init_notification_data(db: Session):
         {
             "id": 38289,
             "type": NotificationType.COMPLETED,
-            "raffleId": 38289,
-            "participantsCount": 5920,
-            "winners": ["593IF", "REOOJ", "DOXO"],
-            "reasonEnd": "Достигнут лимит по числу участников.",
+            "payload": {
+                "raffleId": 38289,
+                "participantsCount": 5920,
+                "winners": ["593IF", "REOOJ", "DOXO"],
+                "reasonEnd": "Достигнут лимит по числу участников."
+            },
             "new": True
         },
         {
             "id": 38941,
             "type": NotificationType.COMPLETED,
-            "raffleId": 38941,
-            "participantsCount": 4780,
-            "winners": ["XZ13B", "LK9FD"],
-            "reasonEnd": "Истекло время проведения розыгрыша.",
+            "payload": {
+                "raffleId": 38941,
+                "participantsCount": 4780,
+                "winners": ["XZ13B", "LK9FD"],
+                "reasonEnd": "Истекло время проведения розыгрыша."
+            },
             "new": False
         },
         {
             "id": 1,
             "type": NotificationType.WARNING,
-            "warningTitle": "Не удалось подключить виджет",
-            "warningDescription": [
-                'Сообщество "Казань 24 – Новости"',
-                'У пользователя недостаточно прав.',
-                'Розыгрыш не запущен.'
-            ],
+            "payload": {
+                "warningTitle": "Не удалось подключить виджет",
+                "warningDescription": [
+                    'Сообщество "Казань 24 – Новости"',
+                    'У пользователя недостаточно прав.',
+                    'Розыгрыш не запущен.'
+                ]
+            },
             "new": True
         },
         {
             "id": 2,
             "type": NotificationType.ERROR,
-            "errorTitle": "Ошибка подключения сообщества",
-            "errorDescription": "На сервере VK ведутся технические работы. Приносим извинения за доставленные неудобства!",
+            "payload": {
+                "errorTitle": "Ошибка подключения сообщества",
+                "errorDescription": "На сервере VK ведутся технические работы. Приносим извинения за доставленные неудобства!"
+            },
             "new": False
         }
     ]
     
-    for data in notifications_data:
-        existing = db.query(Notification).filter(Notification.id == data["id"]).first()
-        if not existing:
-            notification = Notification(**data)
-            db.add(notification)
-            logger.info(f"Добавлено уведомление: {data['type']} (ID: {data['id']})")
-    
+    added = insert_ignore(db, Notification, notifications_data)
+    # Сиды идут с явными ID: последовательность должна их обогнать
+    sync_id_sequence(db, Notification)
     db.commit()
+    logger.info(f"Добавлено уведомлений: {added} из {len(notifications_data)}")
     logger.info("Инициализация данных уведомлений завершена")
 
 def init_raffle_data(db: Session):
     """Инициализация данных для розыгрышей"""
-    from datetime import datetime, timedelta
+    from datetime import timedelta
     
     raffles_data = [
         {
             "id": "492850",
+            "vk_user_id": "123456",
             "name": "Конкурс на лучший пост о лете",
             "community_id": "1",
             "contest_text": "Поделитесь своими лучшими летними фотографиями и выиграйте призы! Условия участия: подписка на сообщество и лайк поста.",
@@ -147,10 +158,12 @@ def init_raffle_data(db: Session):
             "exclude_me": False,
             "exclude_admins": False,
             "status": RaffleStatus.ACTIVE,
-            "participants_count": 127
+            "participants_count": 127,
+            "created_at": SEED_CREATED_AT
         },
         {
             "id": "382189",
+            "vk_user_id": "123456",
             "name": "Розыгрыш подарков к Новому году",
             "community_id": "2",
             "contest_text": "Новогодний розыгрыш! Подпишитесь на наш Telegram-канал и участвуйте в розыгрыше призов.",
@@ -170,10 +183,12 @@ def init_raffle_data(db: Session):
             "exclude_me": True,
             "exclude_admins": True,
             "status": RaffleStatus.ACTIVE,
-            "participants_count": 89
+            "participants_count": 89,
+            "created_at": SEED_CREATED_AT
         },
         {
             "id": "818394",
+            "vk_user_id": "123456",
             "name": "Конкурс репостов",
             "community_id": "3",
             "contest_text": "Сделайте репост этого поста и участвуйте в розыгрыше! Простые условия участия.",
@@ -193,18 +208,14 @@ def init_raffle_data(db: Session):
             "exclude_me": False,
             "exclude_admins": False,
             "status": RaffleStatus.DRAFT,
-            "participants_count": 0
+            "participants_count": 0,
+            "created_at": SEED_CREATED_AT
         }
     ]
     
-    for data in raffles_data:
-        existing = db.query(Raffle).filter(Raffle.id == data["id"]).first()
-        if not existing:
-            raffle = Raffle(**data)
-            db.add(raffle)
-            logger.info(f"Добавлен розыгрыш: {data['name']} (ID: {data['id']})")
-    
+    added = insert_ignore(db, Raffle, raffles_data)
     db.commit()
+    logger.info(f"Добавлено розыгрышей: {added} из {len(raffles_data)}")
     logger.info("Инициализация данных розыгрышей завершена")
 
 def init_database():
@@ -0,0 +1,41 @@
+# Курсорная пагинация по времени создания
+
+import base64
+from datetime import datetime, timezone
+from typing import Tuple
+
+def encode_cursor(created_at: datetime, item_id: int) -> str:
+    """
+    Кодирует позицию последнего элемента страницы в непрозрачный курсор.
+
+    Args:
+        created_at: Время создания последнего элемента
+        item_id: ID последнего элемента (разрешает совпадения по времени)
+    """
+    raw = f"{created_at.isoformat()}|{item_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str, aware: bool = False) -> Tuple[datetime, int]:
+    """
+    Декодирует курсор, выданный encode_cursor.
+
+    Время приводится к UTC: без часового пояса (колонки DateTime в БД) или,
+    при aware=True, с поясом UTC (время уведомлений в памяти). Курсор может
+    быть собран вручную, поэтому пояс в нем самом не учитывается при выборе формата.
+
+    Raises:
+        ValueError: Курсор поврежден или выдан не этим API
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, item_id = raw.rsplit("|", 1)
+        created_at, item_id = datetime.fromisoformat(created_at), int(item_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Некорректный курсор") from e
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc)
+        if not aware:
+            created_at = created_at.replace(tzinfo=None)
+    elif aware:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return created_at, item_id
@@ -0,0 +1,281 @@
+# Синтетические данные для нагрузочных стендов и бенчмарков
+#
+#     python -m src.utils.synthetic_data --raffles 1000000 --participants 20 --notifications 2000000
+
+import argparse
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List
+
+from sqlalchemy import create_engine, delete, func, insert, select, text
+from sqlalchemy.orm import Session, sessionmaker
+
+from src.core.config import settings
+from src.db.bulk import insert_ignore
+from src.db.models.notification import Notification, NotificationType
+from src.db.models.raffle import Raffle, RaffleParticipant, RaffleStatus
+
+logger = logging.getLogger(__name__)
+
+# Все синтетические ID начинаются с префикса, по нему же данные удаляются
+RAFFLE_PREFIX = "syn-"
+USER_PREFIX = "syn-user-"
+COMMUNITY_PREFIX = "syn-community-"
+COMMUNITIES = 1000
+REASON_END = "Истекло время проведения розыгрыша."
+# created_at - ключ секционирования raffles и часть первичного ключа: он зависит только
+# от номера розыгрыша, чтобы повторный запуск попадал в ON CONFLICT, а не вставлял копии
+CREATED_EPOCH = datetime(2025, 1, 1)
+
+
+def _created_at(n: int) -> datetime:
+    return CREATED_EPOCH + timedelta(days=n % 365)
+
+
+@dataclass
+class SyntheticSpec:
+    raffles: int = 10_000
+    participants: int = 20  # Участников у каждого активного и завершенного розыгрыша
+    notifications: int = 10_000
+    users: int = 10_000
+    batch_size: int = 50_000
+
+    @property
+    def stride(self) -> int:
+        # Шаг, взаимно простой с users: участники одного розыгрыша не повторяются
+        for candidate in (7919, 104729, 1299709):
+            if self.users % candidate:
+                return candidate
+        return 1
+
+
+# Распределение строк задано формулами от номера n, одинаковыми в SQL и Python:
+# 70% розыгрышей завершены, 20% активны, 10% черновики
+def _raffle_status(n: int) -> RaffleStatus:
+    bucket = n % 10
+    if bucket < 7:
+        return RaffleStatus.COMPLETED
+    if bucket < 9:
+        return RaffleStatus.ACTIVE
+    return RaffleStatus.DRAFT
+
+
+def _has_participants(n: int) -> bool:
+    return n % 10 < 9
+
+
+def _notification_type(n: int) -> NotificationType:
+    return (NotificationType.COMPLETED, NotificationType.WARNING, NotificationType.ERROR)[n % 3]
+
+
+def _notification_payload(n: int, spec: SyntheticSpec) -> dict:
+    kind = _notification_type(n)
+    if kind == NotificationType.COMPLETED:
+        return {
+            "raffleId": f"{RAFFLE_PREFIX}{n % spec.raffles}",
+            "participantsCount": spec.participants,
+            "winners": [f"{USER_PREFIX}{n % spec.users}"],
+            "reasonEnd": REASON_END,
+        }
+    if kind == NotificationType.WARNING:
+        return {"warningTitle": "Не удалось подключить виджет", "warningDescription": [f"Сообщество {n % COMMUNITIES}"]}
+    return {"errorTitle": "Ошибка подключения сообщества", "errorDescription": "Синтетическая ошибка"}
+
+
+def _raffle_rows(start: int, stop: int, spec: SyntheticSpec, now: datetime) -> List[dict]:
+    rows = []
+    for n in range(start, stop):
+        status = _raffle_status(n)
+        start_date = now - timedelta(days=n % 365 + 30)
+        end_date = now + timedelta(days=n % 30 + 1) if status == RaffleStatus.ACTIVE else start_date + timedelta(days=14)
+        rows.append({
+            "id": f"{RAFFLE_PREFIX}{n}",
+            "vk_user_id": f"{USER_PREFIX}{n % spec.users}",
+            "name": f"Синтетический розыгрыш {n}",
+            "community_id": f"{COMMUNITY_PREFIX}{n % COMMUNITIES}",
+            "contest_text": "Сгенерированный розыгрыш для нагрузочных тестов",
+            "photos": [],
+            "required_communities": [],
+            "partner_tags": [],
+            "blacklist_participants": [],
+            "winners_count": 1 + n % 5,
+            "start_date": start_date,
+            "end_date": end_date,
+            "max_participants": None,
+            "status": status,
+            "participants_count": spec.participants if _has_participants(n) else 0,
+            "created_at": _created_at(n),
+            "updated_at": start_date,
+        })
+    return rows
+
+
+def _participant_rows(start: int, stop: int, spec: SyntheticSpec) -> Iterator[dict]:
+    for n in range(start, stop):
+        if not _has_participants(n):
+            continue
+        for j in range(spec.participants):
+            yield {"raffle_id": f"{RAFFLE_PREFIX}{n}", "user_id": f"{USER_PREFIX}{(n + j * spec.stride) % spec.users}"}
+
+
+def _notification_rows(start: int, stop: int, spec: SyntheticSpec, now: datetime) -> List[dict]:
+    return [
+        {
+            "type": _notification_type(n),
+            "user_id": f"{USER_PREFIX}{n % spec.users}",
+            "payload": _notification_payload(n, spec),
+            "new": n % 4 == 0,
+            "created_at": now - timedelta(minutes=n % 525600),
+        }
+        for n in range(start, stop)
+    ]
+
+
+# --- Postgres: строки генерируются на стороне сервера через generate_series ---
+
+_PG_RAFFLES = text(f"""
+    INSERT INTO raffles (
+        id, vk_user_id, name, community_id, contest_text, photos,
+        require_community_subscription, require_telegram_subscription, required_communities, partner_tags,
+        winners_count, blacklist_participants, start_date, end_date, max_participants,
+        publish_results, hide_participants_count, exclude_me, exclude_admins,
+        status, participants_count, created_at, updated_at
+    )
+    SELECT
+        '{RAFFLE_PREFIX}' || n, '{USER_PREFIX}' || (n % :users), 'Синтетический розыгрыш ' || n,
+        '{COMMUNITY_PREFIX}' || (n % {COMMUNITIES}), 'Сгенерированный розыгрыш для нагрузочных тестов', '[]'::json,
+        true, false, '[]'::json, '[]'::json,
+        1 + n % 5, '[]'::json, s.start_date,
+        CASE WHEN n % 10 BETWEEN 7 AND 8 THEN LOCALTIMESTAMP + (n % 30 + 1) * interval '1 day'
+             ELSE s.start_date + interval '14 days' END,
+        NULL,
+        true, false, false, false,
+        (CASE WHEN n % 10 < 7 THEN 'COMPLETED' WHEN n % 10 < 9 THEN 'ACTIVE' ELSE 'DRAFT' END)::rafflestatus,
+        CASE WHEN n % 10 < 9 THEN :participants ELSE 0 END,
+        CAST(:created_epoch AS timestamp) + (n % 365) * interval '1 day', s.start_date
+    FROM generate_series(:start, :stop - 1) AS n,
+         LATERAL (SELECT LOCALTIMESTAMP - (n % 365 + 30) * interval '1 day' AS start_date) AS s
+    ON CONFLICT DO NOTHING
+""")
+
+_PG_PARTICIPANTS = text(f"""
+    INSERT INTO raffle_participants (raffle_id, user_id, created_at)
+    SELECT '{RAFFLE_PREFIX}' || n, '{USER_PREFIX}' || ((n + j * :stride) % :users), LOCALTIMESTAMP
+    FROM generate_series(:start, :stop - 1) AS n, generate_series(0, :participants - 1) AS j
+    WHERE n % 10 < 9
+    ON CONFLICT DO NOTHING
+""")
+
+_PG_NOTIFICATIONS = text(f"""
+    INSERT INTO notifications (type, user_id, payload, new, created_at)
+    SELECT
+        (CASE n % 3 WHEN 0 THEN 'COMPLETED' WHEN 1 THEN 'WARNING' ELSE 'ERROR' END)::notificationtype,
+        '{USER_PREFIX}' || (n % :users),
+        CASE n % 3
+            WHEN 0 THEN jsonb_build_object(
+                'raffleId', '{RAFFLE_PREFIX}' || (n % :raffles), 'participantsCount', :participants,
+                'winners', jsonb_build_array('{USER_PREFIX}' || (n % :users)), 'reasonEnd', :reason_end)
+            WHEN 1 THEN jsonb_build_object(
+                'warningTitle', 'Не удалось подключить виджет',
+                'warningDescription', jsonb_build_array('Сообщество ' || (n % {COMMUNITIES})))
+            ELSE jsonb_build_object(
+                'errorTitle', 'Ошибка подключения сообщества', 'errorDescription', 'Синтетическая ошибка')
+        END,
+        n % 4 = 0,
+        LOCALTIMESTAMP - (n % 525600) * interval '1 minute'
+    FROM generate_series(:start, :stop - 1) AS n
+""")
+
+
+def _batches(start: int, total: int, size: int) -> Iterator[range]:
+    for offset in range(start, total, size):
+        yield range(offset, min(offset + size, total))
+
+
+def generate(db: Session, spec: SyntheticSpec) -> Dict[str, int]:
+    """
+    Заполняет базу синтетическими розыгрышами, участниками и уведомлениями.
+
+    Повторный запуск с теми же параметрами ничего не дублирует: розыгрыши и участники
+    вставляются через ON CONFLICT DO NOTHING, уведомления дописываются до нужного числа.
+    На Postgres строки генерирует сам сервер (generate_series), на остальных СУБД —
+    пачки из Python.
+
+    Returns:
+        Количество вставленных строк по таблицам
+    """
+    if spec.participants > spec.users:
+        raise ValueError("Участников в розыгрыше не может быть больше, чем пользователей")
+    postgres = db.get_bind().dialect.name == "postgresql"
+    now = datetime.now()
+    params = {"users": spec.users, "participants": spec.participants, "raffles": spec.raffles,
+              "stride": spec.stride, "reason_end": REASON_END, "created_epoch": CREATED_EPOCH}
+    inserted = {"raffles": 0, "raffle_participants": 0, "notifications": 0}
+
+    # Участников на пачку больше в participants раз, поэтому и пачка розыгрышей меньше
+    raffle_batch = max(1, spec.batch_size // max(1, spec.participants))
+    for batch in _batches(0, spec.raffles, raffle_batch):
+        if postgres:
+            bounds = {**params, "start": batch.start, "stop": batch.stop}
+            inserted["raffles"] += db.execute(_PG_RAFFLES, bounds).rowcount
+            inserted["raffle_participants"] += db.execute(_PG_PARTICIPANTS, bounds).rowcount
+        else:
+            inserted["raffles"] += insert_ignore(db, Raffle, _raffle_rows(batch.start, batch.stop, spec, now))
+            participants = list(_participant_rows(batch.start, batch.stop, spec))
+            inserted["raffle_participants"] += insert_ignore(db, RaffleParticipant, participants)
+        db.commit()
+        logger.info(f"Розыгрыши: {batch.stop} из {spec.raffles}")
+
+    existing = db.execute(
+        select(func.count()).select_from(Notification).where(Notification.user_id.like(f"{USER_PREFIX}%"))
+    ).scalar()
+    for batch in _batches(existing, spec.notifications, spec.batch_size):
+        if postgres:
+            db.execute(_PG_NOTIFICATIONS, {**params, "start": batch.start, "stop": batch.stop})
+        else:
+            db.execute(insert(Notification), _notification_rows(batch.start, batch.stop, spec, now))
+        db.commit()
+        inserted["notifications"] += len(batch)
+        logger.info(f"Уведомления: {batch.stop} из {spec.notifications}")
+    return inserted
+
+
+def clear(db: Session) -> None:
+    """Удаляет все синтетические данные"""
+    db.execute(delete(RaffleParticipant).where(RaffleParticipant.raffle_id.like(f"{RAFFLE_PREFIX}%")))
+    db.execute(delete(Raffle).where(Raffle.id.like(f"{RAFFLE_PREFIX}%")))
+    db.execute(delete(Notification).where(Notification.user_id.like(f"{USER_PREFIX}%")))
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Заполнить базу синтетическими данными для нагрузочных тестов")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--raffles", type=int, default=SyntheticSpec.raffles)
+    parser.add_argument("--participants", type=int, default=SyntheticSpec.participants,
+                        help="Участников у каждого активного и завершенного розыгрыша")
+    parser.add_argument("--notifications", type=int, default=SyntheticSpec.notifications)
+    parser.add_argument("--users", type=int, default=SyntheticSpec.users)
+    parser.add_argument("--batch-size", type=int, default=SyntheticSpec.batch_size)
+    parser.add_argument("--clear", action="store_true", help="Удалить синтетические данные перед генерацией")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    spec = SyntheticSpec(args.raffles, args.participants, args.notifications, args.users, args.batch_size)
+    db = sessionmaker(bind=create_engine(args.database_url))()
+    try:
+        if args.clear:
+            clear(db)
+        started = time.perf_counter()
+        inserted = generate(db, spec)
+        elapsed = time.perf_counter() - started
+        total = sum(inserted.values())
+        logger.info(f"Вставлено {inserted} за {elapsed:.1f} с ({total / max(elapsed, 1e-9):,.0f} строк/с)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# Взвешенная выборка без повторов на дереве Фенвика
+
+import random
+from itertools import accumulate
+from typing import List, Sequence, Tuple
+
+
+class FenwickSampler:
+    """
+    Выбор индексов пропорционально целым весам, без повторов.
+
+    Дерево строится один раз за O(n); выбор k индексов - O(k log n): индекс находится
+    спуском по дереву, после чего его вес обнуляется. После выборки веса
+    восстанавливаются, так что один сэмплер можно использовать повторно.
+    """
+
+    def __init__(self, weights: Sequence[int]):
+        if any(weight < 0 for weight in weights):
+            raise ValueError("Веса должны быть неотрицательными")
+        self._weights = list(weights)
+        self._size = len(self._weights)
+        prefix = [0, *accumulate(self._weights)]
+        # tree[i] - сумма весов на полуинтервале (i & (i - 1), i]
+        self._tree = [0] + [prefix[i] - prefix[i & (i - 1)] for i in range(1, self._size + 1)]
+        self._top = 1 << (self._size.bit_length() - 1) if self._size else 0
+        self.total = prefix[-1]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _add(self, index: int, delta: int) -> None:
+        position = index + 1
+        while position <= self._size:
+            self._tree[position] += delta
+            position += position & -position
+
+    def _find(self, target: int) -> int:
+        # Наименьший индекс, у которого сумма весов до него включительно больше target
+        position, step = 0, self._top
+        tree = self._tree
+        while step:
+            candidate = position + step
+            if candidate <= self._size and tree[candidate] <= target:
+                position = candidate
+                target -= tree[candidate]
+            step >>= 1
+        return position
+
+    def sample(self, k: int, rng: random.Random) -> List[int]:
+        """
+        Выбирает до k различных индексов с вероятностью, пропорциональной весу.
+
+        Индексы с нулевым весом не выбираются; если ненулевых весов меньше k,
+        возвращаются все они.
+        """
+        removed: List[Tuple[int, int]] = []
+        try:
+            while len(removed) < k and self.total > 0:
+                index = self._find(rng.randrange(self.total))
+                weight = self._weights[index]
+                self._add(index, -weight)
+                self._weights[index] = 0
+                self.total -= weight
+                removed.append((index, weight))
+        finally:
+            for index, weight in removed:
+                self._weights[index] = weight
+                self._add(index, weight)
+                self.total += weight
+        return [index for index, _ in removed]
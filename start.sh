@@ -1,8 +1,12 @@
 #!/bin/bash
 set -e
 
-echo ">>> Running Alembic migrations..."
-alembic upgrade head
+# Миграции выполняет отдельный запуск (сервис migrate в docker-compose, job в кластере);
+# RUN_MIGRATIONS=true - для одиночного контейнера. Параллельные запуски ждут друг друга
+if [ "${RUN_MIGRATIONS:-false}" = "true" ]; then
+    echo ">>> Running migrations..."
+    python -m src.db.migrate
+fi
 
 echo ">>> Starting FastAPI app..."
-exec uvicorn src.main:app --host 0.0.0.0 --port 8000 --reload
+exec python -m src.server
@@ -1 +1,41 @@
 # Фикстуры для тестов
+
+import os
+import tempfile
+
+# Настройки читаются при импорте src, поэтому окружение задается до него:
+# отдельная SQLite-база во временном каталоге, без планировщика и демо-данных
+_DB_DIR = tempfile.mkdtemp(prefix="vk-randomizer-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}"
+os.environ["SCHEDULER_ENABLED"] = "false"
+os.environ["DEMO_DATA_ENABLED"] = "false"
+os.environ["SCHEMA_CHECK"] = "off"
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.db.base import Base
+from src.db.session import SessionLocal, engine
+from src.main import app
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    Base.metadata.create_all(engine)
+    yield engine
+    Base.metadata.drop_all(engine)
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client():
+    # Без контекстного менеджера: обработчики startup (планировщик, снимки подписок) не нужны
+    return TestClient(app)
@@ -0,0 +1,78 @@
+# Тесты для черных списков участников
+
+import pytest
+
+from src.db.models.raffle import Raffle
+from src.services.blacklist import load_blacklist, normalize_entries, normalize_entry
+from tests.test_api.test_raffle import _active_raffle
+
+
+@pytest.mark.parametrize("entry, expected", [
+    ("@Spam_User", "spam_user"),
+    ("spam_user", "spam_user"),
+    ("https://vk.com/Spam_User/", "spam_user"),
+    ("m.vk.ru/spam.user", "spam.user"),
+    ("@id123", "123"),
+    ("vk.com/id123", "123"),
+    ("123", "123"),
+    ("  ", None),
+    ("@", None),
+    ("имя пользователя", None),
+    ("https://example.com/x", None),
+])
+def test_normalize_entry(entry, expected):
+    assert normalize_entry(entry) == expected
+
+
+def test_normalize_entries_dedupes_in_order():
+    assert normalize_entries(["@B", "id1", "b", "vk.com/id1", "??", "a"]) == (["b", "1", "a"], 1)
+
+
+def test_import_export_remove_round_trip(client):
+    response = client.post("/api/v1/blacklists/10/import", json={"entries": ["@Bot2", "id5", "vk.com/bot1", "bot2", "!"]})
+    assert response.status_code == 200
+    assert response.json() == {"received": 5, "imported": 3, "invalid": 1}
+
+    # Повторный импорт ничего не добавляет
+    assert client.post("/api/v1/blacklists/10/import", json={"entries": ["bot1", "5"]}).json()["imported"] == 0
+
+    exported = client.get("/api/v1/blacklists/10").text
+    assert exported == "5\nbot1\nbot2\n"
+    assert client.post("/api/v1/blacklists/10/import", json={"entries": exported.split()}).json()["imported"] == 0
+
+    assert client.post("/api/v1/blacklists/10/remove", json={"entries": ["@BOT1", "missing"]}).json() == {"removed": 1}
+    assert client.get("/api/v1/blacklists/10").text == "5\nbot2\n"
+    # Списки других владельцев не затрагиваются
+    assert client.get("/api/v1/blacklists/11").text == ""
+
+
+def test_raffle_blacklist_only_for_owner(client):
+    raffle_id = _active_raffle(client)
+    other = client.post("/api/v1/blacklists/2/import", json={"entries": ["x"], "raffle_id": raffle_id})
+    assert other.status_code == 403
+    missing = client.post("/api/v1/blacklists/1/import", json={"entries": ["x"], "raffle_id": "missing"})
+    assert missing.status_code == 404
+    assert client.get("/api/v1/blacklists/2", params={"raffle_id": raffle_id}).status_code == 403
+
+
+def test_blacklisted_user_cannot_enter(client):
+    raffle_id = _active_raffle(client, vk_user_id="30", blacklist_participants=["@id701"])
+    # Список владельца действует на все его розыгрыши
+    client.post("/api/v1/blacklists/30/import", json={"entries": ["vk.com/id702"]})
+
+    for user_id in ("701", "702"):
+        response = client.post(f"/api/v1/raffles/{raffle_id}/participants", json={"user_id": user_id})
+        assert response.status_code == 403
+    assert client.post(f"/api/v1/raffles/{raffle_id}/participants", json={"user_id": "703"}).status_code == 201
+
+
+def test_raffle_field_synced_to_table(client, db):
+    raffle_id = _active_raffle(client, vk_user_id="40", blacklist_participants=["@id801", "@spam"])
+    assert client.post("/api/v1/blacklists/40/import", json={"entries": ["imported"], "raffle_id": raffle_id}).status_code == 200
+
+    response = client.put(f"/api/v1/raffles/{raffle_id}", json={"blacklist_participants": ["@spam", "@new"]})
+    assert response.status_code == 200
+    assert client.get("/api/v1/blacklists/40", params={"raffle_id": raffle_id}).text == "imported\nnew\nspam\n"
+
+    raffle = db.query(Raffle).filter(Raffle.id == raffle_id).one()
+    assert load_blacklist(db, raffle) == {"imported", "new", "spam"}
@@ -1 +1,195 @@
 # Тесты для эндпоинтов уведомлений
+
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from pydantic import ValidationError
+
+from src.db.models.notification import Notification, NotificationType, UserNotificationSettings
+from src.db.models.raffle import Raffle, RaffleParticipant
+from src.schemas.notification_card import (
+    CompletedNotificationCard,
+    WarningNotificationCard,
+    decode_card,
+    encode_card_payload,
+)
+from src.services.notification_fanout import fan_out_raffle_completion, resolve_recipients
+from src.utils.pagination import decode_cursor, encode_cursor
+from tests.test_api.test_raffle import _raffle_payload
+
+
+def _raffle(db, owner: str, participants=()) -> Raffle:
+    row = {key: value for key, value in _raffle_payload(vk_user_id=owner).items() if not key.endswith("_date")}
+    now = datetime.utcnow()
+    raffle = Raffle(id=str(uuid.uuid4()), start_date=now, end_date=now, created_at=now, **row)
+    db.add(raffle)
+    db.add_all(RaffleParticipant(raffle_id=raffle.id, user_id=user_id) for user_id in participants)
+    db.commit()
+    return raffle
+
+
+def _user(prefix: str = "u") -> str:
+    return f"{prefix}{uuid.uuid4().hex[:12]}"
+
+
+# --- Рассылка итогов розыгрыша ---
+
+def test_recipients_are_owner_participants_and_winners(db):
+    owner, first, second = _user(), _user(), _user()
+    raffle = _raffle(db, owner, [first, second])
+    assert resolve_recipients(db, raffle, [second]) == {owner: False, first: False, second: True}
+
+
+def test_fan_out_respects_preferences_in_batches(db):
+    owner, winner, muted_loser, muted_winner, *others = [_user() for _ in range(8)]
+    raffle = _raffle(db, owner, [winner, muted_loser, muted_winner, *others])
+    db.add_all([
+        UserNotificationSettings(user_id=muted_loser, finish_notify=False),
+        UserNotificationSettings(user_id=muted_winner, win_notify=False, finish_notify=True),
+    ])
+    db.commit()
+
+    created = fan_out_raffle_completion(db, raffle, [winner, muted_winner], reason_end="Итоги", batch_size=2)
+    db.commit()
+
+    rows = db.query(Notification).filter(Notification.payload["raffleId"].as_string() == raffle.id).all()
+    assert created == len(rows) == 2 + len(others)
+    assert {row.user_id for row in rows} == {owner, winner, *others}
+    assert all(row.type == NotificationType.COMPLETED and row.new for row in rows)
+    assert rows[0].payload["winners"] == [winner, muted_winner]
+    assert rows[0].payload["reasonEnd"] == "Итоги"
+
+
+# --- Курсорная пагинация и фильтры ---
+
+def _feed(db, user_id: str, count: int) -> list:
+    # Время создания повторяется парами: порядок внутри пары задает id
+    base = datetime(2026, 1, 1, 12, 0)
+    rows = [
+        Notification(
+            type=NotificationType.WARNING if index % 3 else NotificationType.ERROR,
+            user_id=user_id,
+            payload={"warningTitle": "t", "warningDescription": []} if index % 3 else {"errorTitle": "t", "errorDescription": "d"},
+            new=index % 2 == 0,
+            created_at=base + timedelta(minutes=index // 2),
+        )
+        for index in range(count)
+    ]
+    db.add_all(rows)
+    db.commit()
+    return sorted(rows, key=lambda row: (row.created_at, row.id), reverse=True)
+
+
+def test_cursor_pages_cover_feed_once_in_order(client, db):
+    user_id = _user()
+    expected = [row.id for row in _feed(db, user_id, 7)]
+
+    seen, cursor = [], None
+    while True:
+        params = {"user_id": user_id, "limit": 3, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/api/v1/notification-cards/", params=params).json()
+        seen += [card["id"] for card in page["notifications"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == expected
+
+
+def test_listing_filters_by_type_and_state(client, db):
+    user_id = _user()
+    rows = _feed(db, user_id, 6)
+    page = client.get("/api/v1/notification-cards/", params={"user_id": user_id, "type": "error", "new": True}).json()
+    expected = [row.id for row in rows if row.type == NotificationType.ERROR and row.new]
+    assert [card["id"] for card in page["notifications"]] == expected
+
+
+def test_invalid_cursor_returns_400(client):
+    response = client.get("/api/v1/notification-cards/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+def test_cursor_decodes_to_utc():
+    moment = datetime(2026, 3, 1, 15, 30, tzinfo=timezone(timedelta(hours=3)))
+    assert decode_cursor(encode_cursor(moment, 7)) == (datetime(2026, 3, 1, 12, 30), 7)
+    assert decode_cursor(encode_cursor(datetime(2026, 3, 1, 12, 30), 7), aware=True) == (
+        datetime(2026, 3, 1, 12, 30, tzinfo=timezone.utc), 7
+    )
+    with pytest.raises(ValueError):
+        decode_cursor("bm8tc2VwYXJhdG9y")
+
+
+# --- Массовые операции ---
+
+def test_mark_read_by_ids_and_cursor(client, db):
+    user_id = _user()
+    rows = _feed(db, user_id, 6)
+    unread = [row for row in rows if row.new]
+
+    response = client.post("/api/v1/notification-cards/mark-read", json={"user_id": user_id, "ids": [unread[0].id]})
+    assert response.json() == {"affected": 1, "unread_count": len(unread) - 1}
+
+    # before: позиция курсора и все более старые
+    before = encode_cursor(unread[1].created_at, unread[1].id)
+    response = client.post("/api/v1/notification-cards/mark-read", json={"user_id": user_id, "before": before})
+    assert response.json() == {"affected": len(unread) - 1, "unread_count": 0}
+
+
+def test_mark_read_without_selector_marks_whole_feed(client, db):
+    user_id = _user()
+    unread = sum(row.new for row in _feed(db, user_id, 5))
+    response = client.post("/api/v1/notification-cards/mark-read", json={"user_id": user_id})
+    assert response.json() == {"affected": unread, "unread_count": 0}
+    assert client.get("/api/v1/notification-cards/unread/count", params={"user_id": user_id}).json() == {"unread_count": 0}
+
+
+def test_bulk_delete_requires_selector(client, db):
+    user_id = _user()
+    _feed(db, user_id, 3)
+    assert client.post("/api/v1/notification-cards/bulk-delete", json={"user_id": user_id}).status_code == 422
+    assert db.query(Notification).filter(Notification.user_id == user_id).count() == 3
+
+
+def test_bulk_delete_all_and_by_ids(client, db):
+    user_id, other = _user(), _user()
+    rows = _feed(db, user_id, 4)
+    _feed(db, other, 2)
+
+    response = client.post("/api/v1/notification-cards/bulk-delete", json={"user_id": user_id, "ids": [rows[0].id]})
+    assert response.json()["affected"] == 1
+    response = client.post("/api/v1/notification-cards/bulk-delete", json={"user_id": user_id, "all": True})
+    assert response.json() == {"affected": 3, "unread_count": 0}
+    assert db.query(Notification).filter(Notification.user_id == user_id).count() == 0
+    assert db.query(Notification).filter(Notification.user_id == other).count() == 2
+
+
+# --- Хранение карточек в payload ---
+
+def test_decode_fills_defaults_for_legacy_payload():
+    card = decode_card(5, "completed", {"raffleId": 12, "winners": None}, True)
+    assert isinstance(card, CompletedNotificationCard)
+    assert card.dict() == {
+        "id": 5, "type": "completed", "raffleId": 12, "participantsCount": 0, "winners": [], "reasonEnd": "", "new": True,
+    }
+    warning = decode_card(6, "warning", {"warningTitle": "Виджет"}, False)
+    assert isinstance(warning, WarningNotificationCard)
+    assert warning.warningDescription == []
+
+
+def test_encode_validates_and_strips_column_fields():
+    card = WarningNotificationCard(id=1, type="warning", warningTitle="t", warningDescription=["a"], new=True)
+    assert encode_card_payload(card) == {"warningTitle": "t", "warningDescription": ["a"]}
+    broken = CompletedNotificationCard.model_construct(type="completed", raffleId=1, participantsCount="many",
+                                                        winners=[], reasonEnd="", new=True)
+    with pytest.raises(ValidationError):
+        encode_card_payload(broken)
+
+
+def test_card_round_trips_through_api(client, db):
+    user_id = _user()
+    card = {"type": "error", "errorTitle": "Ошибка", "errorDescription": "VK недоступен", "new": True}
+    created = client.post("/api/v1/notification-cards/", params={"user_id": user_id}, json=card).json()["notification"]
+    assert created == {**card, "id": created["id"]}
+    row = db.query(Notification).filter(Notification.id == created["id"]).one()
+    assert row.payload == {"errorTitle": "Ошибка", "errorDescription": "VK недоступен"}
+    assert client.get(f"/api/v1/notification-cards/{created['id']}").json()["notification"] == created
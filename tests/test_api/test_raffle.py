@@ -1 +1,462 @@
 # Тесты для эндпоинтов розыгрышей
+
+import os
+import random
+import uuid
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from src.core.config import settings
+from src.db.base import Base
+from src.db.models.raffle import Raffle, RaffleCounterShard, RaffleParticipant, RaffleStatus
+from src.services.admission import CLOSED_FULL, AdmissionController
+from src.services.draw import select_winners
+from src.services.eligibility import InMemoryMembershipSource, RuleSet, compile_rules, set_membership_source
+from src.services.participant_counter import configure_counter, participant_total, split_capacity
+from src.services.raffle_lifecycle import complete_expired_raffles, complete_raffle, resume_completing_raffles
+from src.services.raffle_partitions import (
+    DEFAULT_PARTITION,
+    list_partitions,
+    live_created_after,
+    maintain_raffle_partitions,
+    plan_partitions,
+)
+from src.services.scheduler import Scheduler
+from src.utils.db_init import init_raffle_data
+from src.utils.synthetic_data import RAFFLE_PREFIX, SyntheticSpec, clear, generate
+
+SEED = "5f" * 32
+
+
+def _raffle_payload(**overrides) -> dict:
+    now = datetime.now()
+    payload = {
+        "vk_user_id": "1",
+        "name": "Тестовый розыгрыш",
+        "community_id": "club1",
+        "contest_text": "Условия",
+        "photos": [],
+        "required_communities": [],
+        "winners_count": 1,
+        "start_date": now.isoformat(),
+        "end_date": (now + timedelta(days=1)).isoformat(),
+    }
+    payload.update(overrides)
+    return payload
+
+
+def _active_raffle(client, **overrides) -> str:
+    response = client.post("/api/v1/raffles/", json=_raffle_payload(**overrides))
+    assert response.status_code == 201
+    raffle_id = response.json()["id"]
+    assert client.patch(f"/api/v1/raffles/{raffle_id}/status", params={"status": "active"}).status_code == 200
+    return raffle_id
+
+
+# --- Лимиты частей счетчика ---
+
+def test_split_capacity_divides_remaining_places():
+    capacities = split_capacity(10, [0, 0, 0, 0])
+    assert capacities == [3, 3, 2, 2]
+    assert sum(capacities) == 10
+
+
+def test_split_capacity_keeps_already_counted():
+    capacities = split_capacity(8, [5, 0, 0])
+    assert capacities == [6, 1, 1]
+    assert all(capacity >= count for capacity, count in zip(capacities, [5, 0, 0]))
+
+
+def test_split_capacity_never_below_counted_when_over_limit():
+    # Лимит уменьшили ниже набранного: новых мест нет, набранное не теряется
+    assert split_capacity(10, [7, 4]) == [7, 4]
+
+
+def test_split_capacity_without_limit():
+    assert split_capacity(None, [3, 0]) == [None, None]
+
+
+def test_configure_counter_capacities_sum_to_limit(client, db):
+    raffle_id = _active_raffle(client, max_participants=5)
+    shards = db.query(RaffleCounterShard).filter(RaffleCounterShard.raffle_id == raffle_id).all()
+    assert shards
+    assert sum(shard.capacity for shard in shards) == 5
+
+
+# --- Допуск заявок ---
+
+def test_admission_refuses_when_limit_reached(client, db):
+    raffle_id = _active_raffle(client, max_participants=3)
+    raffle = db.query(Raffle).filter(Raffle.id == raffle_id).one()
+    admission = AdmissionController(closed_ttl=60)
+
+    for _ in range(3):
+        assert admission.reserve(db, raffle) is not None
+        db.commit()
+    assert admission.reserve(db, raffle) is None
+    db.rollback()
+
+    assert participant_total(db, raffle) == 3
+    assert admission.closed_reason(raffle_id) == CLOSED_FULL
+
+
+def test_rolled_back_entry_releases_place(client, db):
+    raffle_id = _active_raffle(client, max_participants=1)
+    raffle = db.query(Raffle).filter(Raffle.id == raffle_id).one()
+    admission = AdmissionController(closed_ttl=60)
+
+    assert admission.reserve(db, raffle) is not None
+    db.rollback()
+    assert participant_total(db, raffle) == 0
+    assert admission.reserve(db, raffle) is not None
+    db.commit()
+    assert participant_total(db, raffle) == 1
+
+
+def test_entry_over_limit_returns_409(client):
+    raffle_id = _active_raffle(client, max_participants=2)
+    for user_id in ("101", "102"):
+        response = client.post(f"/api/v1/raffles/{raffle_id}/participants", json={"user_id": user_id})
+        assert response.status_code == 201
+
+    response = client.post(f"/api/v1/raffles/{raffle_id}/participants", json={"user_id": "103"})
+    assert response.status_code == 409
+    assert client.get(f"/api/v1/raffles/{raffle_id}").json()["participants_count"] == 2
+
+
+def test_limit_change_reopens_admission(client, db):
+    raffle_id = _active_raffle(client, max_participants=1)
+    raffle = db.query(Raffle).filter(Raffle.id == raffle_id).one()
+    admission = AdmissionController(closed_ttl=60)
+    assert admission.reserve(db, raffle) is not None
+    db.commit()
+    assert admission.reserve(db, raffle) is None
+    db.rollback()
+
+    raffle.max_participants = 2
+    configure_counter(db, raffle)
+    admission.reopen(raffle_id)
+    assert admission.reserve(db, raffle) is not None
+    db.commit()
+    assert participant_total(db, raffle) == 2
+
+
+# --- Повтор проверяемого выбора с весами ---
+
+def _weighted_entries(count: int):
+    return [(str(1000 + index), 1 + index % 4) for index in range(count)]
+
+
+def test_select_winners_ignores_entry_order():
+    entries = _weighted_entries(200)
+    expected = select_winners(SEED, entries, 5)
+    shuffled = entries[:]
+    for _ in range(5):
+        random.shuffle(shuffled)
+        assert select_winners(SEED, shuffled, 5) == expected
+
+
+def test_select_winners_skips_zero_weight():
+    entries = [(user_id, 0 if index % 2 else weight) for index, (user_id, weight) in enumerate(_weighted_entries(50))]
+    excluded = {user_id for user_id, weight in entries if weight == 0}
+    winners = select_winners(SEED, entries, 10)
+    assert len(winners) == 10
+    assert not excluded.intersection(winners)
+
+
+def test_select_winners_depends_on_weights():
+    entries = _weighted_entries(200)
+    unweighted = [(user_id, 1) for user_id, _ in entries]
+    assert select_winners(SEED, entries, 20) != select_winners(SEED, unweighted, 20)
+
+
+def test_completed_weighted_draw_replays(client, db):
+    raffle_id = _active_raffle(client, winners_count=3, blacklist_participants=["1003"])
+    entries = _weighted_entries(60)
+    db.add_all(RaffleParticipant(raffle_id=raffle_id, user_id=user_id, weight=weight) for user_id, weight in entries)
+    db.commit()
+
+    raffle = db.query(Raffle).filter(Raffle.id == raffle_id).one()
+    winners = complete_raffle(db, raffle)
+    assert winners is not None and len(winners) == 3
+    assert "1003" not in winners
+
+    verification = client.get(f"/api/v1/raffles/{raffle_id}/draw/verify").json()
+    assert verification["valid"] is True
+    assert verification["recomputed_winners"] == winners
+
+    # Независимая проверка по выгрузке: раскрытый seed и веса дают тех же победителей
+    draw = client.get(f"/api/v1/raffles/{raffle_id}/draw").json()
+    exported = client.get(f"/api/v1/raffles/{raffle_id}/draw/participants").text.splitlines()
+    rows = [line.split("\t") for line in exported]
+    assert {user_id for user_id, _, reason in rows if reason} == {"1003"}
+    replayed = [(user_id, int(weight)) for user_id, weight, _ in rows]
+    random.shuffle(replayed)
+    assert select_winners(draw["seed"], replayed, draw["winners_count"]) == draw["winners"] == winners
+
+    db.expire_all()
+    completed = db.query(Raffle).filter(Raffle.id == raffle_id).one()
+    assert completed.status == RaffleStatus.COMPLETED
+
+
+# --- Уникальность id при первичном ключе (id, created_at) ---
+
+def test_raffle_id_stays_unique_across_created_at(client, db):
+    raffle_id = client.post("/api/v1/raffles/", json=_raffle_payload()).json()["id"]
+    row = {key: value for key, value in _raffle_payload().items() if not key.endswith("_date")}
+    now = datetime.now()
+    db.add(Raffle(id=raffle_id, start_date=now, end_date=now, created_at=now - timedelta(days=40), **row))
+    with pytest.raises(IntegrityError):
+        db.commit()
+    db.rollback()
+
+
+def test_seed_data_rerun_inserts_nothing(db):
+    init_raffle_data(db)
+    init_raffle_data(db)
+    assert db.query(Raffle).filter(Raffle.id.in_(["492850", "382189", "818394"])).count() == 3
+
+    spec = SyntheticSpec(raffles=20, participants=2, notifications=0, users=10, batch_size=100)
+    assert generate(db, spec)["raffles"] == 20
+    assert generate(db, spec) == {"raffles": 0, "raffle_participants": 0, "notifications": 0}
+    assert db.query(Raffle).filter(Raffle.id.like(f"{RAFFLE_PREFIX}%")).count() == 20
+    clear(db)
+
+
+# --- Окно created_at для сканирований и списков ---
+
+def test_end_date_beyond_max_lifetime_rejected(client):
+    far = datetime.now() + timedelta(days=settings.RAFFLE_MAX_LIFETIME_DAYS + 1)
+    assert client.post("/api/v1/raffles/", json=_raffle_payload(end_date=far.isoformat())).status_code == 400
+
+    raffle_id = client.post("/api/v1/raffles/", json=_raffle_payload()).json()["id"]
+    response = client.put(f"/api/v1/raffles/{raffle_id}", json={"end_date": far.isoformat()})
+    assert response.status_code == 400
+
+
+def test_scans_skip_raffles_outside_live_window(client, db):
+    raffle_id = _active_raffle(client)
+    raffle = db.query(Raffle).filter(Raffle.id == raffle_id).one()
+    raffle.created_at = live_created_after() - timedelta(days=1)
+    raffle.end_date = datetime.now() - timedelta(minutes=1)
+    db.commit()
+
+    assert complete_expired_raffles(db) == 0
+    listed = client.get("/api/v1/raffles/", params={"status": "active", "per_page": 100}).json()["raffles"]
+    assert raffle_id not in {item["id"] for item in listed}
+    # Вне окна розыгрыш по-прежнему доступен по id и завершается вручную
+    assert complete_raffle(db, raffle) is not None
+
+
+# --- Секции raffles ---
+
+def test_plan_partitions_creates_ahead_and_row_months(monkeypatch):
+    monkeypatch.setattr(settings, "RAFFLE_PARTITIONS_AHEAD", 2)
+    existing = ["raffles_default", "raffles_p202609", "raffles_p202610", "raffles_p202612"]
+    to_create, past = plan_partitions(existing, date(2026, 10, 1), [date(2025, 3, 1)])
+    assert to_create == [date(2025, 3, 1), date(2026, 11, 1)]
+    assert past == ["raffles_p202609"]
+
+
+def test_plan_partitions_never_drops_current_future_or_default():
+    existing = ["raffles_default", "raffles_p202510", "raffles_p202610", "raffles_p202701", "raffles_archive"]
+    _, past = plan_partitions(existing, date(2026, 10, 1))
+    assert past == ["raffles_p202510"]
+
+
+@pytest.fixture
+def pg_db():
+    # Секции есть только на Postgres: тесты идут на отдельной базе из TEST_POSTGRES_URL
+    url = os.environ.get("TEST_POSTGRES_URL")
+    if not url:
+        pytest.skip("TEST_POSTGRES_URL не задан")
+    engine = create_engine(url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF raffles DEFAULT"))
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(engine)
+        engine.dispose()
+
+
+def _pg_raffle(db, created_at: datetime, status: RaffleStatus = RaffleStatus.COMPLETED) -> str:
+    raffle_id = str(uuid.uuid4())
+    row = {key: value for key, value in _raffle_payload().items() if not key.endswith("_date")}
+    db.add(Raffle(id=raffle_id, start_date=created_at, end_date=created_at, created_at=created_at, status=status, **row))
+    db.commit()
+    return raffle_id
+
+
+def test_create_partition_moves_rows_and_keeps_ids(pg_db):
+    raffle_id = _pg_raffle(pg_db, datetime(2026, 3, 15))
+    assert maintain_raffle_partitions(pg_db, now=datetime(2026, 3, 20)) == settings.RAFFLE_PARTITIONS_AHEAD + 1
+
+    assert "raffles_p202603" in list_partitions(pg_db)
+    assert pg_db.execute(text(f"SELECT count(*) FROM {DEFAULT_PARTITION}")).scalar() == 0
+    assert pg_db.execute(text("SELECT count(*) FROM raffles_p202603 WHERE id = :id"), {"id": raffle_id}).scalar() == 1
+    assert pg_db.execute(text("SELECT count(*) FROM raffle_ids WHERE id = :id"), {"id": raffle_id}).scalar() == 1
+
+
+def test_past_partition_dropped_only_when_empty(pg_db, caplog):
+    now = datetime(2026, 3, 20)
+    finished = _pg_raffle(pg_db, datetime(2026, 3, 15))
+    draft = _pg_raffle(pg_db, datetime(2026, 3, 16), RaffleStatus.DRAFT)
+    maintain_raffle_partitions(pg_db, now=now)
+
+    later = now + timedelta(days=settings.RAFFLE_MAX_LIFETIME_DAYS + settings.RAFFLE_SCAN_GRACE_DAYS + 60)
+    pg_db.query(Raffle).filter(Raffle.id == finished).delete()
+    pg_db.commit()
+    maintain_raffle_partitions(pg_db, now=later)
+    assert "raffles_p202603" in list_partitions(pg_db)
+    assert "raffles_p202603" in caplog.text
+
+    pg_db.query(Raffle).filter(Raffle.id == draft).delete()
+    pg_db.commit()
+    maintain_raffle_partitions(pg_db, now=later)
+    assert "raffles_p202603" not in list_partitions(pg_db)
+
+
+# --- Ручное завершение ---
+
+def test_manual_completion_draws_winners(client, db):
+    raffle_id = _active_raffle(client, winners_count=2)
+    db.add_all(RaffleParticipant(raffle_id=raffle_id, user_id=user_id, weight=1) for user_id, _ in _weighted_entries(10))
+    db.commit()
+
+    response = client.patch(f"/api/v1/raffles/{raffle_id}/status", params={"status": "completed"})
+    assert response.status_code == 200
+    assert response.json()["status"] == "completed"
+    assert client.get(f"/api/v1/raffles/{raffle_id}/draw/verify").json()["valid"] is True
+    db.expire_all()
+    assert len(db.query(Raffle).filter(Raffle.id == raffle_id).one().winners) == 2
+
+
+def test_manual_completion_requires_active(client):
+    raffle_id = client.post("/api/v1/raffles/", json=_raffle_payload()).json()["id"]
+    response = client.patch(f"/api/v1/raffles/{raffle_id}/status", params={"status": "completed"})
+    assert response.status_code == 400
+
+
+# --- Удаление ---
+
+def test_delete_raffle_removes_participants(client, db):
+    raffle_id = _active_raffle(client, max_participants=5)
+    assert client.post(f"/api/v1/raffles/{raffle_id}/participants", json={"user_id": "201"}).status_code == 201
+
+    assert client.delete(f"/api/v1/raffles/{raffle_id}").status_code == 204
+    assert db.query(RaffleParticipant).filter(RaffleParticipant.raffle_id == raffle_id).count() == 0
+    assert db.query(RaffleCounterShard).filter(RaffleCounterShard.raffle_id == raffle_id).count() == 0
+
+
+# --- Планировщик и завершение ---
+
+def test_expired_raffle_completed_by_scheduler_job(client, db):
+    raffle_id = _active_raffle(client)
+    db.add(RaffleParticipant(raffle_id=raffle_id, user_id="401"))
+    raffle = db.query(Raffle).filter(Raffle.id == raffle_id).one()
+    raffle.end_date = datetime.now() - timedelta(minutes=1)
+    db.commit()
+
+    assert complete_expired_raffles(db) >= 1
+    db.expire_all()
+    completed = db.query(Raffle).filter(Raffle.id == raffle_id).one()
+    assert completed.status == RaffleStatus.COMPLETED
+    assert completed.winners == ["401"]
+
+
+def test_stalled_completing_raffle_resumed(client, db):
+    raffle_id = _active_raffle(client)
+    db.add(RaffleParticipant(raffle_id=raffle_id, user_id="402"))
+    raffle = db.query(Raffle).filter(Raffle.id == raffle_id).one()
+    # Процесс остановился после перехода в COMPLETING, до выбора победителей
+    raffle.status = RaffleStatus.COMPLETING
+    db.commit()
+
+    assert client.post(f"/api/v1/raffles/{raffle_id}/participants", json={"user_id": "403"}).status_code != 201
+    assert resume_completing_raffles(db) >= 1
+    db.expire_all()
+    assert db.query(Raffle).filter(Raffle.id == raffle_id).one().status == RaffleStatus.COMPLETED
+
+
+def test_scheduler_runs_remaining_jobs_after_failure(db):
+    calls = []
+
+    def failing(session):
+        raise RuntimeError("boom")
+
+    scheduler = Scheduler(interval=60)
+    scheduler.add_job("failing", failing)
+    scheduler.add_job("after", lambda session: calls.append(session), exclusive=True)
+    scheduler.run_jobs()
+    assert len(calls) == 1
+    assert scheduler.last_tick_at is not None
+    assert scheduler.lag() == 0
+
+
+# --- Условия участия ---
+
+def _rules_raffle(**fields) -> Raffle:
+    values = dict(
+        id="rules", vk_user_id="1", community_id="club1", blacklist_participants=[],
+        require_community_subscription=False, required_communities=[], require_telegram_subscription=False,
+        telegram_channel=None, exclude_me=False, exclude_admins=False,
+    )
+    values.update(fields)
+    return Raffle(**values)
+
+
+def test_compile_rules_orders_required_and_explains_exclusion():
+    source = InMemoryMembershipSource(
+        members={"club1": {"1", "2", "3", "4"}, "@partner": {"2", "3"}},
+        admins={"club1": {"4"}},
+    )
+    raffle = _rules_raffle(
+        require_community_subscription=True, required_communities=["@partner", "@unknown"],
+        exclude_me=True, exclude_admins=True, blacklist_participants=["@id3"],
+    )
+    rules = compile_rules(raffle, source)
+
+    # Меньшее множество проверяется первым; условие без данных пропускается
+    assert rules.required_rules == ("required_community:@partner", "community:club1")
+    assert rules.excluded == {"1", "3", "4"}
+    assert rules.filter(["5", "4", "3", "2", "1"]) == ["2"]
+    assert list(rules.ineligible(["1", "2", "3", "4", "5"], batch_size=2)) == ["1", "3", "4", "5"]
+    assert [rules.reason(user_id) for user_id in ("1", "3", "4", "5")] == [
+        "exclude_me", "blacklist", "exclude_admins:club1", "required_community:@partner",
+    ]
+
+
+def test_compile_rules_without_source_checks_only_exclusions():
+    rules = compile_rules(_rules_raffle(require_community_subscription=True))
+    assert rules.is_empty
+    assert rules.filter(["1", "2"]) == ["1", "2"]
+    assert RuleSet(required=({"1"},)).filter(["2", "1"]) == ["1"]
+
+
+def test_ineligible_participants_marked_and_skipped_in_draw(client, db):
+    raffle_id = _active_raffle(client, require_community_subscription=True, winners_count=2)
+    for user_id in ("501", "502", "503"):
+        db.add(RaffleParticipant(raffle_id=raffle_id, user_id=user_id))
+    db.commit()
+    raffle = db.query(Raffle).filter(Raffle.id == raffle_id).one()
+
+    set_membership_source(InMemoryMembershipSource(members={"club1": {"501", "503"}}))
+    try:
+        assert sorted(complete_raffle(db, raffle)) == ["501", "503"]
+    finally:
+        set_membership_source(None)
+
+    rows = dict(
+        db.query(RaffleParticipant.user_id, RaffleParticipant.excluded_reason)
+        .filter(RaffleParticipant.raffle_id == raffle_id)
+    )
+    assert rows == {"501": None, "502": "community:club1", "503": None}
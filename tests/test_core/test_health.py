@@ -0,0 +1,79 @@
+# Тесты проб готовности
+
+import asyncio
+import time
+
+from src.core.health import ReadinessProbe
+from src.db.session import engine
+
+
+class CountingProbe(ReadinessProbe):
+    def __init__(self, *args, delay: float = 0.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.delay = delay
+        self.pings = 0
+
+    def _ping(self) -> None:
+        self.pings += 1
+        time.sleep(self.delay)
+        super()._ping()
+
+
+class LaggingScheduler:
+    running = True
+
+    def __init__(self, lag: float):
+        self._lag = lag
+
+    def lag(self) -> float:
+        return self._lag
+
+
+def test_readiness_ok(client):
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "ready"
+    assert body["checks"]["database"]["ok"] is True
+
+
+def test_liveness_does_not_touch_database(client):
+    assert client.get("/health/live").json()["status"] == "alive"
+
+
+def test_slow_ping_times_out():
+    probe = CountingProbe(engine, delay=0.3, db_timeout=0.05, cache_seconds=0)
+    ready, body = asyncio.run(probe.check())
+    assert not ready
+    assert body["checks"]["database"] == {"ok": False, "error": "нет ответа за 0.05 с"}
+
+
+def test_result_cached_and_concurrent_probes_share_one_check():
+    probe = CountingProbe(engine, delay=0.05, cache_seconds=60)
+
+    async def burst():
+        return await asyncio.gather(*(probe.check() for _ in range(5)))
+
+    results = asyncio.run(burst())
+    assert all(ready for ready, _ in results)
+    asyncio.run(probe.check())
+    assert probe.pings == 1
+
+
+def test_exhausted_pool_skips_ping():
+    probe = CountingProbe(engine, pool_capacity=1, cache_seconds=0)
+    connection = engine.connect()
+    try:
+        ready, body = asyncio.run(probe.check())
+    finally:
+        connection.close()
+    assert not ready
+    assert probe.pings == 0
+    assert body["checks"]["pool"]["ok"] is False
+
+
+def test_lagging_scheduler_not_ready():
+    probe = ReadinessProbe(engine, scheduler=LaggingScheduler(lag=120), max_scheduler_lag=60, cache_seconds=0)
+    ready, body = asyncio.run(probe.check())
+    assert not ready
+    assert body["checks"]["scheduler"]["lag_seconds"] == 120
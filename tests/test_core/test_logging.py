@@ -0,0 +1,123 @@
+# Тесты логирования: сэмплирование, JSON-формат и ID запроса
+
+import json
+import logging
+import queue
+import sys
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.core.logging import JsonFormatter, RequestContextFilter, SamplingFilter, _ContextQueueHandler
+from src.core.request_context import BACKGROUND_ROUTE, REQUEST_ID_HEADER, RequestContextMiddleware
+
+
+def _record(level: int = logging.INFO, msg: str = "сообщение", **extra) -> logging.LogRecord:
+    record = logging.makeLogRecord({"name": "test", "levelno": level, "levelname": logging.getLevelName(level), "msg": msg})
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+class _Capture(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
+
+
+def test_sampling_never_drops_warnings():
+    drop_all = SamplingFilter(0.0)
+    assert not drop_all.filter(_record(logging.INFO))
+    assert not drop_all.filter(_record(logging.DEBUG))
+    assert drop_all.filter(_record(logging.WARNING))
+    assert drop_all.filter(_record(logging.ERROR))
+    assert SamplingFilter(1.0).filter(_record(logging.INFO))
+
+
+def test_sampling_keeps_share_of_info(monkeypatch):
+    values = iter([0.1, 0.9])
+    monkeypatch.setattr("src.core.logging.random.random", lambda: next(values))
+    sampler = SamplingFilter(0.5)
+    assert sampler.filter(_record())
+    assert not sampler.filter(_record())
+
+
+def test_json_formatter_single_line_with_extra_fields():
+    record = _record(msg="строка\nвторая", request_id="req-1", route="/api/v1/raffles", raffle_id=7)
+    line = JsonFormatter().format(record)
+    assert "\n" not in line
+    entry = json.loads(line)
+    assert entry["level"] == "INFO"
+    assert entry["message"] == "строка\nвторая"
+    assert entry["request_id"] == "req-1"
+    assert entry["route"] == "/api/v1/raffles"
+    assert entry["raffle_id"] == 7
+    assert "trace_id" not in entry
+
+
+def test_json_formatter_keeps_traceback_from_queue():
+    try:
+        raise ValueError("сбой")
+    except ValueError:
+        record = logging.getLogger("test").makeRecord(
+            "test", logging.ERROR, __file__, 1, "ошибка %s", ("розыгрыша",), sys.exc_info()
+        )
+    prepared = _ContextQueueHandler(queue.SimpleQueue()).prepare(record)
+    assert prepared.exc_info is None
+    assert prepared.msg == "ошибка розыгрыша"
+
+    entry = json.loads(JsonFormatter().format(prepared))
+    assert entry["message"] == "ошибка розыгрыша"
+    assert "ValueError: сбой" in entry["exception"]
+
+
+def test_context_filter_outside_request():
+    record = _record()
+    RequestContextFilter().filter(record)
+    assert record.request_id == "-"
+    assert record.route == BACKGROUND_ROUTE
+
+
+def _logging_app(capture: _Capture) -> TestClient:
+    logger = logging.getLogger("tests.request_context")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    logger.handlers = [capture]
+    capture.addFilter(RequestContextFilter())
+
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    def read_item(item_id: int):
+        logger.info("чтение %s", item_id)
+        return {"id": item_id}
+
+    app.add_middleware(RequestContextMiddleware)
+    return TestClient(app)
+
+
+def test_request_id_from_header_reaches_logs_and_response():
+    capture = _Capture()
+    client = _logging_app(capture)
+
+    response = client.get("/items/5", headers={REQUEST_ID_HEADER: "lb-123.a"})
+    assert response.headers[REQUEST_ID_HEADER] == "lb-123.a"
+    [record] = capture.records
+    assert record.request_id == "lb-123.a"
+    assert record.route == "/items/{item_id}"
+
+
+def test_invalid_request_id_replaced():
+    capture = _Capture()
+    client = _logging_app(capture)
+
+    response = client.get("/items/5", headers={REQUEST_ID_HEADER: "bad id " + "x" * 80})
+    generated = response.headers[REQUEST_ID_HEADER]
+    assert len(generated) == 32 and generated.isalnum()
+    assert capture.records[0].request_id == generated
+
+    other = client.get("/items/6").headers[REQUEST_ID_HEADER]
+    assert other != generated
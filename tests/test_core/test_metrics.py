@@ -0,0 +1,48 @@
+# Тесты метрик Prometheus
+
+from prometheus_client import REGISTRY
+from prometheus_client.parser import text_string_to_metric_families
+
+
+def _value(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_requests_labelled_by_route_template(client):
+    labels = {"method": "GET", "route": "/api/v1/raffles/{raffle_id}"}
+    before = _value("http_requests_total", status="404", **labels)
+    observed = _value("http_request_duration_seconds_count", **labels)
+
+    for raffle_id in ("missing-1", "missing-2"):
+        assert client.get(f"/api/v1/raffles/{raffle_id}").status_code == 404
+
+    assert _value("http_requests_total", status="404", **labels) == before + 2
+    assert _value("http_request_duration_seconds_count", **labels) == observed + 2
+    # ID не попадают в метки
+    assert REGISTRY.get_sample_value("http_requests_total", {**labels, "route": "/api/v1/raffles/missing-1", "status": "404"}) is None
+
+
+def test_unmatched_paths_share_one_label(client):
+    labels = {"method": "GET", "route": "<unmatched>", "status": "404"}
+    before = _value("http_requests_total", **labels)
+    client.get("/no-such-path/1")
+    client.get("/no-such-path/2")
+    assert _value("http_requests_total", **labels) == before + 2
+
+
+def test_sql_queries_counted_per_request(client):
+    labels = {"route": "/api/v1/raffles/{raffle_id}"}
+    before = _value("db_queries_per_request_count", **labels)
+    client.get("/api/v1/raffles/missing-3")
+    assert _value("db_queries_per_request_count", **labels) == before + 1
+    assert _value("db_queries_per_request_sum", **labels) >= 1
+
+
+def test_metrics_endpoint_exposes_parseable_text(client):
+    client.get("/")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    families = {family.name for family in text_string_to_metric_families(response.text)}
+    assert {"http_requests", "http_request_duration_seconds", "http_requests_in_progress"} <= families
+    assert "http_requests_created" not in response.text
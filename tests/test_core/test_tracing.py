@@ -0,0 +1,179 @@
+# Тесты трассировки
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from opentelemetry import trace
+from opentelemetry.trace import SpanKind
+from sqlalchemy import create_engine, text
+
+from src.core.tracing import (
+    FileSpanExporter,
+    InMemorySpanExporter,
+    SimpleSpanProcessor,
+    configure_tracing,
+    continue_trace,
+    create_exporter,
+    current_trace_id,
+    current_traceparent,
+    instrument_engine_tracing,
+    link_span,
+    parse_traceparent,
+    tracer,
+    TracingMiddleware,
+)
+from src.db.models.raffle import Raffle, RaffleParticipant
+from src.main import app
+from src.services.raffle_lifecycle import complete_raffle
+from tests.test_api.test_raffle import _active_raffle
+
+
+@pytest.fixture
+def spans():
+    exporter = InMemorySpanExporter()
+    configure_tracing(SimpleSpanProcessor(exporter))
+    yield exporter
+    configure_tracing(None)
+
+
+@pytest.fixture
+def traced_client():
+    # TracingMiddleware подключается при TRACING_ENABLED, в тестах оно выключено
+    return TestClient(TracingMiddleware(app))
+
+
+def _by_name(exporter, name):
+    return [span for span in exporter.get_finished_spans() if span.name == name]
+
+
+def _server_spans(exporter, method):
+    return [span for span in exporter.get_finished_spans() if span.attributes.get("http.request.method") == method]
+
+
+def test_raffle_lifecycle_is_one_trace(traced_client, db, spans):
+    raffle_id = _active_raffle(traced_client, winners_count=1)
+    db.add(RaffleParticipant(raffle_id=raffle_id, user_id="301", weight=1))
+    db.commit()
+    raffle = db.query(Raffle).filter(Raffle.id == raffle_id).one()
+    with tracer.start_as_current_span("scheduler.complete_expired_raffles") as scheduler_span:
+        assert complete_raffle(db, raffle) == ["301"]
+
+    created = _server_spans(spans, "POST")[0]
+    activated = _by_name(spans, "raffle.status.active")[0]
+    completed = _by_name(spans, "raffle.complete")[0]
+    assert activated.context.trace_id == completed.context.trace_id == created.context.trace_id
+    assert activated.parent.span_id == completed.parent.span_id == created.context.span_id
+    # Выбор победителей и рассылка - дочерние спаны завершения
+    draw = _by_name(spans, "raffle.draw")[0]
+    assert draw.parent.span_id == completed.context.span_id
+    # Запуск планировщика остается своим трейсом и связан ссылкой
+    assert [link.context.span_id for link in completed.links] == [scheduler_span.get_span_context().span_id]
+
+
+def test_entry_links_to_raffle_trace(traced_client, spans):
+    raffle_id = _active_raffle(traced_client)
+    assert traced_client.post(f"/api/v1/raffles/{raffle_id}/participants", json={"user_id": "302"}).status_code == 201
+
+    created = _server_spans(spans, "POST")[0]
+    entry = _by_name(spans, "raffle.enter")[0]
+    assert entry.context.trace_id != created.context.trace_id
+    assert [link.context.span_id for link in entry.links] == [created.context.span_id]
+
+
+def test_continue_trace_without_context_is_child_span(spans):
+    with tracer.start_as_current_span("outer") as outer:
+        with continue_trace("inner", None):
+            pass
+        with continue_trace("broken", "00-zz-zz-01"):
+            pass
+    for name in ("inner", "broken"):
+        assert _by_name(spans, name)[0].parent.span_id == outer.get_span_context().span_id
+
+
+def test_disabled_tracing_is_noop():
+    configure_tracing(None)
+    with tracer.start_as_current_span("noop") as span:
+        assert span is None
+        assert current_traceparent() is None
+        link_span("00-" + "1" * 32 + "-" + "2" * 16 + "-01")
+
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+def test_parse_traceparent():
+    context = parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01")
+    span_context = trace.get_current_span(context).get_span_context()
+    assert trace.format_trace_id(span_context.trace_id) == TRACE_ID
+    assert trace.format_span_id(span_context.span_id) == PARENT_ID
+    for value in (None, "", "garbage", f"00-{'0' * 32}-{PARENT_ID}-01"):
+        assert parse_traceparent(value) is None
+
+
+def test_incoming_traceparent_continued(traced_client, spans):
+    response = traced_client.get("/health/live", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"})
+    assert response.status_code == 200
+    [server] = _server_spans(spans, "GET")
+    assert server.kind == SpanKind.SERVER
+    assert trace.format_trace_id(server.context.trace_id) == TRACE_ID
+    assert trace.format_span_id(server.parent.span_id) == PARENT_ID
+    assert server.attributes["http.response.status_code"] == 200
+
+
+def test_current_traceparent_round_trip(spans):
+    with tracer.start_as_current_span("outer") as outer:
+        saved = current_traceparent()
+        assert current_trace_id() == trace.format_trace_id(outer.get_span_context().trace_id)
+    with continue_trace("later", saved):
+        pass
+    later = _by_name(spans, "later")[0]
+    assert later.parent.span_id == outer.get_span_context().span_id
+
+
+def test_unsampled_trace_not_recorded():
+    exporter = InMemorySpanExporter()
+    configure_tracing(SimpleSpanProcessor(exporter), sample_rate=0.0)
+    try:
+        with tracer.start_as_current_span("dropped"):
+            assert current_traceparent() is None
+    finally:
+        configure_tracing(None)
+    assert exporter.get_finished_spans() == ()
+
+
+def test_sql_spans_only_inside_trace(spans):
+    engine = create_engine("sqlite://")
+    instrument_engine_tracing(engine)
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        with tracer.start_as_current_span("job") as job:
+            conn.execute(text("select 2"))
+            with pytest.raises(Exception):
+                conn.execute(text("SELECT * FROM missing_table"))
+    sql = [span for span in spans.get_finished_spans() if span.kind == SpanKind.CLIENT]
+    assert [span.name for span in sql] == ["SELECT", "SELECT"]
+    assert all(span.parent.span_id == job.get_span_context().span_id for span in sql)
+    assert sql[0].attributes["db.statement"] == "select 2"
+    assert not sql[1].status.is_ok
+
+
+def test_file_exporter_writes_json_lines(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    configure_tracing(SimpleSpanProcessor(FileSpanExporter(str(path))))
+    try:
+        with tracer.start_as_current_span("first"):
+            with tracer.start_as_current_span("second"):
+                pass
+    finally:
+        configure_tracing(None)
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["name"] for line in lines] == ["second", "first"]
+
+
+def test_create_exporter(tmp_path):
+    assert isinstance(create_exporter("file", str(tmp_path / "spans.jsonl"), ""), FileSpanExporter)
+    assert isinstance(create_exporter("memory", "", ""), InMemorySpanExporter)
+    with pytest.raises(ValueError):
+        create_exporter("zipkin", "", "")
@@ -0,0 +1,88 @@
+# Тесты команды миграций и проверки версии схемы
+
+import os
+import threading
+
+import pytest
+from alembic import command
+from sqlalchemy import create_engine, text
+
+from src.core.config import settings
+from src.db.migrate import (
+    MIGRATION_LOCK_ID,
+    SchemaVersionError,
+    _acquire_lock,
+    _release_lock,
+    alembic_config,
+    check_schema_version,
+    schema_status,
+)
+
+
+@pytest.fixture
+def empty_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'schema.db'}")
+    yield engine
+    engine.dispose()
+
+
+def _stamp(engine, revision: str) -> None:
+    config = alembic_config()
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        command.stamp(config, revision)
+
+
+def test_migrations_have_single_head(empty_engine):
+    _, heads = schema_status(empty_engine)
+    assert len(heads) == 1
+
+
+def test_schema_check_reports_missing_migrations(empty_engine, monkeypatch):
+    monkeypatch.setattr(settings, "SCHEMA_CHECK", "warn")
+    assert check_schema_version(empty_engine) is False
+
+    monkeypatch.setattr(settings, "SCHEMA_CHECK", "fail")
+    with pytest.raises(SchemaVersionError):
+        check_schema_version(empty_engine)
+
+
+def test_schema_check_passes_at_head(empty_engine, monkeypatch):
+    monkeypatch.setattr(settings, "SCHEMA_CHECK", "fail")
+    _stamp(empty_engine, "head")
+    assert check_schema_version(empty_engine) is True
+
+
+def test_schema_check_tolerates_unreachable_database(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "SCHEMA_CHECK", "fail")
+    engine = create_engine(f"sqlite:///{tmp_path / 'missing' / 'schema.db'}")
+    assert check_schema_version(engine) is False
+
+
+@pytest.fixture
+def pg_engine():
+    # advisory-lock есть только в Postgres
+    url = os.environ.get("TEST_POSTGRES_URL")
+    if not url:
+        pytest.skip("TEST_POSTGRES_URL не задан")
+    engine = create_engine(url)
+    yield engine
+    engine.dispose()
+
+
+def test_migration_lock_waits_for_other_process(pg_engine):
+    with pg_engine.connect() as holder, pg_engine.connect() as waiter:
+        _acquire_lock(holder, timeout=1)
+        with pytest.raises(TimeoutError):
+            _acquire_lock(waiter, timeout=0.3, poll_interval=0.1)
+
+        releaser = threading.Timer(0.3, _release_lock, args=(holder,))
+        releaser.start()
+        _acquire_lock(waiter, timeout=5, poll_interval=0.1)
+        releaser.join()
+        locked = waiter.execute(
+            text("SELECT count(*) FROM pg_locks WHERE locktype = 'advisory' AND objid = :id"),
+            {"id": MIGRATION_LOCK_ID & 0xFFFFFFFF},
+        ).scalar()
+        assert locked == 1
+        _release_lock(waiter)
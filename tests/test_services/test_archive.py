@@ -0,0 +1,116 @@
+# Тесты архива завершенных розыгрышей
+
+import json
+import zlib
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.core.config import settings
+from src.db.models.raffle import Raffle, RaffleArchive, RaffleCounterShard, RaffleParticipant, RaffleStatus
+from src.services.archive import (
+    archive_old_raffles,
+    archive_raffle,
+    archived_participants,
+    find_raffle,
+    is_archived,
+    load_archived_raffle,
+)
+from src.services.eligibility import InMemoryMembershipSource, set_membership_source
+from src.services.raffle_lifecycle import complete_raffle
+from tests.test_api.test_raffle import _active_raffle
+
+
+def _completed_raffle(client, db, user_ids, **overrides) -> Raffle:
+    raffle_id = _active_raffle(client, **overrides)
+    for user_id in user_ids:
+        assert client.post(f"/api/v1/raffles/{raffle_id}/participants", json={"user_id": user_id}).status_code == 201
+    raffle = db.query(Raffle).filter(Raffle.id == raffle_id).one()
+    complete_raffle(db, raffle)
+    db.expire_all()
+    return db.query(Raffle).filter(Raffle.id == raffle_id).one()
+
+
+def test_archive_round_trip(client, db):
+    set_membership_source(InMemoryMembershipSource(members={"club1": {"901", "902"}}))
+    try:
+        raffle = _completed_raffle(client, db, ["901", "902", "903"], winners_count=2, require_community_subscription=True)
+    finally:
+        set_membership_source(None)
+    raffle_id = raffle.id
+    before = {column: getattr(raffle, column) for column in ("name", "status", "end_date", "created_at", "winners", "draw_seed")}
+
+    result = archive_raffle(db, raffle)
+    assert result.participants == 3
+    assert result.stored_bytes > 0
+    assert db.query(Raffle).filter(Raffle.id == raffle_id).count() == 0
+    for model in (RaffleParticipant, RaffleCounterShard):
+        assert db.query(model).filter(model.raffle_id == raffle_id).count() == 0
+
+    archived = load_archived_raffle(db, raffle_id)
+    assert is_archived(archived)
+    assert {column: getattr(archived, column) for column in before} == before
+    assert find_raffle(db, raffle_id).id == raffle_id
+    assert sorted(archived_participants(db, raffle_id)) == [
+        ("901", 1, None), ("902", 1, None), ("903", 0, "community:club1"),
+    ]
+
+
+def test_archived_raffle_still_served(client, db):
+    raffle = _completed_raffle(client, db, ["911", "912"])
+    raffle_id, winners = raffle.id, raffle.winners
+    archive_raffle(db, raffle)
+
+    response = client.get(f"/api/v1/raffles/{raffle_id}")
+    assert response.status_code == 200
+    assert response.json()["status"] == "completed"
+    assert client.get(f"/api/v1/raffles/{raffle_id}/draw").json()["winners"] == winners
+    verification = client.get(f"/api/v1/raffles/{raffle_id}/draw/verify").json()
+    assert verification["valid"] is True
+    assert verification["participants_count"] == 2
+    lines = client.get(f"/api/v1/raffles/{raffle_id}/draw/participants").text.splitlines()
+    assert sorted(lines) == ["911\t1\t", "912\t1\t"]
+    assert client.get("/api/v1/raffles/missing-raffle").status_code == 404
+
+
+def test_only_finished_raffles_archived(client, db):
+    raffle_id = _active_raffle(client)
+    raffle = db.query(Raffle).filter(Raffle.id == raffle_id).one()
+    with pytest.raises(ValueError):
+        archive_raffle(db, raffle)
+    assert db.query(RaffleArchive).filter(RaffleArchive.id == raffle_id).count() == 0
+
+
+def test_archive_old_raffles_by_age(client, db, monkeypatch):
+    monkeypatch.setattr(settings, "ARCHIVE_AFTER_DAYS", 30)
+    old = _completed_raffle(client, db, ["921"])
+    fresh = _completed_raffle(client, db, ["922"])
+    now = datetime.utcnow()
+    old.created_at = old.updated_at = now - timedelta(days=40)
+    db.commit()
+    old_id, fresh_id = old.id, fresh.id
+
+    assert archive_old_raffles(db, now) >= 1
+    assert db.query(RaffleArchive).filter(RaffleArchive.id == old_id).count() == 1
+    assert db.query(Raffle).filter(Raffle.id == fresh_id).count() == 1
+
+
+def test_reads_first_archive_format(db):
+    # Формат 1: участник без причины исключения
+    row = {
+        "id": "archived-v1", "vk_user_id": "1", "name": "Старый розыгрыш", "community_id": "club1",
+        "status": "cancelled", "end_date": "2024-01-01T00:00:00", "start_date": None,
+        "created_at": "2023-12-01T00:00:00", "updated_at": None,
+    }
+    lines = "".join(json.dumps(entry) + "\n" for entry in (["1", 2, None], ["2", 1, "dup"]))
+    db.add(RaffleArchive(
+        id="archived-v1", vk_user_id="1", community_id="club1", status="cancelled",
+        end_date=datetime(2024, 1, 1), participants_count=2, winners=None, format=1,
+        raffle_data=zlib.compress(json.dumps(row).encode()), participants_data=zlib.compress(lines.encode()),
+    ))
+    db.commit()
+
+    raffle = load_archived_raffle(db, "archived-v1")
+    assert raffle.status == RaffleStatus.CANCELLED
+    assert raffle.created_at == datetime(2023, 12, 1)
+    assert list(archived_participants(db, "archived-v1")) == [("1", 2, None), ("2", 1, None)]
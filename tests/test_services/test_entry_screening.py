@@ -0,0 +1,93 @@
+# Тесты проверки заявок при приеме
+
+import pytest
+
+from src.core.config import settings
+from src.services import entry_screening
+from src.services.entry_screening import (
+    ACCEPT,
+    FLAG,
+    REJECT,
+    CountMinSketch,
+    EntryScreener,
+    SlidingWindowCounter,
+    account_cluster,
+    get_entry_screener,
+    worker_limit,
+)
+
+
+def test_count_min_sketch_never_underestimates():
+    sketch = CountMinSketch(width=64, depth=4)
+    truth = {f"user{index}": index % 7 + 1 for index in range(500)}
+    for key, count in truth.items():
+        sketch.add(key, count)
+    assert all(sketch.estimate(key) >= count for key, count in truth.items())
+    assert sketch.width == 64
+
+    with pytest.raises(ValueError):
+        CountMinSketch(depth=0)
+
+
+def test_sliding_window_forgets_old_buckets():
+    counter = SlidingWindowCounter(window=60, buckets=6, width=256)
+    for second in range(0, 30, 5):
+        counter.add("user", now=second)
+    assert counter.estimate("user", now=35) == 6
+    # Интервалы [0, 10) и [10, 20) вышли из окна
+    assert counter.estimate("user", now=75) == 2
+    # В интервале [80, 90) вышли и события 20 и 25 с
+    assert counter.add("user", now=80) == 1
+    # Пауза длиннее окна очищает все интервалы
+    assert counter.estimate("user", now=500) == 0
+
+
+@pytest.mark.parametrize("user_id, cluster", [
+    ("1024", "id:1"),
+    ("2047", "id:1"),
+    ("2048", "id:2"),
+    ("Bot_123", "name:bot"),
+    ("bot124", "name:bot"),
+    ("ab12", None),
+    ("durov", None),
+])
+def test_account_cluster(user_id, cluster):
+    assert account_cluster(user_id) == cluster
+
+
+def test_screener_flags_then_rejects():
+    screener = EntryScreener(user_limit=2, source_limit=100, cluster_limit=100, reject_factor=2.0, width=256)
+    verdicts = [screener.screen(f"r{index}", "durov", now=1.0).verdict for index in range(5)]
+    assert verdicts == [ACCEPT, ACCEPT, FLAG, FLAG, REJECT]
+    assert screener.screen("r9", "durov", now=1.0).reasons == ("user",)
+    # Счетчики по пользователю не смешиваются
+    assert screener.screen("r1", "other", now=1.0).verdict == ACCEPT
+
+
+def test_screener_checks_source_and_similar_accounts():
+    screener = EntryScreener(user_limit=100, source_limit=2, cluster_limit=1, reject_factor=10.0, width=256)
+    assert screener.screen("r1", "bot_1", source="10.0.0.1", now=1.0).verdict == ACCEPT
+    second = screener.screen("r1", "bot_2", source="10.0.0.1", now=1.0)
+    assert second == entry_screening.Screening(FLAG, ("cluster",))
+    third = screener.screen("r1", "bot_3", source="10.0.0.1", now=1.0)
+    assert third.verdict == FLAG and set(third.reasons) == {"source", "cluster"}
+    # Похожие аккаунты считаются в пределах розыгрыша
+    assert screener.screen("r2", "bot_4", now=1.0).verdict == ACCEPT
+
+
+@pytest.mark.parametrize("limit, workers, expected", [(30, 1, 30), (30, 4, 8), (1, 8, 1), (10, 0, 10)])
+def test_worker_limit(limit, workers, expected):
+    assert worker_limit(limit, workers) == expected
+
+
+def test_shared_screener_divides_limits_between_workers(monkeypatch):
+    monkeypatch.setattr(entry_screening, "_screener", None)
+    monkeypatch.setattr(settings, "ENTRY_SCREENING_ENABLED", False)
+    assert get_entry_screener() is None
+
+    monkeypatch.setattr(settings, "ENTRY_SCREENING_ENABLED", True)
+    monkeypatch.setattr(settings, "SERVER_WORKERS", 4)
+    monkeypatch.setattr(settings, "ENTRY_USER_LIMIT", 30)
+    screener = get_entry_screener()
+    assert screener.limits["user"] == 8
+    assert get_entry_screener() is screener
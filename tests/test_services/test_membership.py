@@ -0,0 +1,87 @@
+# Тесты снимков подписок
+
+import pytest
+
+from src.core.config import settings
+from src.services.eligibility import RuleSet, get_membership_source, set_membership_source
+from src.services.membership import (
+    ARRAY_LIMIT,
+    CompactIdSet,
+    FileMembershipLoader,
+    MembershipSnapshotStore,
+    refresh_membership,
+    setup_membership,
+)
+
+
+def test_compact_set_array_and_bitmap_containers():
+    sparse = [str(user_id) for user_id in range(0, 3 * ARRAY_LIMIT, 3)]
+    dense = [str((7 << 16) + user_id) for user_id in range(ARRAY_LIMIT + 1)]
+    ids = CompactIdSet(sparse + dense + dense[:10])
+
+    assert len(ids) == len(sparse) + len(dense)
+    assert set(ids) == set(sparse) | set(dense)
+    assert "3" in ids and "4" not in ids
+    assert str((7 << 16) + ARRAY_LIMIT) in ids
+    assert str((7 << 16) + ARRAY_LIMIT + 1) not in ids
+    assert str(8 << 16) not in ids
+    assert ids.nbytes() < len(ids) * 8
+
+
+def test_compact_set_keeps_non_numeric_ids_as_is():
+    ids = CompactIdSet(["007", "0", "durov", "42"])
+    assert "007" in ids and "7" not in ids
+    assert "0" in ids and "durov" in ids
+    assert 42 not in ids
+    assert set(ids) == {"007", "0", "durov", "42"}
+    # Как обычное множество для RuleSet: пересечение через проверку членства
+    assert RuleSet(required=(ids,)).filter(["1", "42", "durov"]) == ["42", "durov"]
+
+
+@pytest.fixture
+def snapshot_dir(tmp_path):
+    (tmp_path / "members").mkdir()
+    (tmp_path / "admins").mkdir()
+    (tmp_path / "members" / "club1.txt").write_text("1\n2\n\n3\n", encoding="utf-8")
+    (tmp_path / "members" / "club2.txt").write_text("2\n", encoding="utf-8")
+    (tmp_path / "admins" / "club1.txt").write_text("1\n", encoding="utf-8")
+    return tmp_path
+
+
+def test_store_refresh_replaces_snapshots(snapshot_dir):
+    store = MembershipSnapshotStore(FileMembershipLoader(snapshot_dir), max_age=3600)
+    assert store.community_members("club1") is None
+    store.refresh()
+
+    assert set(store.community_members("club1")) == {"1", "2", "3"}
+    assert set(store.community_admins("club1")) == {"1"}
+    assert store.telegram_subscribers("@channel") is None
+    assert store.is_member("2", ["club1", "club2"])
+    assert not store.is_member("3", ["club1", "club2"])
+    assert not store.is_member("2", ["club3"])
+    assert [(row["kind"], row["key"], row["members"]) for row in store.footprint()] == [
+        ("admins", "club1", 1), ("members", "club1", 3), ("members", "club2", 1),
+    ]
+
+    (snapshot_dir / "members" / "club2.txt").write_text("3\n", encoding="utf-8")
+    assert store.refresh_if_stale() is False
+    assert store.is_member("2", ["club2"])
+    store.max_age = 0
+    assert store.refresh_if_stale() is True
+    assert store.is_member("3", ["club2"]) and not store.is_member("2", ["club2"])
+
+
+def test_setup_membership_registers_source(snapshot_dir, monkeypatch, db):
+    monkeypatch.setattr(settings, "MEMBERSHIP_SNAPSHOT_DIR", str(snapshot_dir))
+    monkeypatch.setattr(settings, "MEMBERSHIP_REFRESH_SECONDS", 3600.0)
+    try:
+        store = setup_membership()
+        assert get_membership_source() is store
+        refresh_membership(db)
+        assert store.refreshed_at is not None
+        assert "3" in store.community_members("club1")
+    finally:
+        set_membership_source(None)
+
+    monkeypatch.setattr(settings, "MEMBERSHIP_SNAPSHOT_DIR", None)
+    assert setup_membership() is None